@@ -1,17 +1,43 @@
 import os
+import logging
 from flask import Flask, render_template
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def create_app():
+def create_flask():
+    """The bare Flask app: configuration, templates and static files, without routes or background work."""
     app = Flask(__name__, template_folder='../templates', static_folder='../static')
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
+    return app
+
+def create_app():
+    # Set up logging
+    logging.basicConfig(level=logging.INFO)
+
+    app = create_flask()
+
+    # Time requests and expose /metrics
+    from app.metrics import init_metrics
+    init_metrics(app)
 
     # Register API routes
     from app.routes import register_routes
     register_routes(app)
 
+    # Serve resized article images through /img
+    from app.images import init_images
+    init_images(app)
+
+    # Load compiled templates and the last cached responses so the first request is served at once
+    from app.startup import init_snapshot, init_templates
+    init_templates(app)
+    init_snapshot(app)
+
+    # Keep category feeds warm in the background
+    from app.prefetch import init_prefetch
+    init_prefetch(app)
+
     # Add root route for homepage here
     @app.route('/')
     def index():
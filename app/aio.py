@@ -0,0 +1,282 @@
+import os
+import asyncio
+import logging
+import time
+from urllib.parse import parse_qsl
+
+import httpx
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import HTTPException
+
+from app.budget import BACKGROUND_WAIT, USER, USER_WAIT, may_refresh, refresh_priority
+from app.cache import make_key, response_cache
+from app.categories import HOME, categories
+from app.routes import (BATCH_MAX_SERIES, DEFAULT_SERIES, NEWS_API_URL, default_news_query, feed_params,
+                        feed_ttl, news_articles, news_params, parse_series_list)
+from app.store import (bls_covered_from, bls_sync_chunks, fred_covered_from, fred_sync_params, save_bls,
+                       save_fred, series_store, stale_series)
+from app.upstream import (CONNECT_TIMEOUT, READ_TIMEOUT, BudgetExhaustedError, bls_request, bls_results,
+                          fred_observations, fred_request, get_client)
+
+logger = logging.getLogger(__name__)
+# httpx logs every request at INFO; keep it in line with the requests-based path
+logging.getLogger('httpx').setLevel(logging.WARNING)
+
+# Connections each provider may hold open; the event loop, not threads, waits on them
+ASYNC_POOL_SIZE = int(os.getenv('ASYNC_UPSTREAM_POOL_SIZE', 100))
+
+def off_loop(func):
+    """Awaitable form of func run on the thread pool, for parsing, SQLite and file access.
+
+    Anything that blocks on the event loop stalls every request in flight.
+    """
+    return sync_to_async(func, thread_sensitive=False)
+
+
+class ThreadedWsgiInstance(WsgiToAsgiInstance):
+    """WSGI request runner using the whole thread pool.
+
+    asgiref runs WSGI apps thread-sensitively, i.e. one request at a time on a
+    single thread; Flask handlers are thread-safe, so run them concurrently.
+    """
+
+    async def run_wsgi_app(self, body):
+        await off_loop(self.serve)(body)
+
+    def serve(self, body):
+        # Runs on one pool thread, so start_response and the body are sent from the same thread
+        try:
+            environ = self.build_environ(self.scope, body)
+        except ValueError:
+            # Too many duplicate headers
+            self.sync_send({'type': 'http.response.start', 'status': 400,
+                            'headers': [(b'content-type', b'text/plain')]})
+            self.sync_send({'type': 'http.response.body', 'body': b'Bad Request'})
+            return
+        sent = 0
+        for output in self.wsgi_application(environ, self.start_response):
+            if not self.response_started:
+                self.response_started = True
+                self.sync_send(self.response_start)
+            if self.response_content_length is not None:
+                # Never send more than the declared Content-Length
+                output = output[:self.response_content_length - sent]
+            self.sync_send({'type': 'http.response.body', 'body': output, 'more_body': True})
+            sent += len(output)
+            if sent == self.response_content_length:
+                break
+        if not self.response_started:
+            self.response_started = True
+            self.sync_send(self.response_start)
+        self.sync_send({'type': 'http.response.body'})
+
+
+class ThreadedWsgiToAsgi(WsgiToAsgi):
+    async def __call__(self, scope, receive, send):
+        await ThreadedWsgiInstance(self.wsgi_application)(scope, receive, send)
+
+
+class AsyncUpstreamClient:
+    """Non-blocking counterpart of UpstreamClient sharing its circuit breaker and budget."""
+
+    def __init__(self, name):
+        sync_client = get_client(name)
+        self.name = name
+        self.sync_client = sync_client
+        self.breaker = sync_client.breaker
+        self.budget = sync_client.budget
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=ASYNC_POOL_SIZE, max_keepalive_connections=ASYNC_POOL_SIZE))
+
+    async def acquire(self, priority):
+        # Poll rather than block, so waiting for a token never holds up the event loop
+        deadline = time.monotonic() + (USER_WAIT if priority == USER else BACKGROUND_WAIT)
+        while True:
+            wait = self.budget.try_acquire(priority)
+            if wait == 0:
+                return
+            if wait is None or time.monotonic() + wait > deadline:
+                raise BudgetExhaustedError(self.name)
+            await asyncio.sleep(wait)
+
+    async def request(self, method, path, **kwargs):
+        sync_client = self.sync_client
+        priority = sync_client.begin()
+        url = sync_client.url(path)
+        if 'params' in kwargs:
+            # requests drops None params; httpx would send them as empty strings
+            kwargs['params'] = {k: v for k, v in kwargs['params'].items() if v is not None}
+        for attempt in range(sync_client.max_retries + 1):
+            if self.budget is not None:
+                await self.acquire(priority)
+            last_attempt = sync_client.is_last_attempt(attempt, priority)
+            started = time.perf_counter()
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if sync_client.record_error(e, time.perf_counter() - started, last_attempt):
+                    raise
+            else:
+                if sync_client.record_response(response, time.perf_counter() - started, last_attempt):
+                    return response
+            await asyncio.sleep(sync_client.backoff(attempt))
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+class AsyncFrontend:
+    """ASGI app that awaits upstream I/O, then hands the request to the Flask app.
+
+    News feeds are fetched into the response cache and stale series are synced
+    into the series store without blocking, so the blueprint handlers that run
+    afterwards (on asgiref's thread pool) are served from memory and disk. Any
+    failure here is only logged: the handler then falls back to its own
+    synchronous fetch and error responses.
+    """
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = ThreadedWsgiToAsgi(flask_app)
+        self.url_adapter = flask_app.url_map.bind('localhost')
+        self.clients = {}
+        self.tasks = set()
+        self.in_flight = {}
+
+    def client(self, name):
+        client = self.clients.get(name)
+        if client is None:
+            client = self.clients[name] = AsyncUpstreamClient(name)
+        return client
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            try:
+                await self.prepare(scope)
+            except Exception as e:
+                logger.warning(f"Async prefetch for {scope['path']} failed: {e}")
+        await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                for client in self.clients.values():
+                    await client.aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def authorized(self, scope):
+        api_key = dict(scope['headers']).get(b'x-api-key', b'').decode('latin-1')
+        return bool(api_key) and api_key == os.environ.get('API_KEY')
+
+    async def prepare(self, scope):
+        try:
+            endpoint, values = self.url_adapter.match(scope['path'], method='GET')
+        except HTTPException:
+            return
+        args = MultiDict(parse_qsl(scope['query_string'].decode('latin-1')))
+        # News pages: the homepage and every category in the registry
+        if endpoint in ('api.render_news_page', 'api.category_page'):
+            slug = values.get('slug', HOME)
+            category = await off_loop(categories.get)(slug)
+            if category is not None:
+                await self.warm_news(feed_params(category), slug)
+            return
+        # Economic-data routes require an API key; leave rejecting them to Flask
+        if not self.authorized(scope):
+            return
+        if endpoint == 'api.get_economic_news':
+            params = news_params(args.get('query') or default_news_query(), int(args.get('days', 3)))
+            return await self.warm_news(params, 'economic-news')
+        if endpoint == 'api.get_interest_rates':
+            return await self.sync_series('fred', [args.get('series', DEFAULT_SERIES['interest-rates'])])
+        if endpoint == 'api.get_inflation_data':
+            return await self.sync_series('fred', [args.get('series', DEFAULT_SERIES['inflation'])])
+        if endpoint == 'api.get_jobs_report':
+            series_ids = parse_series_list(args.get('series', DEFAULT_SERIES['jobs-report']))
+            return await self.sync_series('bls', series_ids)
+        if endpoint == 'api.get_economic_data_batch':
+            fred_ids = parse_series_list(args.get('fred'))
+            bls_ids = parse_series_list(args.get('bls'))
+            if len(fred_ids) + len(bls_ids) <= BATCH_MAX_SERIES:
+                await asyncio.gather(self.sync_series('fred', fred_ids), self.sync_series('bls', bls_ids))
+
+    async def coalesce(self, key, make):
+        """Await one shared task per key, so concurrent requests make a single upstream call."""
+        task = self.in_flight.get(key)
+        if task is None:
+            task = self.in_flight[key] = asyncio.ensure_future(make())
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        # Shielded so one cancelled request does not cancel the fetch others await
+        return await asyncio.shield(task)
+
+    # News feeds
+    async def fetch_news(self, params):
+        response = await self.client('newsapi').request('GET', '/everything', params=params)
+        return await off_loop(news_articles)(response)
+
+    async def warm_news(self, params, feed):
+        key = make_key(NEWS_API_URL, params)
+        ttl = await off_loop(feed_ttl)(feed)
+        entry = await off_loop(response_cache.get)(key)
+        if entry is None:
+            await self.coalesce(f"cache:{key}", lambda: self.store_news(key, params, ttl))
+        elif not entry.is_fresh() and may_refresh(self.client('newsapi').budget) and response_cache.claim_refresh(key):
+            self.spawn(self.refresh_news(key, params, ttl))
+
+    async def store_news(self, key, params, ttl):
+        await off_loop(response_cache.set)(key, await self.fetch_news(params), ttl)
+
+    async def refresh_news(self, key, params, ttl):
+        try:
+            with refresh_priority(self.client('newsapi').budget):
+                articles = await self.fetch_news(params)
+            await off_loop(response_cache.set)(key, articles, ttl)
+        except Exception as e:
+            logger.warning(f"Background refresh failed for {key}: {e}")
+        finally:
+            response_cache.release_refresh(key)
+
+    def spawn(self, coro):
+        # Keep a reference so the task is not garbage collected mid-flight
+        task = asyncio.ensure_future(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    # Economic series
+    async def sync_fred(self, series_id):
+        params = await off_loop(fred_sync_params)(series_store, series_id)
+        response = await self.client('fred').request(**fred_request(series_id, **params))
+        await off_loop(lambda: save_fred(series_store, series_id, fred_observations(response),
+                                         fred_covered_from(params)))()
+
+    async def sync_bls(self, chunk, start_year, end_year):
+        covered_from = await off_loop(bls_covered_from)(series_store, chunk, start_year)
+        response = await self.client('bls').request(**bls_request(chunk, start_year, end_year))
+        await off_loop(lambda: save_bls(series_store, chunk, bls_results(response), covered_from))()
+
+    async def sync_series(self, provider, series_ids):
+        stale = await off_loop(stale_series)(series_store, series_ids)
+        if not stale:
+            return
+        if provider == 'fred':
+            syncs = [self.coalesce(f"sync:fred:{series_id}", lambda series_id=series_id: self.sync_fred(series_id))
+                     for series_id in stale]
+        else:
+            syncs = [self.coalesce(f"sync:bls:{','.join(chunk[0])}", lambda chunk=chunk: self.sync_bls(*chunk))
+                     for chunk in await off_loop(bls_sync_chunks)(series_store, stale)]
+        for result in await asyncio.gather(*syncs, return_exceptions=True):
+            if isinstance(result, Exception):
+                logger.warning(f"Async {provider} sync failed: {result}")
+
+
+def create_asgi_app(flask_app):
+    return AsyncFrontend(flask_app)
@@ -0,0 +1,149 @@
+from app.lazy import lazy_import
+
+# Imported on first use so numpy stays off the startup path
+np = lazy_import('numpy')
+
+DEFAULT_WINDOW = 12
+
+
+class Series:
+    """A time series held as a datetime64[D] index and a contiguous float64 array."""
+
+    __slots__ = ('dates', 'values')
+
+    def __init__(self, dates, values):
+        self.dates = np.asarray(dates, dtype='datetime64[D]')
+        self.values = np.ascontiguousarray(values, dtype=np.float64)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from ascending (date, value, ...) rows; None and FRED's "." become NaN."""
+        dates = []
+        values = []
+        for row in rows:
+            dates.append(row[0])
+            value = row[1]
+            values.append(np.nan if value is None or value == "." else value)
+        return cls(np.array(dates, dtype='datetime64[D]'), np.array(values, dtype=np.float64))
+
+    def __len__(self):
+        return len(self.values)
+
+
+def shift_months(dates, months):
+    """Move each date by a number of months, clamping the day to the target month's end."""
+    month_starts = dates.astype('datetime64[M]')
+    day_offsets = dates - month_starts.astype('datetime64[D]')
+    target = month_starts + months
+    month_ends = (target + 1).astype('datetime64[D]') - 1
+    return np.minimum(target.astype('datetime64[D]') + day_offsets, month_ends)
+
+
+def asof(series, targets):
+    """Value of the last observation on or before each target date, NaN before the first."""
+    idx = np.searchsorted(series.dates, targets, side='right') - 1
+    out = np.full(len(targets), np.nan)
+    valid = idx >= 0
+    out[valid] = series.values[idx[valid]]
+    return out
+
+
+def pct_change(series, months):
+    prior = asof(series, shift_months(series.dates, -months))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (series.values / prior - 1.0) * 100.0
+
+
+def yoy(series, window=None):
+    return pct_change(series, 12)
+
+
+def mom(series, window=None):
+    return pct_change(series, 1)
+
+
+def annualized(series, window=None):
+    """Month-over-month change compounded over twelve months."""
+    prior = asof(series, shift_months(series.dates, -1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (np.power(series.values / prior, 12) - 1.0) * 100.0
+
+
+def _rolling_sums(values, window):
+    # Cumulative sums over NaN-zeroed values give every window's sum in O(n)
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    pad = np.zeros(1)
+    sums = np.concatenate((pad, np.cumsum(filled)))
+    squares = np.concatenate((pad, np.cumsum(filled * filled)))
+    counts = np.concatenate((pad, np.cumsum(valid)))
+    return (sums[window:] - sums[:-window],
+            squares[window:] - squares[:-window],
+            counts[window:] - counts[:-window])
+
+
+def rolling_mean(series, window=DEFAULT_WINDOW):
+    """Mean of the trailing window; NaN until the window holds only valid values."""
+    out = np.full(len(series), np.nan)
+    if window > len(series):
+        return out
+    sums, _, counts = _rolling_sums(series.values, window)
+    full = counts == window
+    out[window - 1:][full] = sums[full] / window
+    return out
+
+
+def rolling_std(series, window=DEFAULT_WINDOW):
+    """Sample standard deviation of the trailing window."""
+    out = np.full(len(series), np.nan)
+    if window < 2 or window > len(series):
+        return out
+    sums, squares, counts = _rolling_sums(series.values, window)
+    full = counts == window
+    variance = (squares[full] - sums[full] ** 2 / window) / (window - 1)
+    out[window - 1:][full] = np.sqrt(np.maximum(variance, 0.0))
+    return out
+
+
+def zscore(series, window=None):
+    """Standard score of each value against the mean and spread of the whole series given."""
+    values = series.values
+    if np.count_nonzero(~np.isnan(values)) < 2:
+        return np.full(len(values), np.nan)
+    std = np.nanstd(values, ddof=1)
+    if std == 0:
+        return np.zeros(len(values))
+    return (values - np.nanmean(values)) / std
+
+
+TRANSFORMS = {
+    'yoy': yoy,
+    'mom': mom,
+    'annualized': annualized,
+    'rolling_mean': rolling_mean,
+    'rolling_std': rolling_std,
+    'zscore': zscore,
+}
+
+# Months of history before the first output date that each transform looks at
+MONTHS_OF_HISTORY = {'yoy': 12, 'mom': 1, 'annualized': 1}
+# Transforms that look back a number of observations rather than months
+WINDOWED = {'rolling_mean', 'rolling_std'}
+# Transforms scored against every observation in the requested range
+WHOLE_RANGE = {'zscore'}
+
+
+def apply_transform(series, name, window=DEFAULT_WINDOW):
+    """Run a named transform over the whole series, returning a float64 array."""
+    return TRANSFORMS[name](series, window)
+
+
+def months_before(iso_date, months):
+    """ISO date a number of months before iso_date."""
+    return str(shift_months(np.array([iso_date], dtype='datetime64[D]'), -months)[0])
+
+
+def json_number(value, digits=4):
+    """Round a float for JSON output, mapping NaN and infinities to None."""
+    value = float(value)
+    return round(value, digits) if np.isfinite(value) else None
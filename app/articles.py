@@ -0,0 +1,164 @@
+import os
+import re
+import sys
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from app.models import Article
+from app.sanitize import clean_many
+from app.search import search_index
+
+# Query parameters that only track the click and never change the story
+TRACKING_PARAMS = {'fbclid', 'gclid', 'ref', 'cmpid', 'mc_cid', 'mc_eid', 'ocid', 'taid', 'smid'}
+
+# Separators NewsAPI titles put before the trailing source name
+TITLE_SEPARATORS = (' - ', ' | ', ' – ')
+# Seconds apart two articles with one title may be published and still be one story
+SAME_STORY_WINDOW = 24 * 3600
+
+_non_word = re.compile(r'[^\w\s]+')
+_whitespace = re.compile(r'\s+')
+
+
+def canonical_url(url):
+    """Normalize a URL so syndicated and tracked links to one story compare equal."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    query = sorted((k, v) for k, v in parse_qsl(parts.query)
+                   if not k.lower().startswith('utm_') and k.lower() not in TRACKING_PARAMS)
+    return urlunsplit(('https', host, parts.path.rstrip('/') or '/', urlencode(query), ''))
+
+
+def strip_source(title, source):
+    """Drop a trailing " - Source" naming the article's own source, keeping other " - ..." tails."""
+    if source:
+        lowered = title.lower()
+        for separator in TITLE_SEPARATORS:
+            suffix = f"{separator}{source}".lower()
+            if lowered.endswith(suffix):
+                return title[:-len(suffix)]
+    return title
+
+
+def title_fingerprint(title, source=None):
+    """Hash of the title without its trailing " - Source" and punctuation."""
+    title = strip_source(title, source)
+    words = _whitespace.sub(' ', _non_word.sub(' ', title.lower())).strip()
+    return hashlib.blake2b(words.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def published_time(value):
+    """Seconds since the epoch of a NewsAPI publishedAt timestamp, or None."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def same_story(article, other):
+    """Whether two articles with one title fingerprint were published close enough to be one story.
+
+    Recurring headlines such as daily market updates keep their title from
+    day to day, so a title match alone is not enough.
+    """
+    published, other_published = published_time(article.published_at), published_time(other.published_at)
+    if published is None or other_published is None:
+        return False
+    return abs(published - other_published) <= SAME_STORY_WINDOW
+
+
+def intern_text(value):
+    # Source and author names repeat across hundreds of articles; keep one copy of each
+    return sys.intern(value) if value else value
+
+
+def normalize(items):
+    """Turn NewsAPI article dicts into Articles, skipping unusable ones.
+
+    Titles, descriptions and content are sanitized field by field in batches.
+    """
+    items = [item for item in items
+             if item.get("title") and item.get("url") and item.get("title") != "[Removed]"]
+    titles = clean_many(item["title"] for item in items)
+    descriptions = clean_many(item.get("description") for item in items)
+    snippets = clean_many(item.get("content") for item in items)
+    sources = [intern_text((item.get("source") or {}).get("name")) for item in items]
+    return [Article(
+        title=title,
+        source=source,
+        author=intern_text(item.get("author")),
+        description=description,
+        url=item["url"],
+        published_at=item.get("publishedAt"),
+        content_snippet=snippet,
+        image_url=item.get("urlToImage"),
+        canonical_url=canonical_url(item["url"]),
+        fingerprint=title_fingerprint(item["title"], source),
+    ) for item, source, title, description, snippet in zip(items, sources, titles, descriptions, snippets)]
+
+
+class ArticlePool:
+    """Deduplicated, size-bounded pool of articles shared by every feed.
+
+    An incoming article matching a pooled one by canonical URL, or by title
+    fingerprint when published within SAME_STORY_WINDOW of it, resolves to the
+    pooled instance, so the same story fetched for several categories or
+    syndicated by several outlets is held only once.
+    Newly pooled articles are also added to the search index, if one is given.
+    """
+
+    def __init__(self, max_articles=5000, index=None):
+        self.max_articles = max_articles
+        self.index = index
+        self._by_url = OrderedDict()
+        self._by_title = {}
+        self._lock = threading.Lock()
+
+    def add(self, article):
+        with self._lock:
+            existing = self._by_url.get(article.canonical_url)
+            if existing is None:
+                existing = self._by_title.get(article.fingerprint)
+                if existing is not None and not same_story(article, existing):
+                    existing = None
+            if existing is not None:
+                self._by_url.move_to_end(existing.canonical_url)
+                return existing
+            self._by_url[article.canonical_url] = article
+            self._by_title[article.fingerprint] = article
+            while len(self._by_url) > self.max_articles:
+                _, evicted = self._by_url.popitem(last=False)
+                if self._by_title.get(evicted.fingerprint) is evicted:
+                    del self._by_title[evicted.fingerprint]
+        if self.index is not None:
+            self.index.add(article)
+        return article
+
+    def ingest(self, items):
+        """Normalize NewsAPI article dicts into a duplicate-free list of pooled Articles."""
+        return self.adopt(normalize(items))
+
+    def adopt(self, articles):
+        """Resolve Articles built elsewhere, e.g. loaded from the shared cache, to pooled ones."""
+        pooled = []
+        seen = set()
+        for article in articles:
+            article = self.add(article)
+            if id(article) not in seen:
+                seen.add(id(article))
+                pooled.append(article)
+        return pooled
+
+    def __len__(self):
+        return len(self._by_url)
+
+
+# Pool shared by all news routes
+article_pool = ArticlePool(int(os.getenv('ARTICLE_POOL_SIZE', 5000)), index=search_index)
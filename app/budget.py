@@ -0,0 +1,203 @@
+import os
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+# Lower values are served first
+USER = 0
+BACKGROUND = 1
+
+# Share of each daily quota only user-facing requests may spend
+USER_RESERVE = float(os.getenv('BUDGET_USER_RESERVE', 0.2))
+# Seconds a user request waits for a rate-limit token before failing over to cached data
+USER_WAIT = float(os.getenv('BUDGET_USER_WAIT', 2))
+BACKGROUND_WAIT = float(os.getenv('BUDGET_BACKGROUND_WAIT', 30))
+# Seconds a provider is left alone after a 429 without a Retry-After header
+RATE_LIMITED_PAUSE = 60
+# gunicorn's worker count; each worker process gets an equal share of the daily quotas
+WORKERS = max(int(os.getenv('WEB_CONCURRENCY', 1)), 1)
+
+
+def limit(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return float(value) if value else None
+
+
+# Published limits: NewsAPI's developer plan allows 100 requests a day, FRED 120
+# a minute, and BLS 50 per 10 seconds with 500 a day (25 without a key).
+# Each is (calls per window, window in seconds, calls per 24 hours).
+PROVIDER_LIMITS = {
+    'newsapi': (limit('NEWSAPI_RATE_LIMIT', 1), float(os.getenv('NEWSAPI_RATE_WINDOW', 1)),
+                limit('NEWSAPI_DAILY_LIMIT', 100)),
+    'fred': (limit('FRED_RATE_LIMIT', 120), float(os.getenv('FRED_RATE_WINDOW', 60)),
+             limit('FRED_DAILY_LIMIT', None)),
+    'bls': (limit('BLS_RATE_LIMIT', 50), float(os.getenv('BLS_RATE_WINDOW', 10)),
+            limit('BLS_DAILY_LIMIT', 500 if os.getenv('BLS_API_KEY') else 25)),
+}
+
+_priority = ContextVar('upstream_priority', default=USER)
+
+
+def current_priority():
+    return _priority.get()
+
+
+@contextmanager
+def background():
+    """Mark upstream calls made in this block as prefetch or refresh work."""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def may_refresh(budget):
+    # Once the daily quota is spent, keep serving the stale copy instead of failing a refresh per hit
+    return budget is None or budget.available(USER)
+
+
+def refresh_priority(budget):
+    """Context to refresh a stale cache entry in: background work while that share of the quota lasts.
+
+    A page someone is reading may then draw on the user reserve.
+    """
+    return background() if budget is None or budget.available(BACKGROUND) else nullcontext()
+
+
+class ProviderBudget:
+    """Token bucket and rolling 24-hour quota for one provider.
+
+    A limit of rate calls per window seconds is a bucket holding up to rate
+    tokens that refills at rate / window a second, so a burst such as a
+    batch request can spend the whole window at once. The quota caps calls
+    in any 24 hours, keeping the last reserve share of it for user requests. Blocked callers queue by
+    priority, so user requests get the next token before background ones.
+    """
+
+    def __init__(self, name, rate=None, window=1.0, daily=None, reserve=USER_RESERVE):
+        self.name = name
+        self.rate = rate
+        self.window = window
+        self.per_second = rate / window if rate else None
+        self.burst = max(1.0, rate or 0)
+        self.daily = daily
+        self.reserve = int((daily or 0) * reserve)
+        self._tokens = self.burst
+        self._refilled_at = time.monotonic()
+        self._calls = deque()
+        self._paused_until = 0.0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def _refill(self, now):
+        if self.per_second:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.per_second)
+        self._refilled_at = now
+
+    def _used_today(self):
+        cutoff = time.time() - 86400
+        while self._calls and self._calls[0] <= cutoff:
+            self._calls.popleft()
+        return len(self._calls)
+
+    def _quota_left(self, priority):
+        if self.daily is None:
+            return True
+        floor = self.reserve if priority == BACKGROUND else 0
+        return self.daily - self._used_today() > floor
+
+    def _take(self, priority):
+        """Spend a token: 0 on success, seconds to wait, or None once the quota is spent."""
+        now = time.monotonic()
+        if not self._quota_left(priority):
+            return None
+        if now < self._paused_until:
+            return self._paused_until - now
+        self._refill(now)
+        if self.per_second and self._tokens < 1:
+            return (1 - self._tokens) / self.per_second
+        if self.per_second:
+            self._tokens -= 1
+        self._calls.append(time.time())
+        return 0
+
+    def try_acquire(self, priority=USER):
+        """Non-blocking form of acquire, returning _take's result."""
+        with self._condition:
+            if self._waiters:
+                # Let queued callers go first
+                return 1 / (self.per_second or 1)
+            return self._take(priority)
+
+    def acquire(self, priority=USER, timeout=None):
+        """Wait for a token in priority order; False if none comes within timeout or the quota is spent."""
+        if timeout is None:
+            timeout = USER_WAIT if priority == USER else BACKGROUND_WAIT
+        deadline = time.monotonic() + timeout
+        waiter = (priority, next(self._sequence))
+        with self._condition:
+            heapq.heappush(self._waiters, waiter)
+            try:
+                while True:
+                    wait = self._take(priority) if self._waiters[0] == waiter else None
+                    if wait == 0:
+                        return True
+                    if wait is None and self._waiters[0] == waiter:
+                        return False
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._condition.wait(min(remaining, wait if wait else remaining))
+            finally:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+                self._condition.notify_all()
+
+    def available(self, priority=USER):
+        """True when a call at this priority would not be refused for quota."""
+        with self._condition:
+            return self._quota_left(priority)
+
+    def pause(self, seconds):
+        """Stop spending tokens for a while, e.g. after the provider answered 429."""
+        with self._condition:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        logger.warning(f"{self.name} rate limited; pausing requests for {seconds:.0f}s")
+
+    def snapshot(self):
+        with self._condition:
+            now = time.monotonic()
+            self._refill(now)
+            used = self._used_today()
+            return {
+                "rate_limit": self.rate,
+                "rate_window": self.window,
+                "tokens": round(self._tokens, 2) if self.per_second else None,
+                "daily_limit": self.daily,
+                "used_24h": used,
+                "remaining_24h": max(self.daily - used, 0) if self.daily is not None else None,
+                "reserved_for_users": self.reserve,
+                "paused_for": round(max(self._paused_until - now, 0), 1),
+                "queued": len(self._waiters),
+            }
+
+
+budgets = {
+    name: ProviderBudget(name, rate and rate / WORKERS, window, daily and int(daily // WORKERS))
+    for name, (rate, window, daily) in PROVIDER_LIMITS.items()
+}
+
+
+def get_budget(name):
+    return budgets.get(name)
@@ -0,0 +1,341 @@
+import os
+import pickle
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from app.articles import article_pool
+from app.budget import get_budget, may_refresh, refresh_priority
+from app.metrics import record_cache
+from app.singleflight import singleflight
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that identify the caller rather than the data requested
+SECRET_PARAMS = {'api_key', 'apiKey', 'registrationkey'}
+
+
+def make_key(endpoint, params=None):
+    """Build a cache key from an upstream endpoint and its normalized params."""
+    items = []
+    for name, value in sorted((params or {}).items()):
+        if name in SECRET_PARAMS or value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            value = ','.join(str(v) for v in value)
+        items.append(f"{name}={str(value).strip()}")
+    return f"{endpoint}?{'&'.join(items)}"
+
+
+class CacheEntry:
+    __slots__ = ('value', 'stored_at', 'ttl')
+
+    def __init__(self, value, stored_at, ttl):
+        self.value = value
+        self.stored_at = stored_at
+        self.ttl = ttl
+
+    def is_fresh(self, now=None):
+        return ((now or time.time()) - self.stored_at) < self.ttl
+
+
+class MemoryBackend:
+    """In-process LRU storage for cache entries."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def items(self):
+        with self._lock:
+            return list(self._entries.items())
+
+    def __len__(self):
+        return len(self._entries)
+
+
+SHARED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    stored_at REAL NOT NULL,
+    ttl REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    value BLOB NOT NULL
+);
+"""
+
+# Column each eviction policy drops the smallest values of first
+EVICTION_ORDER = {
+    'lru': 'accessed_at',
+    'fifo': 'stored_at',
+    'ttl': 'stored_at + ttl',
+}
+
+
+class SqliteBackend:
+    """Cache storage in a SQLite file shared by every worker process.
+
+    The database runs in WAL mode, so readers in other processes never block
+    on a writer, and is memory-mapped, so lookups read pages straight from
+    the OS page cache that all workers share. Values are pickled; the last
+    few decoded entries are kept per process and reused for as long as the
+    stored copy has the same stored_at, so a hit on an unchanged entry costs
+    one small indexed query. Past max_entries or max_bytes of pickled values,
+    entries are evicted by policy: 'lru', 'fifo' or 'ttl' (soonest to expire).
+    decode, if given, is applied to values loaded from the file.
+    """
+
+    def __init__(self, path, max_entries=256, max_bytes=64 * 1024 * 1024, policy='lru',
+                 mmap_size=256 * 1024 * 1024, decoded_entries=32, decode=None):
+        if policy not in EVICTION_ORDER:
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.mmap_size = mmap_size
+        self.decoded_entries = decoded_entries
+        self.decode = decode
+        self._decoded = OrderedDict()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection().executescript(SHARED_SCHEMA)
+
+    def connection(self):
+        # SQLite connections are not shared across threads; keep one per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self.connection()
+        row = conn.execute('SELECT stored_at, ttl, accessed_at FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        stored_at, ttl, accessed_at = row
+        now = time.time()
+        if self.policy == 'lru' and now - accessed_at >= 1:
+            # At most one write per entry per second keeps hot keys from serializing readers
+            conn.execute('UPDATE entries SET accessed_at = ? WHERE key = ?', (now, key))
+        with self._lock:
+            entry = self._decoded.get(key)
+            if entry is not None and entry.stored_at == stored_at:
+                self._decoded.move_to_end(key)
+                return entry
+        row = conn.execute('SELECT value FROM entries WHERE key = ? AND stored_at = ?',
+                           (key, stored_at)).fetchone()
+        if row is None:
+            # Replaced or evicted by another worker between the two queries
+            return self.get(key)
+        value = pickle.loads(row[0])
+        if self.decode is not None:
+            value = self.decode(value)
+        entry = CacheEntry(value, stored_at, ttl)
+        self._remember(key, entry)
+        return entry
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._decoded[key] = entry
+            self._decoded.move_to_end(key)
+            while len(self._decoded) > self.decoded_entries:
+                self._decoded.popitem(last=False)
+
+    def set(self, key, entry):
+        data = pickle.dumps(entry.value, protocol=pickle.HIGHEST_PROTOCOL)
+        conn = self.connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO entries (key, stored_at, ttl, accessed_at, size, value) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (key, entry.stored_at, entry.ttl, time.time(), len(data), data))
+            self._evict(conn)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        self._remember(key, entry)
+
+    def _evict(self, conn):
+        count, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        evicted = []
+        rows = conn.execute(f'SELECT key, size FROM entries ORDER BY {EVICTION_ORDER[self.policy]}')
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            count -= 1
+            total -= size
+        conn.executemany('DELETE FROM entries WHERE key = ?', evicted)
+        with self._lock:
+            for (key,) in evicted:
+                self._decoded.pop(key, None)
+
+    def delete(self, key):
+        self.connection().execute('DELETE FROM entries WHERE key = ?', (key,))
+        with self._lock:
+            self._decoded.pop(key, None)
+
+    def clear(self):
+        self.connection().execute('DELETE FROM entries')
+        with self._lock:
+            self._decoded.clear()
+
+    def size_bytes(self):
+        return self.connection().execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+
+    def __len__(self):
+        return self.connection().execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+
+class ResponseCache:
+    """TTL cache for upstream responses that serves stale data while refreshing.
+
+    Expired entries are still returned to the caller; a single background
+    thread per key refreshes them, so only a cold miss waits on upstream.
+    When name is a provider, refreshes follow that provider's request budget.
+    """
+
+    def __init__(self, backend=None, default_ttl=300, name='response'):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.default_ttl = default_ttl
+        self.name = name
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached entry for key, fresh or stale, without fetching."""
+        return self.backend.get(key)
+
+    def set(self, key, value, ttl=None):
+        entry = CacheEntry(value, time.time(), ttl or self.default_ttl)
+        self.backend.set(key, entry)
+        return entry
+
+    def get_or_fetch(self, key, fetch, ttl=None):
+        """Return the value for key, calling fetch() only on a cold miss.
+
+        Concurrent misses for one key share a single fetch.
+        """
+        entry = self.backend.get(key)
+        if entry is None:
+            record_cache(self.name, 'miss')
+            return singleflight.do(f"cache:{key}", lambda: self._fill(key, fetch, ttl, fresh_only=False))
+        if not entry.is_fresh():
+            record_cache(self.name, 'stale')
+            self.refresh_in_background(key, fetch, ttl)
+        else:
+            record_cache(self.name, 'hit')
+        return entry.value
+
+    def claim_refresh(self, key):
+        """Mark key as being refreshed; False if another refresh already owns it."""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def release_refresh(self, key):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def refresh_in_background(self, key, fetch, ttl=None):
+        if not may_refresh(get_budget(self.name)):
+            return False
+        if not self.claim_refresh(key):
+            return False
+        thread = threading.Thread(target=self._refresh, args=(key, fetch, ttl), daemon=True)
+        thread.start()
+        return True
+
+    def _fill(self, key, fetch, ttl, fresh_only):
+        # Another thread or worker may have stored the key while this one waited its turn
+        entry = self.backend.get(key)
+        if entry is not None and (not fresh_only or entry.is_fresh()):
+            return entry.value
+        return self.set(key, fetch(), ttl).value
+
+    def refresh(self, key, fetch, ttl=None, max_age=0):
+        """Fetch key again unless this or another worker stored it less than max_age seconds ago."""
+        def fill():
+            entry = self.backend.get(key)
+            if entry is not None and time.time() - entry.stored_at < max_age:
+                return entry.value
+            return self.set(key, fetch(), ttl).value
+        return singleflight.do(f"cache:{key}", fill)
+
+    def _refresh(self, key, fetch, ttl):
+        try:
+            with refresh_priority(get_budget(self.name)):
+                singleflight.do(f"cache:{key}", lambda: self._fill(key, fetch, ttl, fresh_only=True))
+        except Exception as e:
+            logger.warning(f"Background refresh failed for {key}: {e}")
+        finally:
+            self.release_refresh(key)
+
+    def clear(self):
+        self.backend.clear()
+
+
+def response_backend():
+    """In-process storage, or a file shared by all workers when SHARED_CACHE_PATH is set."""
+    max_entries = int(os.getenv('RESPONSE_CACHE_SIZE', 256))
+    path = os.getenv('SHARED_CACHE_PATH')
+    if not path:
+        return MemoryBackend(max_entries=max_entries)
+    logger.info(f"Sharing the response cache across workers through {path}")
+    return SqliteBackend(
+        path,
+        max_entries=max_entries,
+        max_bytes=int(os.getenv('SHARED_CACHE_MAX_MB', 64)) * 1024 * 1024,
+        policy=os.getenv('SHARED_CACHE_EVICTION', 'lru'),
+        mmap_size=int(os.getenv('SHARED_CACHE_MMAP_MB', 256)) * 1024 * 1024,
+        # Articles another worker fetched join this worker's pool and search index
+        decode=article_pool.adopt,
+    )
+
+
+# Shared cache for NewsAPI-backed pages
+response_cache = ResponseCache(
+    response_backend(),
+    default_ttl=int(os.getenv('RESPONSE_CACHE_TTL', 300)),
+    name='newsapi',
+)
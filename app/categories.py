@@ -0,0 +1,125 @@
+import os
+import re
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# The homepage feed, served at / rather than as a category page
+HOME = 'home'
+
+CATEGORIES_FILE = os.getenv('CATEGORIES_FILE', os.path.join(os.path.dirname(__file__), '..', 'categories.json'))
+# Seconds between checks of the categories file for edits
+RELOAD_INTERVAL = float(os.getenv('CATEGORIES_RELOAD_INTERVAL', 5))
+
+# First path segments of the app's other routes, which a category page would be shadowed by
+RESERVED_SLUGS = {'static', 'img', 'metrics', 'budget', 'search', 'interest-rates', 'jobs-report', 'inflation',
+                  'economic-data', 'economic-news'}
+SLUG_PATTERN = re.compile(r'^[a-z0-9]+(?:-[a-z0-9]+)*$')
+
+
+class Category:
+    """A news page: its NewsAPI query and look-back, cache TTL and how it is shown."""
+
+    __slots__ = ('slug', 'title', 'nav_title', 'description', 'icon', 'query', 'days', 'ttl')
+
+    def __init__(self, slug, title, query, days=2, ttl=600, description='', icon='fas fa-newspaper',
+                 nav_title=None):
+        self.slug = slug
+        self.title = title
+        self.nav_title = nav_title or title
+        self.description = description
+        self.icon = icon
+        self.query = query
+        self.days = days
+        self.ttl = ttl
+
+    def __repr__(self):
+        return f"<Category {self.slug}>"
+
+
+def parse_categories(data):
+    """Build Categories from the file's {slug: {...}} mapping, raising ValueError if invalid."""
+    if not isinstance(data, dict) or HOME not in data:
+        raise ValueError(f"Categories must be an object of slug to settings including '{HOME}'")
+    categories = {}
+    for slug, settings in data.items():
+        if not SLUG_PATTERN.match(slug):
+            raise ValueError(f"Category '{slug}': slugs are lowercase letters, digits and single hyphens")
+        if slug in RESERVED_SLUGS:
+            raise ValueError(f"Category '{slug}': the slug is taken by another route")
+        if not isinstance(settings, dict) or not settings.get('query') or not settings.get('title'):
+            raise ValueError(f"Category '{slug}' needs a title and a query")
+        try:
+            category = Category(slug, **settings)
+        except TypeError as e:
+            raise ValueError(f"Category '{slug}': {e}")
+        if not isinstance(category.days, int) or category.days < 1:
+            raise ValueError(f"Category '{slug}': days must be a positive integer")
+        if not isinstance(category.ttl, int) or category.ttl < 1:
+            raise ValueError(f"Category '{slug}': ttl must be a positive integer")
+        categories[slug] = category
+    return categories
+
+
+class CategoryRegistry:
+    """News categories declared in a JSON file, reloaded when the file changes.
+
+    Lookups stat the file at most every reload_interval seconds; an edit that
+    does not parse is logged and the previous categories stay in use.
+    Listeners are called after each successful reload.
+    """
+
+    def __init__(self, path, reload_interval=RELOAD_INTERVAL):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.listeners = []
+        self._lock = threading.Lock()
+        self._mtime = os.stat(path).st_mtime
+        self._checked_at = time.monotonic()
+        self._categories = self._read()
+
+    def _read(self):
+        with open(self.path) as f:
+            return parse_categories(json.load(f))
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self.reload_interval:
+                return
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime
+                if mtime == self._mtime:
+                    return
+                self._mtime = mtime
+                self._categories = self._read()
+            except (OSError, ValueError) as e:
+                logger.error(f"Keeping current categories, could not reload {self.path}: {e}")
+                return
+        logger.info(f"Reloaded {len(self._categories)} categories from {self.path}")
+        for listener in self.listeners:
+            listener()
+
+    def get(self, slug):
+        self._maybe_reload()
+        return self._categories.get(slug)
+
+    def all(self):
+        self._maybe_reload()
+        return list(self._categories.values())
+
+    def pages(self):
+        """Categories with their own page, in file order."""
+        return [category for category in self.all() if category.slug != HOME]
+
+    def on_reload(self, listener):
+        self.listeners.append(listener)
+
+
+categories = CategoryRegistry(CATEGORIES_FILE)
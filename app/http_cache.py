@@ -0,0 +1,67 @@
+import os
+import hashlib
+import time
+from datetime import datetime
+
+from flask import current_app, jsonify, render_template, request
+
+from app.cache import MemoryBackend, make_key
+from app.metrics import record_cache, timed
+
+# Seconds browsers and CDNs may reuse a page before revalidating it
+PAGE_MAX_AGE = int(os.getenv('PAGE_MAX_AGE', 60))
+
+# Rendered pages, keyed by template, context and the article set they show
+page_cache = MemoryBackend(max_entries=int(os.getenv('PAGE_CACHE_SIZE', 64)))
+
+
+class RenderedPage:
+    __slots__ = ('body', 'etag', 'modified_at')
+
+    def __init__(self, body, etag, modified_at):
+        self.body = body
+        self.etag = etag
+        self.modified_at = modified_at
+
+
+def articles_digest(articles):
+    """Content hash of every article field a template can show."""
+    digest = hashlib.blake2b(digest_size=16)
+    for article in articles:
+        for value in article.to_dict().values():
+            digest.update((value or '').encode('utf-8'))
+            digest.update(b'\x1f')
+        digest.update(b'\x1e')
+    return digest.hexdigest()
+
+
+def conditional(response, modified_at, cache_control):
+    """Add validators and caching headers, turning the response into a 304 when they match."""
+    if not response.get_etag()[0]:
+        response.add_etag()
+    response.last_modified = modified_at
+    response.headers['Cache-Control'] = cache_control
+    return response.make_conditional(request)
+
+
+def render_page(template, articles, **context):
+    """Render a news page, reusing the HTML while its article set is unchanged."""
+    key = make_key(template, {**context, 'articles': articles_digest(articles)})
+    page = page_cache.get(key)
+    record_cache('pages', 'miss' if page is None else 'hit')
+    if page is None:
+        with timed('render'):
+            body = render_template(template, articles=articles, **context).encode('utf-8')
+        etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        page = RenderedPage(body, etag, int(time.time()))
+        page_cache.set(key, page)
+    response = current_app.response_class(page.body, mimetype='text/html')
+    response.set_etag(page.etag)
+    return conditional(response, page.modified_at, f"public, max-age={PAGE_MAX_AGE}")
+
+
+def json_response(payload, updated_at):
+    """JSON API response stamped with when its data last changed, so repeats revalidate to 304."""
+    updated_at = int(updated_at)
+    payload["last_updated"] = datetime.fromtimestamp(updated_at).isoformat()
+    return conditional(jsonify(payload), updated_at, "private, no-cache")
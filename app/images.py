@@ -0,0 +1,261 @@
+import io
+import os
+import hmac
+import time
+import socket
+import hashlib
+import logging
+import tempfile
+import ipaddress
+import threading
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from flask import abort, current_app, redirect, request, send_file, url_for
+from requests.adapters import HTTPAdapter
+
+from app.cache import CacheEntry, MemoryBackend
+from app.metrics import record_cache, record_upstream, timed
+from app.singleflight import singleflight
+
+logger = logging.getLogger(__name__)
+
+# Widths served for the 2:1 card images; the larger one is for high-density screens
+IMAGE_WIDTHS = (400, 800)
+IMAGE_QUALITY = int(os.getenv('IMAGE_QUALITY', 75))
+IMAGE_CACHE_DIR = os.getenv('IMAGE_CACHE_DIR', os.path.join('data', 'images'))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv('IMAGE_CACHE_MAX_MB', 256)) * 1024 * 1024
+# Seconds browsers may reuse a proxied image; its URL changes if the source does
+IMAGE_MAX_AGE = int(os.getenv('IMAGE_MAX_AGE', 7 * 24 * 3600))
+# Originals larger than this are not downloaded
+IMAGE_MAX_SOURCE_BYTES = int(os.getenv('IMAGE_MAX_SOURCE_MB', 15)) * 1024 * 1024
+# Seconds a source that failed is answered with the default image without retrying
+IMAGE_FAILURE_TTL = int(os.getenv('IMAGE_FAILURE_TTL', 600))
+IMAGE_TIMEOUT = (float(os.getenv('UPSTREAM_CONNECT_TIMEOUT', 3.05)), float(os.getenv('IMAGE_READ_TIMEOUT', 5)))
+# Redirects followed per source; each target is checked like the source itself
+IMAGE_MAX_REDIRECTS = 3
+# Let sources resolve to private and loopback addresses, e.g. a local stand-in server
+IMAGE_ALLOW_PRIVATE = os.getenv('IMAGE_ALLOW_PRIVATE', '0').lower() in ('1', 'true', 'yes')
+
+# Refuse decompression bombs well before Pillow's own limit
+MAX_IMAGE_PIXELS = 40_000_000
+
+
+class ImageFetchError(Exception):
+    """Raised when a source image cannot be downloaded or decoded."""
+
+
+class DiskCache:
+    """Files named by the hash of their key, evicted least recently used past max_bytes.
+
+    Keys are known before anything is downloaded (for images, the width and
+    source URL), so files are addressed by key rather than by content. A hit refreshes the file's mtime, so the mtime order is the LRU order and
+    is shared by every worker using the directory. Writes are atomic renames.
+    """
+
+    def __init__(self, directory, max_bytes):
+        # Absolute, since send_file resolves relative paths against the app package rather than the cwd
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self._size = None
+        self._lock = threading.Lock()
+
+    def path(self, key):
+        name = hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+        return os.path.join(self.directory, name[:2], f"{name}.webp")
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def put(self, key, data):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._files())
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+        return path
+
+    def _files(self):
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def _evict(self):
+        # Other workers write here too, so take the real size from disk before deleting
+        files = sorted(self._files(), key=lambda f: f[2])
+        self._size = sum(size for _, size, _ in files)
+        # Drop to 90% of the cap so eviction does not run on every write
+        target = self.max_bytes * 0.9
+        for path, size, _ in files:
+            if self._size <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+
+
+disk_cache = DiskCache(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES)
+failures = MemoryBackend(max_entries=1024)
+
+session = requests.Session()
+session.headers['User-Agent'] = 'Ecopulse image proxy'
+_adapter = HTTPAdapter(pool_connections=32, pool_maxsize=int(os.getenv('UPSTREAM_POOL_SIZE', 10)))
+session.mount('https://', _adapter)
+session.mount('http://', _adapter)
+
+
+def sign(url, width):
+    key = current_app.config['SECRET_KEY'].encode('utf-8')
+    return hmac.new(key, f"{width}:{url}".encode('utf-8'), hashlib.sha256).hexdigest()[:32]
+
+
+def proxied_image(url, width=IMAGE_WIDTHS[0]):
+    """URL of a resized WebP copy of a publisher image, or the original without SECRET_KEY.
+
+    Proxy URLs are signed so /img only ever fetches images the app itself linked to.
+    """
+    if not url or not current_app.config.get('SECRET_KEY'):
+        return url
+    return url_for('image', url=url, w=width, sig=sign(url, width))
+
+
+def proxied_srcset(url):
+    if not url or not current_app.config.get('SECRET_KEY'):
+        return ''
+    return ', '.join(f"{proxied_image(url, width)} {width}w" for width in IMAGE_WIDTHS)
+
+
+def check_public(url):
+    """Raise ImageFetchError unless url is http(s) on a host with only public addresses.
+
+    Publishers supply the source URLs, and a signed one may still point, or
+    redirect, at the app's own network.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise ImageFetchError(f"{url} is not an http(s) URL")
+    if IMAGE_ALLOW_PRIVATE:
+        return
+    try:
+        infos = socket.getaddrinfo(parts.hostname, parts.port, type=socket.SOCK_STREAM)
+        addresses = {info[4][0] for info in infos}
+    except (OSError, UnicodeError, ValueError) as e:
+        raise ImageFetchError(f"{url} failed: {e}")
+    for address in addresses:
+        # Drop any IPv6 zone index
+        if not ipaddress.ip_address(address.split('%')[0]).is_global:
+            raise ImageFetchError(f"{url} resolves to non-public address {address}")
+
+
+def download(url):
+    started = time.perf_counter()
+    try:
+        for _ in range(IMAGE_MAX_REDIRECTS + 1):
+            check_public(url)
+            response = session.get(url, timeout=IMAGE_TIMEOUT, stream=True, allow_redirects=False)
+            if not response.is_redirect:
+                break
+            response.close()
+            url = urljoin(url, response.headers['Location'])
+        else:
+            raise ImageFetchError(f"{url} redirected more than {IMAGE_MAX_REDIRECTS} times")
+        with response:
+            record_upstream('images', response.status_code, time.perf_counter() - started)
+            if response.status_code != 200:
+                raise ImageFetchError(f"{url} returned status code {response.status_code}")
+            data = bytearray()
+            for chunk in response.iter_content(64 * 1024):
+                data += chunk
+                if len(data) > IMAGE_MAX_SOURCE_BYTES:
+                    raise ImageFetchError(f"{url} is larger than {IMAGE_MAX_SOURCE_BYTES} bytes")
+            return bytes(data)
+    except requests.exceptions.RequestException as e:
+        record_upstream('images', 'error', time.perf_counter() - started)
+        raise ImageFetchError(f"{url} failed: {e}")
+
+
+def resize(data, width):
+    """Crop and scale an image to width x width/2 and encode it as WebP."""
+    # Pillow is only needed on a cache miss, so it is not imported at startup
+    from PIL import Image, ImageOps
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+    size = (width, width // 2)
+    with timed('resize'):
+        try:
+            image = Image.open(io.BytesIO(data))
+            # Let JPEG decode at a reduced scale instead of decoding every original pixel
+            image.draft('RGB', (size[0] * 2, size[1] * 2))
+            image = ImageOps.exif_transpose(image)
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+            image = ImageOps.fit(image, size, Image.LANCZOS)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            raise ImageFetchError(f"Could not decode image: {e}")
+        out = io.BytesIO()
+        image.save(out, 'WEBP', quality=IMAGE_QUALITY, method=4)
+        return out.getvalue()
+
+
+def load_image(url, width):
+    """Path of the cached variant, downloading and resizing the original once."""
+    key = f"{width}:{url}"
+    path = disk_cache.get(key)
+    if path is not None:
+        record_cache('images', 'hit')
+        return path
+    record_cache('images', 'miss')
+
+    def fill():
+        # Another request or worker may have stored it while this one waited
+        return disk_cache.get(key) or disk_cache.put(key, resize(download(url), width))
+    return singleflight.do(f"img:{key}", fill)
+
+
+def image_view():
+    url = request.args.get('url', '')
+    sig = request.args.get('sig', '')
+    try:
+        width = int(request.args.get('w', IMAGE_WIDTHS[0]))
+    except ValueError:
+        abort(400)
+    if (width not in IMAGE_WIDTHS or not url.startswith(('http://', 'https://'))
+            or not current_app.config.get('SECRET_KEY') or not hmac.compare_digest(sig, sign(url, width))):
+        abort(403)
+    fallback = redirect(url_for('static', filename='default-news.svg'))
+    failure = failures.get(url)
+    if failure is not None and failure.is_fresh():
+        return fallback
+    try:
+        path = load_image(url, width)
+    except ImageFetchError as e:
+        logger.warning(f"Image proxy serving default image: {e}")
+        failures.set(url, CacheEntry(None, time.time(), IMAGE_FAILURE_TTL))
+        return fallback
+    # The file name is the variant's hash; mtime cannot serve as the ETag since hits touch it
+    etag = os.path.splitext(os.path.basename(path))[0]
+    return send_file(path, mimetype='image/webp', max_age=IMAGE_MAX_AGE, conditional=True, etag=etag)
+
+
+def init_images(app):
+    """Expose /img and the template helpers pointing card images at it."""
+    app.add_url_rule('/img', 'image', image_view)
+    app.jinja_env.globals.update(proxied_image=proxied_image, proxied_srcset=proxied_srcset)
@@ -0,0 +1,36 @@
+import importlib
+import threading
+
+
+class LazyModule:
+    """Stand-in for a module that is only imported on first attribute access.
+
+    Used for heavy dependencies such as numpy that only some requests need,
+    so they stay off the startup path. The import runs under a lock, and the
+    module's namespace is then copied onto the stand-in so later lookups cost
+    the same as on the module itself.
+    """
+
+    def __init__(self, name):
+        self.__dict__['_LazyModule__name'] = name
+        self.__dict__['_LazyModule__module'] = None
+        self.__dict__['_LazyModule__lock'] = threading.Lock()
+
+    def __load(self):
+        with self.__lock:
+            if self.__module is None:
+                module = importlib.import_module(self.__name)
+                self.__dict__.update(vars(module))
+                self.__dict__['_LazyModule__module'] = module
+        return self.__module
+
+    def __getattr__(self, attr):
+        # Only reached for names not copied yet: before the import, or added to the module since
+        return getattr(self.__load(), attr)
+
+    def __repr__(self):
+        return f"<lazy module '{self.__name}'>"
+
+
+def lazy_import(name):
+    return LazyModule(name)
@@ -0,0 +1,280 @@
+import os
+import sys
+import time
+import heapq
+import logging
+import threading
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import Response, g, request
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the latency histogram buckets
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Type and help text of every exported metric
+METRICS = {
+    'ecopulse_requests_total': ('counter', 'Requests served, by endpoint and status.'),
+    'ecopulse_request_seconds': ('histogram', 'Time spent handling a request, by endpoint.'),
+    'ecopulse_phase_seconds': ('histogram', 'Time spent in each phase of request handling.'),
+    'ecopulse_upstream_requests_total': ('counter', 'Upstream HTTP calls, by provider and status.'),
+    'ecopulse_upstream_seconds': ('histogram', 'Time waiting on upstream HTTP calls, by provider.'),
+    'ecopulse_cache_requests_total': ('counter', 'Cache lookups, by provider and result (hit, stale, miss).'),
+    'ecopulse_upstream_budget_remaining': ('gauge', 'Upstream calls left in the rolling 24-hour quota, by provider.'),
+    'ecopulse_cache_entries': ('gauge', 'Entries currently held, by cache.'),
+    'ecopulse_cache_bytes': ('gauge', 'Serialized bytes held in the shared cache file.'),
+}
+
+
+def env_flag(name, default='0'):
+    return os.getenv(name, default).lower() in ('1', 'true', 'yes')
+
+
+class Histogram:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        # One count per bucket plus the +Inf overflow
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def format_labels(labels, **extra):
+    items = list(labels) + sorted(extra.items())
+    if not items:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in items) + '}'
+
+
+class MetricsRegistry:
+    """Thread-safe counters, histograms and gauges rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._counters = defaultdict(float)
+        self._histograms = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += amount
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def gauge(self, name, read, **labels):
+        """Register a callable read each time metrics are rendered."""
+        self._gauges[(name, tuple(sorted(labels.items())))] = read
+
+    def render(self):
+        # Lines grouped per label set; groups are sorted, lines within a group keep their order
+        with self._lock:
+            samples = defaultdict(list)
+            for (name, labels), value in self._counters.items():
+                samples[name].append((format_labels(labels), [f"{name}{format_labels(labels)} {value:g}"]))
+            for (name, labels), histogram in self._histograms.items():
+                group = []
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ('+Inf',), histogram.counts):
+                    cumulative += count
+                    group.append(f"{name}_bucket{format_labels(labels, le=bound)} {cumulative}")
+                group.append(f"{name}_sum{format_labels(labels)} {histogram.sum:.6f}")
+                group.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+                samples[name].append((format_labels(labels), group))
+        for (name, labels), read in self._gauges.items():
+            samples[name].append((format_labels(labels), [f"{name}{format_labels(labels)} {read():g}"]))
+        lines = []
+        for name, (kind, description) in METRICS.items():
+            if samples.get(name):
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} {kind}")
+                for _, group in sorted(samples[name], key=lambda sample: sample[0]):
+                    lines.extend(group)
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+# Per-phase seconds of the request being handled in this context, if any
+_timings = ContextVar('request_timings', default=None)
+
+
+def add_timing(phase, seconds):
+    timings = _timings.get()
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timed(phase):
+    """Time a block as one phase of the current request, e.g. decode or render."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        registry.observe('ecopulse_phase_seconds', seconds, phase=phase)
+        add_timing(phase, seconds)
+
+
+def record_upstream(provider, status, seconds):
+    registry.inc('ecopulse_upstream_requests_total', provider=provider, status=status)
+    registry.observe('ecopulse_upstream_seconds', seconds, provider=provider)
+    add_timing('upstream', seconds)
+
+
+def record_cache(provider, result, count=1):
+    if count:
+        registry.inc('ecopulse_cache_requests_total', count, provider=provider, result=result)
+
+
+class SlowRequestProfiler:
+    """Sampling profiler that keeps stacks of the slowest requests.
+
+    A background thread samples the stack of every thread currently handling
+    a request. When a request finishes among the slowest seen so far, its
+    samples are written to the profile directory as folded stacks, one
+    "frame;frame;... count" line per stack, ready for flamegraph tools.
+    """
+
+    def __init__(self, directory, keep=10, interval=0.005):
+        self.directory = directory
+        self.keep = keep
+        self.interval = interval
+        self._active = {}
+        self._slowest = []
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self._thread.start()
+
+    def begin(self):
+        with self._lock:
+            self._active[threading.get_ident()] = Counter()
+
+    def end(self, seconds, label):
+        with self._lock:
+            stacks = self._active.pop(threading.get_ident(), None)
+            if not stacks or (len(self._slowest) >= self.keep and seconds <= self._slowest[0][0]):
+                return
+            self._sequence += 1
+            path = os.path.join(self.directory, f"{int(seconds * 1000)}ms-{label}-{self._sequence}.folded")
+            entry = (seconds, self._sequence, path)
+            evicted = None
+            if len(self._slowest) >= self.keep:
+                evicted = heapq.heappushpop(self._slowest, entry)
+            else:
+                heapq.heappush(self._slowest, entry)
+        with open(path, 'w') as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        if evicted:
+            try:
+                os.remove(evicted[2])
+            except OSError:
+                pass
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, stacks in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[collapse(frame)] += 1
+
+
+def collapse(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def metrics_view():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+def init_metrics(app):
+    """Time every request, expose /metrics and optionally add Server-Timing and profiling."""
+    server_timing = env_flag('SERVER_TIMING')
+    profiler = None
+    keep = int(os.getenv('PROFILE_SLOW_REQUESTS', 0))
+    if keep:
+        profiler = SlowRequestProfiler(os.getenv('PROFILE_DIR', 'profiles'), keep,
+                                       float(os.getenv('PROFILE_SAMPLE_INTERVAL', 5)) / 1000)
+        profiler.start()
+        logger.info(f"Profiling the {keep} slowest requests into {profiler.directory}")
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+        g.timings_token = _timings.set({})
+        if profiler:
+            profiler.begin()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('request_started', None)
+        if started is None:
+            return response
+        seconds = time.perf_counter() - started
+        endpoint = request.endpoint or 'unmatched'
+        registry.inc('ecopulse_requests_total', endpoint=endpoint, status=response.status_code)
+        registry.observe('ecopulse_request_seconds', seconds, endpoint=endpoint)
+        if server_timing:
+            timings = _timings.get() or {}
+            entries = [f"{phase};dur={value * 1000:.1f}" for phase, value in timings.items()]
+            entries.append(f"total;dur={seconds * 1000:.1f}")
+            response.headers['Server-Timing'] = ', '.join(entries)
+        if profiler:
+            profiler.end(seconds, endpoint.replace('.', '-'))
+        return response
+
+    @app.teardown_request
+    def reset_timings(exc):
+        token = g.pop('timings_token', None)
+        if token is not None:
+            _timings.reset(token)
+
+    from app.articles import article_pool
+    from app.budget import budgets
+    from app.cache import response_cache
+    from app.http_cache import page_cache
+    from app.search import search_index
+    registry.gauge('ecopulse_cache_entries', lambda: len(response_cache.backend), cache='responses')
+    registry.gauge('ecopulse_cache_entries', lambda: len(page_cache), cache='pages')
+    registry.gauge('ecopulse_cache_entries', lambda: len(article_pool), cache='articles')
+    registry.gauge('ecopulse_cache_entries', lambda: len(search_index), cache='search')
+    if hasattr(response_cache.backend, 'size_bytes'):
+        registry.gauge('ecopulse_cache_bytes', response_cache.backend.size_bytes, cache='responses')
+    for name, budget in budgets.items():
+        if budget.daily is not None:
+            registry.gauge('ecopulse_upstream_budget_remaining',
+                           lambda budget=budget: budget.snapshot()['remaining_24h'], provider=name)
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+    return registry
@@ -0,0 +1,33 @@
+class Article:
+    """A normalized news article, shared by reference across category feeds."""
+
+    __slots__ = ('title', 'source', 'author', 'description', 'url', 'published_at',
+                 'content_snippet', 'image_url', 'canonical_url', 'fingerprint')
+
+    def __init__(self, title, source, author, description, url, published_at,
+                 content_snippet, image_url, canonical_url, fingerprint):
+        self.title = title
+        self.source = source
+        self.author = author
+        self.description = description
+        self.url = url
+        self.published_at = published_at
+        self.content_snippet = content_snippet
+        self.image_url = image_url
+        self.canonical_url = canonical_url
+        self.fingerprint = fingerprint
+
+    def to_dict(self):
+        return {
+            "title": self.title,
+            "source": self.source,
+            "author": self.author,
+            "description": self.description,
+            "url": self.url,
+            "published_at": self.published_at,
+            "content_snippet": self.content_snippet,
+            "image_url": self.image_url
+        }
+
+    def __repr__(self):
+        return f"<Article {self.canonical_url}>"
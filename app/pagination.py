@@ -0,0 +1,101 @@
+import os
+import json
+import base64
+import binascii
+
+from flask import current_app, request
+
+from app.http_cache import json_response
+from app.store import parse_date
+
+# Items per page when a caller paginates without page_size, and per chunk when streaming
+PAGE_SIZE = int(os.getenv('PAGE_SIZE', 100))
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(position, kind):
+    """Opaque, URL-safe token for where the next page of a kind of listing starts."""
+    if position is None:
+        return None
+    raw = json.dumps(dict(position, kind=kind), separators=(',', ':'), sort_keys=True).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, kind, fields=()):
+    """Parse a cursor encode_cursor made for this kind of listing, raising ValueError otherwise.
+
+    fields are the position keys the listing reads, which must all be present.
+    """
+    try:
+        position = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(position, dict):
+        raise ValueError("Invalid cursor")
+    if position.pop('kind', None) != kind:
+        raise ValueError("Cursor is not from this endpoint")
+    if any(name not in position for name in fields):
+        raise ValueError("Invalid cursor")
+    if 'before' in position:
+        try:
+            parse_date(position['before'] if isinstance(position['before'], str) else '?')
+        except ValueError:
+            raise ValueError("Invalid cursor")
+    for name in ('series', 'offset'):
+        if name in position and (not isinstance(position[name], int) or position[name] < 0):
+            raise ValueError("Invalid cursor")
+    return position
+
+
+def page_args(kind, fields=()):
+    """Read page_size/cursor/format query parameters, raising ValueError if invalid.
+
+    Returns (page_size, cursor, stream); page_size is None unless the caller
+    asked for pages or a stream. Cursors must come from the same kind of
+    listing, with the given position fields.
+    """
+    stream = (request.args.get('format') == 'ndjson'
+              or 'application/x-ndjson' in request.headers.get('Accept', ''))
+    cursor = decode_cursor(request.args['cursor'], kind, fields) if request.args.get('cursor') else None
+    page_size = request.args.get('page_size')
+    if page_size is None and cursor is None and not stream:
+        return None, None, False
+    page_size = int(page_size or PAGE_SIZE)
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise ValueError(f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+    return page_size, cursor, stream
+
+
+def ndjson_response(page, cursor=None):
+    """Stream every page from cursor on as newline-delimited JSON, one item per line.
+
+    page(cursor) returns (items, next_cursor); only one page is held in
+    memory at a time and the first line is sent before the next page is read.
+    """
+    def generate():
+        position = cursor
+        while True:
+            items, position = page(position)
+            for item in items:
+                yield json.dumps(item) + '\n'
+            if position is None:
+                return
+    return current_app.response_class(generate(), mimetype='application/x-ndjson')
+
+
+def paged_response(name, page, cursor, stream, updated_at, **fields):
+    """Answer with one page of items under name plus next_cursor, or stream them all.
+
+    name is also the cursor kind, matching page_args(name) in the route.
+    """
+    if stream:
+        return ndjson_response(page, cursor)
+    items, next_cursor = page(cursor)
+    return json_response({name: items, **fields, "next_cursor": encode_cursor(next_cursor, name)}, updated_at)
+
+
+def list_page(items, page_size, cursor):
+    """Slice an in-memory list into a page of up to page_size items."""
+    offset = cursor.get('offset', 0) if cursor else 0
+    end = offset + page_size
+    return items[offset:end], ({"offset": end} if end < len(items) else None)
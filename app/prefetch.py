@@ -0,0 +1,140 @@
+import os
+import math
+import logging
+import threading
+
+from app.budget import BACKGROUND, background, budgets as provider_budgets
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 900
+
+
+class PrefetchScheduler:
+    """Background thread that re-runs registered refresh jobs on an interval.
+
+    Jobs run at background priority, so their upstream calls queue behind
+    user requests and never spend the share of a quota kept for users.
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL, budgets=None):
+        self.interval = interval
+        self.budgets = budgets if budgets is not None else provider_budgets
+        self.jobs = []
+        self.sources = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_job(self, name, provider, refresh, due=None):
+        """Register refresh(); when due() is given the job only runs while it returns True."""
+        self.jobs.append((name, provider, refresh, due))
+
+    def add_source(self, source):
+        """Register source(), returning (name, provider, refresh, due) jobs, re-read every run."""
+        self.sources.append(source)
+
+    def run_once(self):
+        jobs = list(self.jobs)
+        for source in self.sources:
+            jobs.extend(source())
+        for name, provider, refresh, due in jobs:
+            if due is not None and not due():
+                continue
+            budget = self.budgets.get(provider)
+            if budget is not None and not budget.available(BACKGROUND):
+                logger.warning(f"{provider} budget is down to its user reserve, skipping {name}")
+                continue
+            try:
+                with background():
+                    refresh()
+            except Exception as e:
+                logger.warning(f"Prefetch of {name} failed: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='prefetch', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+def prefetch_interval(feeds, budget, configured=None):
+    """Seconds between runs that keep prefetching feeds within the background share of budget's daily quota.
+
+    A configured interval that would spend more than that share is raised to
+    the smallest one that does not, since prefetch would otherwise stop partway
+    through the day and leave every page serving old news.
+    """
+    interval = configured or DEFAULT_INTERVAL
+    if not feeds or budget is None or budget.daily is None:
+        return interval
+    share = budget.daily - budget.reserve
+    if share <= 0:
+        logger.warning(f"{budget.name} has no daily quota left for background work; feeds will not be prefetched")
+        return interval
+    minimum = math.ceil(86400 * feeds / share)
+    if configured and configured < minimum:
+        logger.warning(f"PREFETCH_INTERVAL={configured}s would make {86400 * feeds // configured} {budget.name} "
+                       f"calls a day for {feeds} feeds, over the {share} left for background work; "
+                       f"prefetching every {minimum}s instead")
+    return max(interval, minimum)
+
+
+def init_prefetch(app):
+    """Start a scheduler that keeps news feeds cached and stored series in sync."""
+    has_keys = os.getenv('NEWS_API_KEY') or os.getenv('FRED_API_KEY')
+    enabled = os.getenv('PREFETCH_ENABLED', '1' if has_keys else '0')
+    if enabled.lower() not in ('1', 'true', 'yes'):
+        return None
+
+    from app.categories import categories
+    from app.routes import prefetch_feed
+    from app.store import ensure_synced, series_store
+
+    configured = int(os.getenv('PREFETCH_INTERVAL', 0)) or None
+    news_budget = provider_budgets.get('newsapi')
+    feeds = len(categories.all()) if os.getenv('NEWS_API_KEY') else 0
+    scheduler = PrefetchScheduler(interval=prefetch_interval(feeds, news_budget, configured))
+
+    def prefetch(category):
+        # Keep prefetched entries fresh until the next run so page hits never refresh them.
+        # Every worker runs a scheduler; with a shared cache, feeds another worker refreshed this round are skipped
+        prefetch_feed(category, min_ttl=scheduler.interval * 2, max_age=scheduler.interval * 0.9)
+
+    def retune():
+        # Categories added or removed at runtime change the calls per run; keep the day's total in budget
+        interval = prefetch_interval(len(categories.all()), news_budget, configured)
+        if interval != scheduler.interval:
+            logger.info(f"Prefetching {len(categories.all())} feeds every {interval}s")
+            scheduler.interval = interval
+
+    if feeds:
+        # Read from the registry on every run, so categories added at runtime are kept warm too
+        scheduler.add_source(lambda: [
+            (category.slug, 'newsapi', lambda category=category: prefetch(category), None)
+            for category in categories.all()])
+        categories.on_reload(retune)
+
+    # Stored series only go upstream once their sync interval has passed
+    sync_series = {
+        'fred': os.getenv('SYNC_FRED_SERIES', 'FEDFUNDS,CPIAUCSL' if os.getenv('FRED_API_KEY') else ''),
+        'bls': os.getenv('SYNC_BLS_SERIES', ''),
+    }
+    for provider, value in sync_series.items():
+        series_ids = [series_id.strip() for series_id in value.split(',') if series_id.strip()]
+        if series_ids:
+            scheduler.add_job(
+                f"{provider}:{value}", provider,
+                lambda provider=provider, series_ids=series_ids: ensure_synced(series_store, provider, series_ids),
+                due=lambda series_ids=series_ids: any(series_store.is_stale(s) for s in series_ids))
+    scheduler.start()
+    app.extensions['prefetch'] = scheduler
+    return scheduler
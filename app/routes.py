@@ -1,13 +1,24 @@
-from flask import Blueprint, jsonify, current_app, request, render_template
+from flask import Blueprint, abort, jsonify, current_app, request, render_template
 import requests
 import os
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 import logging
 from functools import wraps
-import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from app.articles import article_pool
+from app.cache import make_key, response_cache
+from app.categories import HOME, categories
+from app.http_cache import json_response, page_cache, render_page
+from app.pagination import list_page, page_args, paged_response
+from app.metrics import timed
+from app.analytics import (DEFAULT_WINDOW, MONTHS_OF_HISTORY, TRANSFORMS, WHOLE_RANGE, WINDOWED, Series,
+                           apply_transform, json_number, months_before)
+from app.search import search_index
+from app.store import ensure_synced, parse_date, series_store, start_of_year
+from app.budget import budgets
+from app.upstream import UpstreamError, bls_series_limit, get_client
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Create Blueprint
@@ -37,413 +48,488 @@ def require_api_key(f):
         return f(*args, **kwargs)
     return decorated_function
 
-# Routes for economic data
+# NewsAPI helpers
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+
+# Seconds a cached NewsAPI response is served before it is refreshed, for feeds
+# that are not categories; each category sets its own ttl in categories.json
+NEWS_CACHE_TTLS = {
+    'economic-news': 300,
+}
+
+def news_params(query, days):
+    from_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    from_date = (from_date - timedelta(days=days)).isoformat()
+    return {
+        'q': query,
+        'from': from_date,
+        'sortBy': 'popularity',
+        'language': 'en',
+        'apiKey': os.environ.get('NEWS_API_KEY')
+    }
+
+def default_news_query():
+    """/economic-news searches the homepage query unless ?query= is given."""
+    return categories.get(HOME).query
+
+def feed_ttl(feed):
+    category = categories.get(feed)
+    return category.ttl if category is not None else NEWS_CACHE_TTLS.get(feed)
+
+def news_articles(response):
+    """Parse a NewsAPI response into pooled, deduplicated Articles."""
+    if response.status_code != 200:
+        logger.warning(f"News API returned status code {response.status_code}")
+        raise UpstreamError(response.status_code)
+    with timed('decode'):
+        items = response.json().get("articles", [])
+    with timed('sanitize'):
+        return article_pool.ingest(items)
+
+def news_fetcher(params):
+    def fetch():
+        return news_articles(get_client('newsapi').get('/everything', params=params))
+    return fetch
+
+# Articles served from the search index when NewsAPI cannot be called for a feed
+DEGRADED_NEWS_LIMIT = 50
+
+def fetch_news(params, feed):
+    """Fetch a feed's Articles through the shared response cache.
+
+    On a cold miss while NewsAPI is out of budget, rate limited or failing,
+    serve the best matches for the feed's query among articles already
+    fetched for other feeds rather than nothing.
+    """
+    key = make_key(NEWS_API_URL, params)
+    try:
+        return response_cache.get_or_fetch(key, news_fetcher(params), ttl=feed_ttl(feed))
+    except (UpstreamError, requests.exceptions.RequestException) as e:
+        # RequestException also covers timeouts, dropped connections and an open circuit
+        articles = [article for _, article in search_index.search(params['q'], DEGRADED_NEWS_LIMIT)]
+        if not articles:
+            raise
+        logger.warning(f"Serving {len(articles)} indexed articles for {feed}: {e}")
+        return articles
+
+def news_updated_at(params):
+    """When the cached NewsAPI response for params was fetched."""
+    entry = response_cache.get(make_key(NEWS_API_URL, params))
+    return entry.stored_at if entry is not None else time.time()
+
+def feed_params(category):
+    return news_params(category.query, category.days)
+
+def fetch_feed(category):
+    return fetch_news(feed_params(category), category.slug)
+
+def prefetch_feed(category, min_ttl=0, max_age=0):
+    """Refresh a category's feed from upstream into the response cache.
+
+    Skipped when the feed was stored less than max_age seconds ago, e.g. by
+    another worker's scheduler sharing the cache.
+    """
+    params = feed_params(category)
+    ttl = max(min_ttl, category.ttl)
+    response_cache.refresh(make_key(NEWS_API_URL, params), news_fetcher(params), ttl=ttl, max_age=max_age)
+
+# Rendered pages hold the navigation, so drop them when categories change
+categories.on_reload(page_cache.clear)
+
+# Series each economic-data route reads when no ?series= is given
+DEFAULT_SERIES = {
+    'interest-rates': 'FEDFUNDS',
+    'inflation': 'CPIAUCSL',
+    'jobs-report': 'PAYEMS',
+}
+
+def parse_series_list(value):
+    series_ids = []
+    for series_id in (value or '').split(','):
+        series_id = series_id.strip()
+        if series_id and series_id not in series_ids:
+            series_ids.append(series_id)
+    return series_ids
+
+def series_updated_at(series_ids):
+    """Most recent sync time among the given stored series."""
+    synced = [series_store.synced_at(series_id) for series_id in series_ids]
+    return max((t for t in synced if t), default=time.time())
+
+def date_range_args():
+    """Read optional start/end query parameters, raising ValueError if malformed."""
+    return parse_date(request.args.get('start')), parse_date(request.args.get('end'))
+
+def int_arg(name, default, positive=False):
+    """Read an integer query parameter, raising ValueError if it is not one or is out of range."""
+    try:
+        value = int(request.args.get(name, default))
+    except ValueError:
+        value = None
+    if value is None or value < (1 if positive else 0):
+        raise ValueError(f"{name} must be a {'positive' if positive else 'non-negative'} integer")
+    return value
+
+def transform_args():
+    """Read transform/window query parameters, raising ValueError if invalid."""
+    transform = request.args.get('transform')
+    if transform and transform not in TRANSFORMS:
+        raise ValueError(f"transform must be one of {', '.join(TRANSFORMS)}")
+    return transform, int_arg('window', DEFAULT_WINDOW, positive=True)
+
+def transform_rows(series_id, rows, transform, window=DEFAULT_WINDOW, start=None, end=None):
+    """Append the transformed value to each stored row (newest first).
+
+    The transform runs over enough stored history before the oldest row for
+    every returned point to have its comparison. Transforms scored against a
+    whole range run over every stored row between start and end, so a page
+    gets the same values as the full result.
+    """
+    if not rows or not transform:
+        return rows
+    earliest, latest = rows[-1][0], rows[0][0]
+    if transform in MONTHS_OF_HISTORY:
+        since = months_before(earliest, MONTHS_OF_HISTORY[transform])
+        history = series_store.query(series_id, since, latest, descending=False)
+    elif transform in WINDOWED:
+        history = series_store.query(series_id, end=earliest, limit=window)[:0:-1] + rows[::-1]
+    else:
+        history = series_store.query(series_id, start, end, descending=False)
+    with timed('transform'):
+        values = apply_transform(Series.from_rows(history), transform, window)
+    if transform in WHOLE_RANGE:
+        first = [row[0] for row in history].index(earliest)
+        values = values[first:first + len(rows)]
+    else:
+        values = values[-len(rows):]
+    return [row + (transformed,) for row, transformed in zip(rows, values[::-1])]
+
+def row_values(row):
+    # Transformed rows carry the raw level as "index", like /inflation always has
+    if len(row) > 3:
+        return {"value": json_number(row[3]), "index": row[1]}
+    return {"value": row[1]}
+
+def fred_rows(series_id, rows):
+    return [{"date": row[0], **row_values(row), "series": series_id} for row in rows]
+
+def bls_row(series_id, row):
+    return {
+        "series": series_id,
+        "year": row[0][:4],
+        "period": row[0][5:7],
+        **row_values(row),
+        "footnotes": row[2]
+    }
+
+def bls_rows(series_id, rows):
+    return [bls_row(series_id, row) for row in rows]
+
+def inflation_rows(series_id, rows):
+    return [{
+        "date": d,
+        "value": json_number(rate, digits=2),
+        "index": index,
+        "series": series_id
+    } for d, index, _, rate in rows if json_number(rate) is not None]
+
+def series_page(series_id, start, end, page_size, cursor):
+    """One page of stored rows, newest first, and the position of the page after it."""
+    rows = series_store.query(series_id, start, end, page_size + 1, before=cursor and cursor.get('before'))
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, {"before": rows[-1][0]}
+
+def merged_series_page(series_ids, start, end, page_size, cursor):
+    """One page across several series, newest first and then in request order.
+
+    Returns ([(series_index, row), ...], next position); at most page_size + 1
+    rows per series are read.
+    """
+    candidates = []
+    for index, series_id in enumerate(series_ids):
+        series_end, before = end, None
+        if cursor:
+            # Series after the last one returned may still have rows on the cursor's date
+            if index > cursor.get('series', 0):
+                series_end = min(end, cursor['before']) if end else cursor['before']
+            else:
+                before = cursor['before']
+        rows = series_store.query(series_id, start, series_end, page_size + 1, before=before)
+        candidates.extend((index, row) for row in rows)
+    candidates.sort(key=lambda c: (c[1][0], -c[0]), reverse=True)
+    if len(candidates) <= page_size:
+        return candidates, None
+    candidates = candidates[:page_size]
+    index, row = candidates[-1]
+    return candidates, {"before": row[0], "series": index}
+
+# Routes for economic data, answered from the local series store
 @api.route('/interest-rates', methods=['GET'])
 @require_api_key
 @handle_api_errors
 def get_interest_rates():
-    series_id = request.args.get('series', 'FEDFUNDS')
-    url = f"https://api.stlouisfed.org/fred/series/observations"
-    params = {
-        'series_id': series_id,
-        'api_key': os.environ.get('FRED_API_KEY'),
-        'file_type': 'json',
-        'sort_order': 'desc',
-        'limit': 10
-    }
-    response = requests.get(url, params=params)
-    if response.status_code != 200:
-        logger.warning(f"FRED API returned status code {response.status_code}")
-        return jsonify({"error": "Could not retrieve interest rate data"}), response.status_code
-    data = response.json()
-    rate_data = [{
-        "date": item["date"],
-        "value": float(item["value"]) if item["value"] != "." else None,
-        "series": series_id
-    } for item in data.get("observations", [])]
-    return jsonify({
+    series_id = request.args.get('series', DEFAULT_SERIES['interest-rates'])
+    try:
+        start, end = date_range_args()
+    except ValueError:
+        return jsonify({"error": "Dates must be formatted YYYY-MM-DD"}), 400
+    try:
+        transform, window = transform_args()
+        page_size, cursor, stream = page_args('interest_rates', ('before',))
+        limit = int_arg('limit', 0 if start or end else 10)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        ensure_synced(series_store, 'fred', [series_id], start=start)
+    except UpstreamError as e:
+        return jsonify({"error": "Could not retrieve interest rate data"}), e.status_code
+    if page_size:
+        def page(position):
+            rows, next_position = series_page(series_id, start, end, page_size, position)
+            rows = transform_rows(series_id, rows, transform, window, start, end)
+            return fred_rows(series_id, rows), next_position
+        return paged_response("interest_rates", page, cursor, stream, series_updated_at([series_id]),
+                              transform=transform)
+    rows = series_store.query(series_id, start, end, limit)
+    rate_data = fred_rows(series_id, transform_rows(series_id, rows, transform, window, start, end))
+    return json_response({
         "interest_rates": rate_data,
-        "last_updated": datetime.now().isoformat()
-    })
+        "transform": transform
+    }, series_updated_at([series_id]))
 
 @api.route('/jobs-report', methods=['GET'])
 @require_api_key
 @handle_api_errors
 def get_jobs_report():
-    series_ids = request.args.get('series', 'PAYEMS').split(',')
-    url = "https://api.bls.gov/publicAPI/v2/timeseries/data/"
-    headers = {"Content-Type": "application/json"}
-    data = {
-        "seriesid": series_ids,
-        "startyear": str(datetime.now().year - 1),
-        "endyear": str(datetime.now().year),
-        "registrationkey": os.environ.get('BLS_API_KEY')
-    }
-    response = requests.post(url, json=data, headers=headers)
-    if response.status_code != 200:
-        logger.warning(f"BLS API returned status code {response.status_code}")
-        return jsonify({"error": "Could not retrieve jobs report data"}), response.status_code
-    data = response.json()
-    if data.get("status") != "REQUEST_SUCCEEDED":
-        logger.warning(f"BLS API request failed: {data.get('message')}")
-        return jsonify({"error": data.get("message")}), 400
+    series_ids = parse_series_list(request.args.get('series', DEFAULT_SERIES['jobs-report']))
+    try:
+        start, end = date_range_args()
+    except ValueError:
+        return jsonify({"error": "Dates must be formatted YYYY-MM-DD"}), 400
+    try:
+        transform, window = transform_args()
+        page_size, cursor, stream = page_args('jobs_data', ('before', 'series'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        ensure_synced(series_store, 'bls', series_ids, start=start)
+    except UpstreamError as e:
+        return jsonify({"error": e.message or "Could not retrieve jobs report data"}), e.status_code
+    if page_size:
+        start = start or start_of_year(years_back=1)
+
+        def page(position):
+            picked, next_position = merged_series_page(series_ids, start, end, page_size, position)
+            by_series = {}
+            for index, row in picked:
+                by_series.setdefault(index, []).append(row)
+            transformed = {index: iter(transform_rows(series_ids[index], rows, transform, window, start, end))
+                           for index, rows in by_series.items()}
+            return [bls_row(series_ids[index], next(transformed[index])) for index, _ in picked], next_position
+        return paged_response("jobs_data", page, cursor, stream, series_updated_at(series_ids),
+                              transform=transform)
     jobs_data = []
-    for series in data.get("Results", {}).get("series", []):
-        series_id = series.get("seriesID")
-        for item in series.get("data", []):
-            jobs_data.append({
-                "series": series_id,
-                "year": item.get("year"),
-                "period": item.get("period").replace("M", ""),
-                "value": float(item.get("value")),
-                "footnotes": [note.get("text") for note in item.get("footnotes", [])]
-            })
+    start = start or start_of_year(years_back=1)
+    for series_id in series_ids:
+        rows = series_store.query(series_id, start, end)
+        jobs_data.extend(bls_rows(series_id, transform_rows(series_id, rows, transform, window, start, end)))
     jobs_data.sort(key=lambda x: (int(x["year"]), int(x["period"])), reverse=True)
-    return jsonify({
+    return json_response({
         "jobs_data": jobs_data,
-        "last_updated": datetime.now().isoformat()
-    })
+        "transform": transform
+    }, series_updated_at(series_ids))
 
 @api.route('/inflation', methods=['GET'])
 @require_api_key
 @handle_api_errors
 def get_inflation_data():
-    series_id = request.args.get('series', 'CPIAUCSL')
-    url = f"https://api.stlouisfed.org/fred/series/observations"
-    params = {
-        'series_id': series_id,
-        'api_key': os.environ.get('FRED_API_KEY'),
-        'file_type': 'json',
-        'sort_order': 'desc',
-        'limit': 24
-    }
-    response = requests.get(url, params=params)
-    if response.status_code != 200:
-        logger.warning(f"FRED API returned status code {response.status_code}")
-        return jsonify({"error": "Could not retrieve inflation data"}), response.status_code
-    data = response.json()
-    observations = data.get("observations", [])
-    inflation_data = []
-    for i in range(len(observations) - 12):
-        current = observations[i]
-        year_ago = observations[i + 12]
-        if current["value"] != "." and year_ago["value"] != ".":
-            current_value = float(current["value"])
-            year_ago_value = float(year_ago["value"])
-            yoy_rate = ((current_value - year_ago_value) / year_ago_value) * 100
-            inflation_data.append({
-                "date": current["date"],
-                "value": round(yoy_rate, 2),
-                "index": current_value,
-                "series": series_id
-            })
-    return jsonify({
+    series_id = request.args.get('series', DEFAULT_SERIES['inflation'])
+    try:
+        start, end = date_range_args()
+    except ValueError:
+        return jsonify({"error": "Dates must be formatted YYYY-MM-DD"}), 400
+    try:
+        transform, window = transform_args()
+        page_size, cursor, stream = page_args('inflation_data', ('before',))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    transform = transform or 'yoy'
+    try:
+        ensure_synced(series_store, 'fred', [series_id], start=start)
+    except UpstreamError as e:
+        return jsonify({"error": "Could not retrieve inflation data"}), e.status_code
+    if page_size:
+        def page(position):
+            rows, next_position = series_page(series_id, start, end, page_size, position)
+            rows = transform_rows(series_id, rows, transform, window, start, end)
+            return inflation_rows(series_id, rows), next_position
+        return paged_response("inflation_data", page, cursor, stream, series_updated_at([series_id]),
+                              transform=transform)
+    limit = 0 if start or end else 24
+    rows = series_store.query(series_id, start, end, limit)
+    rows = transform_rows(series_id, rows, transform, window, start, end)
+    inflation_data = inflation_rows(series_id, rows)
+    return json_response({
         "inflation_data": inflation_data,
-        "last_updated": datetime.now().isoformat()
-    })
+        "transform": transform
+    }, series_updated_at([series_id]))
+
+# Worker pool shared by batch requests so total upstream concurrency stays bounded
+BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', 8))
+BATCH_MAX_SERIES = 100
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS, thread_name_prefix='batch')
+
+@api.route('/economic-data/batch', methods=['GET'])
+@require_api_key
+@handle_api_errors
+def get_economic_data_batch():
+    fred_ids = parse_series_list(request.args.get('fred'))
+    bls_ids = parse_series_list(request.args.get('bls'))
+    try:
+        start, end = date_range_args()
+    except ValueError:
+        return jsonify({"error": "Dates must be formatted YYYY-MM-DD"}), 400
+    try:
+        transform, window = transform_args()
+        limit = int_arg('limit', 0 if start or end else 10)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not fred_ids and not bls_ids:
+        return jsonify({"error": "Provide at least one series in 'fred' or 'bls'"}), 400
+    if len(fred_ids) + len(bls_ids) > BATCH_MAX_SERIES:
+        return jsonify({"error": f"At most {BATCH_MAX_SERIES} series per request"}), 400
+
+    # Sync stale series concurrently; fresh ones are answered straight from the store
+    futures = {}
+    for series_id in fred_ids:
+        future = batch_executor.submit(ensure_synced, series_store, 'fred', [series_id], start=start)
+        futures[future] = ('fred', [series_id])
+    chunk_size = bls_series_limit()
+    for i in range(0, len(bls_ids), chunk_size):
+        chunk = bls_ids[i:i + chunk_size]
+        futures[batch_executor.submit(ensure_synced, series_store, 'bls', chunk, start=start)] = ('bls', chunk)
+
+    series_data = {}
+    errors = {}
+    for future in as_completed(futures):
+        provider, series_ids = futures[future]
+        try:
+            future.result()
+        except Exception as e:
+            logger.warning(f"Batch sync from {provider} failed for {series_ids}: {e}")
+            for series_id in series_ids:
+                errors[series_id] = str(e)
+            continue
+        to_rows = fred_rows if provider == 'fred' else bls_rows
+        for series_id in series_ids:
+            rows = series_store.query(series_id, start, end, limit)
+            if rows:
+                rows = transform_rows(series_id, rows, transform, window, start, end)
+                series_data[series_id] = {"provider": provider, "observations": to_rows(series_id, rows)}
+            else:
+                errors[series_id] = "No data returned"
+    return json_response({
+        "series": series_data,
+        "errors": errors,
+        "transform": transform
+    }, series_updated_at(series_data))
 
 @api.route('/economic-news', methods=['GET'])
 @require_api_key
 @handle_api_errors
 def get_economic_news():
-    query = request.args.get('query', 'economy OR inflation OR "interest rates" OR "federal reserve"')
+    query = request.args.get('query') or default_news_query()
     days = int(request.args.get('days', 3))
-    from_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    from_date = from_date.replace(day=from_date.day - days).isoformat()
-    url = "https://newsapi.org/v2/everything"
-    params = {
-        'q': query,
-        'from': from_date,
-        'sortBy': 'popularity',
-        'language': 'en',
-        'apiKey': os.environ.get('NEWS_API_KEY')
-    }
-    response = requests.get(url, params=params)
-    if response.status_code != 200:
-        logger.warning(f"News API returned status code {response.status_code}")
-        return jsonify({"error": "Could not retrieve economic news"}), response.status_code
-    data = response.json()
-    news_data = []
-    for article in data.get("articles", []):
-        if article.get("title") and article.get("url"):
-            news_data.append({
-                "title": article.get("title"),
-                "source": article.get("source", {}).get("name"),
-                "author": article.get("author"),
-                "description": article.get("description"),
-                "url": article.get("url"),
-                "published_at": article.get("publishedAt"),
-                "content_snippet": article.get("content", "").split("[+")[0],
-                "image_url": article.get("urlToImage")
-            })
-    return jsonify({
+    try:
+        page_size, cursor, stream = page_args('economic_news', ('offset',))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    params = news_params(query, days)
+    try:
+        articles = fetch_news(params, 'economic-news')
+    except UpstreamError as e:
+        return jsonify({"error": "Could not retrieve economic news"}), e.status_code
+    if page_size:
+        def page(position):
+            items, next_position = list_page(articles, page_size, position)
+            return [article.to_dict() for article in items], next_position
+        return paged_response("economic_news", page, cursor, stream, news_updated_at(params),
+                              count=len(articles), query=query)
+    news_data = [article.to_dict() for article in articles]
+    return json_response({
         "economic_news": news_data,
         "count": len(news_data),
+        "query": query
+    }, news_updated_at(params))
+
+# Most results /search returns per request
+SEARCH_MAX_RESULTS = 100
+
+@api.route('/search', methods=['GET'])
+@require_api_key
+@handle_api_errors
+def search_articles():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Provide a search query in 'q'"}), 400
+    try:
+        start, end = date_range_args()
+    except ValueError:
+        return jsonify({"error": "Dates must be formatted YYYY-MM-DD"}), 400
+    try:
+        limit = max(1, min(int_arg('limit', 20), SEARCH_MAX_RESULTS))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    sources = {s.strip().lower() for s in request.args.get('source', '').split(',') if s.strip()}
+    results = search_index.search(query, limit, sources, start, end)
+    return json_response({
+        "results": [{**article.to_dict(), "score": round(score, 4)} for score, article in results],
+        "count": len(results),
         "query": query,
-        "last_updated": datetime.now().isoformat()
-    })
-
-def clean_article_content(content):
-    """Clean and sanitize article content."""
-    if not content:
-        return ""
-    # Remove any script-like content
-    if isinstance(content, str):
-        content = content.replace('window.open', '')
-        content = content.replace('javascript:', '')
-        # Remove HTML tags
-        content = re.sub(r'<[^>]+>', '', content)
-        # Remove special characters
-        content = content.replace('&gt;', '>').replace('&lt;', '<').replace('&amp;', '&')
-        # Truncate if too long
-        return content[:200] + '...' if len(content) > 200 else content
-    return ""
+        "indexed": len(search_index)
+    }, search_index.updated_at)
+
+@api.route('/budget', methods=['GET'])
+@require_api_key
+def get_upstream_budget():
+    """Remaining rate-limit tokens and daily quota per provider, for this worker."""
+    return jsonify({"providers": {name: budget.snapshot() for name, budget in budgets.items()}})
 
 @api.route('/', methods=['GET'])
 def render_news_page():
     try:
-        query = 'economy OR inflation OR "interest rates" OR "federal reserve"'
-        days = 1
-        from_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        from_date = from_date.replace(day=from_date.day - days).isoformat()
-        
-        url = "https://newsapi.org/v2/everything"
-        params = {
-            'q': query,
-            'from': from_date,
-            'sortBy': 'popularity',
-            'language': 'en',
-            'apiKey': os.environ.get('NEWS_API_KEY')
-        }
-        
-        response = requests.get(url, params=params)
-        if response.status_code != 200:
-            logger.warning(f"News API returned status code {response.status_code}")
+        try:
+            articles = fetch_feed(categories.get(HOME))
+        except UpstreamError:
             return render_template('index.html', articles=[])
-            
-        data = response.json()
-        news_data = []
-        for article in data.get("articles", []):
-            if article.get("title") and article.get("url"):
-                news_data.append({
-                    "title": clean_article_content(article.get("title")),
-                    "source": article.get("source", {}).get("name"),
-                    "author": article.get("author"),
-                    "description": clean_article_content(article.get("description")),
-                    "url": article.get("url"),
-                    "published_at": article.get("publishedAt"),
-                    "content_snippet": clean_article_content(article.get("content")),
-                    "image_url": article.get("urlToImage")
-                })
-        return render_template('index.html', articles=news_data)
+        return render_page('index.html', articles)
     except Exception as e:
         logger.error(f"Failed to render homepage: {e}")
         return render_template('index.html', articles=[])
 
-@api.route('/markets', methods=['GET'])
-def markets_page():
-    try:
-        query = 'stock market OR financial markets OR trading OR market analysis'
-        days = 2
-        from_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        from_date = from_date.replace(day=from_date.day - days).isoformat()
-        
-        url = "https://newsapi.org/v2/everything"
-        params = {
-            'q': query,
-            'from': from_date,
-            'sortBy': 'popularity',
-            'language': 'en',
-            'apiKey': os.environ.get('NEWS_API_KEY')
-        }
-        
-        response = requests.get(url, params=params)
-        news_data = []
-        if response.status_code == 200:
-            data = response.json()
-            for article in data.get("articles", []):
-                if article.get("title") and article.get("url"):
-                    news_data.append({
-                        "title": article.get("title"),
-                        "source": article.get("source", {}).get("name"),
-                        "author": article.get("author"),
-                        "description": article.get("description"),
-                        "url": article.get("url"),
-                        "published_at": article.get("publishedAt"),
-                        "content_snippet": article.get("content", "").split("[+")[0],
-                        "image_url": article.get("urlToImage")
-                    })
-        return render_template('category.html', 
-                             articles=news_data, 
-                             category="Markets",
-                             description="Latest updates from global financial markets")
-    except Exception as e:
-        logger.error(f"Failed to render markets page: {e}")
-        return render_template('category.html', articles=[], category="Markets")
-
-@api.route('/stocks', methods=['GET'])
-def stocks_page():
+@api.route('/<slug>', methods=['GET'])
+def category_page(slug):
+    category = categories.get(slug)
+    if category is None or slug == HOME:
+        abort(404)
     try:
-        query = 'stocks OR stock trading OR NYSE OR NASDAQ OR company earnings'
-        days = 2
-        from_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        from_date = from_date.replace(day=from_date.day - days).isoformat()
-        
-        url = "https://newsapi.org/v2/everything"
-        params = {
-            'q': query,
-            'from': from_date,
-            'sortBy': 'popularity',
-            'language': 'en',
-            'apiKey': os.environ.get('NEWS_API_KEY')
-        }
-        
-        response = requests.get(url, params=params)
-        news_data = []
-        if response.status_code == 200:
-            data = response.json()
-            for article in data.get("articles", []):
-                if article.get("title") and article.get("url"):
-                    news_data.append({
-                        "title": article.get("title"),
-                        "source": article.get("source", {}).get("name"),
-                        "author": article.get("author"),
-                        "description": article.get("description"),
-                        "url": article.get("url"),
-                        "published_at": article.get("publishedAt"),
-                        "content_snippet": article.get("content", "").split("[+")[0],
-                        "image_url": article.get("urlToImage")
-                    })
-        return render_template('category.html', 
-                             articles=news_data, 
-                             category="Stocks",
-                             description="Latest stock market news and analysis")
-    except Exception as e:
-        logger.error(f"Failed to render stocks page: {e}")
-        return render_template('category.html', articles=[], category="Stocks")
-
-@api.route('/crypto', methods=['GET'])
-def crypto_page():
-    try:
-        query = 'cryptocurrency OR bitcoin OR ethereum OR blockchain OR crypto market'
-        days = 2
-        from_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        from_date = from_date.replace(day=from_date.day - days).isoformat()
-        
-        url = "https://newsapi.org/v2/everything"
-        params = {
-            'q': query,
-            'from': from_date,
-            'sortBy': 'popularity',
-            'language': 'en',
-            'apiKey': os.environ.get('NEWS_API_KEY')
-        }
-        
-        response = requests.get(url, params=params)
-        news_data = []
-        if response.status_code == 200:
-            data = response.json()
-            for article in data.get("articles", []):
-                if article.get("title") and article.get("url"):
-                    news_data.append({
-                        "title": article.get("title"),
-                        "source": article.get("source", {}).get("name"),
-                        "author": article.get("author"),
-                        "description": article.get("description"),
-                        "url": article.get("url"),
-                        "published_at": article.get("publishedAt"),
-                        "content_snippet": article.get("content", "").split("[+")[0],
-                        "image_url": article.get("urlToImage")
-                    })
-        return render_template('category.html', 
-                             articles=news_data, 
-                             category="Cryptocurrency",
-                             description="Latest cryptocurrency news and market updates")
-    except Exception as e:
-        logger.error(f"Failed to render crypto page: {e}")
-        return render_template('category.html', articles=[], category="Cryptocurrency")
-
-@api.route('/real-estate', methods=['GET'])
-def real_estate_page():
-    try:
-        query = 'real estate market OR housing market OR property investment OR mortgage rates'
-        days = 2
-        from_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        from_date = from_date.replace(day=from_date.day - days).isoformat()
-        
-        url = "https://newsapi.org/v2/everything"
-        params = {
-            'q': query,
-            'from': from_date,
-            'sortBy': 'popularity',
-            'language': 'en',
-            'apiKey': os.environ.get('NEWS_API_KEY')
-        }
-        
-        response = requests.get(url, params=params)
-        news_data = []
-        if response.status_code == 200:
-            data = response.json()
-            for article in data.get("articles", []):
-                if article.get("title") and article.get("url"):
-                    news_data.append({
-                        "title": article.get("title"),
-                        "source": article.get("source", {}).get("name"),
-                        "author": article.get("author"),
-                        "description": article.get("description"),
-                        "url": article.get("url"),
-                        "published_at": article.get("publishedAt"),
-                        "content_snippet": article.get("content", "").split("[+")[0],
-                        "image_url": article.get("urlToImage")
-                    })
-        return render_template('category.html', 
-                             articles=news_data, 
-                             category="Real Estate",
-                             description="Latest real estate market news and trends")
-    except Exception as e:
-        logger.error(f"Failed to render real estate page: {e}")
-        return render_template('category.html', articles=[], category="Real Estate")
-
-@api.route('/tech', methods=['GET'])
-def tech_page():
-    try:
-        query = 'technology industry OR tech companies OR innovation OR artificial intelligence OR startups'
-        days = 2
-        from_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        from_date = from_date.replace(day=from_date.day - days).isoformat()
-        
-        url = "https://newsapi.org/v2/everything"
-        params = {
-            'q': query,
-            'from': from_date,
-            'sortBy': 'popularity',
-            'language': 'en',
-            'apiKey': os.environ.get('NEWS_API_KEY')
-        }
-        
-        response = requests.get(url, params=params)
-        news_data = []
-        if response.status_code == 200:
-            data = response.json()
-            for article in data.get("articles", []):
-                if article.get("title") and article.get("url"):
-                    news_data.append({
-                        "title": article.get("title"),
-                        "source": article.get("source", {}).get("name"),
-                        "author": article.get("author"),
-                        "description": article.get("description"),
-                        "url": article.get("url"),
-                        "published_at": article.get("publishedAt"),
-                        "content_snippet": article.get("content", "").split("[+")[0],
-                        "image_url": article.get("urlToImage")
-                    })
-        return render_template('category.html', 
-                             articles=news_data, 
-                             category="Technology",
-                             description="Latest technology news and innovations")
+        try:
+            articles = fetch_feed(category)
+        except UpstreamError:
+            articles = []
+        return render_page('category.html',
+                           articles,
+                           category=category.title,
+                           description=category.description)
     except Exception as e:
-        logger.error(f"Failed to render tech page: {e}")
-        return render_template('category.html', articles=[], category="Technology")
+        logger.error(f"Failed to render {slug} page: {e}")
+        return render_template('category.html', articles=[], category=category.title)
 
 def register_routes(app):
     app.register_blueprint(api)
+
+    @app.context_processor
+    def navigation():
+        return {"nav_categories": categories.pages()}
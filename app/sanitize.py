@@ -0,0 +1,60 @@
+import os
+import re
+import html
+from functools import lru_cache
+
+# Longest text kept before truncating with an ellipsis
+MAX_LENGTH = 200
+
+# One precompiled pattern does every rewrite in a single scan. It opens with a
+# character class so the regex engine skips ahead in C to the few characters
+# that can start a match; each branch then checks which one it landed on.
+_pattern = re.compile(r"""
+    [<&jJvVw.…\[\t\r\n\f\v]
+    (?:
+        (?<=<)(?:(?P<block>(?i:script|style)\b[^>]*>.*?</(?i:script|style)\s*>)
+                |(?P<tag>/?[A-Za-z!][^>]*>))
+      | (?<=&)(?P<entity>(?:\#[0-9]{1,7}|\#[xX][0-9a-fA-F]{1,6}|[A-Za-z][A-Za-z0-9]{1,31});)
+      | (?<=[jJ])(?P<javascript>(?i:avascript):)
+      | (?<=[vV])(?P<vbscript>(?i:bscript):)
+      | (?<=w)(?P<window_open>indow\.open)
+      | (?<=\.)(?P<dots_marker>\.\.\s*\[\+\d+\s*chars\])
+      | (?<=…)(?P<ellipsis_marker>\s*\[\+\d+\s*chars\])
+      | (?<=\[)(?P<marker>\+\d+\s*chars\])
+      | (?<=[^\S ])(?P<space>\s*)
+    )
+""", re.DOTALL | re.VERBOSE)
+
+
+def _replace(match):
+    kind = match.lastgroup
+    if kind == 'entity':
+        return html.unescape(match.group(0))
+    if kind == 'space':
+        return ' '
+    return ''
+
+
+@lru_cache(maxsize=int(os.getenv('SANITIZE_CACHE_SIZE', 32768)))
+def clean_text(text, max_length=MAX_LENGTH):
+    """Strip markup and scripts, decode entities, drop NewsAPI's "[+N chars]" and truncate.
+
+    The scan repeats until it changes nothing, since removing or decoding one
+    match can form another (e.g. "jjavascript:avascript:" or "&#106;avascript:").
+    Results are memoized on the text, so a story repeated across feeds and
+    refreshes is only cleaned once.
+    """
+    if not text or not isinstance(text, str):
+        return ""
+    # Compare the text rather than count matches: an unknown entity such as "&foo;" matches every pass unchanged
+    cleaned = _pattern.sub(_replace, text)
+    while cleaned != text:
+        text, cleaned = cleaned, _pattern.sub(_replace, cleaned)
+    text = text.strip()
+    return text[:max_length] + '...' if len(text) > max_length else text
+
+
+def clean_many(values, max_length=MAX_LENGTH):
+    """Clean a batch of texts, e.g. every title of a feed, in one call."""
+    clean = clean_text
+    return [clean(value, max_length) if value else "" for value in values]
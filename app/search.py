@@ -0,0 +1,253 @@
+import os
+import re
+import math
+import threading
+import time
+from array import array
+from functools import lru_cache
+
+from app.lazy import lazy_import
+from app.metrics import timed
+
+# Imported on first use so numpy stays off the startup path
+np = lazy_import('numpy')
+
+# BM25 term-frequency saturation and length normalization
+K1 = 1.2
+B = 0.75
+
+# Title words count this many times, so a match in the headline outranks one in the body
+TITLE_WEIGHT = 2
+
+STOPWORDS = frozenset('''
+a an and are as at be but by for from has have he her his in is it its of on or
+our s she that the their them they this to was we were will with you your
+'''.split())
+
+_token = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+_vowel = re.compile(r'[aeiouy]')
+
+# Derivational suffixes and their replacements, stripped only from words of 4+ letters left
+DERIVATIONAL = (
+    ('ational', 'ate'), ('ization', 'ize'), ('fulness', 'ful'), ('iveness', 'ive'),
+    ('ness', ''), ('ment', ''), ('ly', ''),
+)
+
+
+@lru_cache(maxsize=65536)
+def stem(word):
+    """Light suffix stripping so e.g. rate/rates/rated/rating and rally/rallies/rallied meet."""
+    word = word.split("'")[0]
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    # Plurals and third person
+    if word.endswith('sses'):
+        word = word[:-2]
+    elif word.endswith(('ies', 'ied')) and len(word) > 4:
+        word = word[:-3] + 'y'
+    elif word.endswith(('ches', 'shes')) or (word.endswith('es') and word[-3] in 'sxz'):
+        word = word[:-2]
+    elif word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        word = word[:-1]
+    # Verb endings, undoubling e.g. "stopp" from "stopped"
+    for suffix in ('ing', 'ed'):
+        stem_part = word[:-len(suffix)]
+        if word.endswith(suffix) and len(stem_part) >= 3 and _vowel.search(stem_part):
+            word = stem_part
+            if word[-1] == word[-2] and word[-1] not in 'lsz':
+                word = word[:-1]
+            break
+    for suffix, replacement in DERIVATIONAL:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            word = word[:-len(suffix)] + replacement
+            break
+    if word.endswith('e') and len(word) > 3:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return [stem(token) for token in _token.findall(text.lower()) if token not in STOPWORDS]
+
+
+class SearchIndex:
+    """Incremental BM25 inverted index over articles.
+
+    Postings are append-only arrays of document ids and term frequencies, so
+    adding an article costs one append per distinct term, and a query scores
+    each term's postings in one vectorized pass. Beyond max_documents the
+    oldest articles are dropped by tombstoning (zeroing their length); once
+    tombstones make up a quarter of the index the postings are rewritten
+    without them and ids renumbered, so memory stays bounded.
+    """
+
+    def __init__(self, max_documents=100000):
+        self.max_documents = max_documents
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._postings = {}
+        self._documents = {}
+        self._by_url = {}
+        # Per-document numpy columns indexed by id: length (0 once evicted), source code and
+        # YYYYMMDD date; allocated by the first add
+        self._lengths = self._sources = self._dates = None
+        self._source_codes = {}
+        self._next_id = 0
+        self._oldest_id = 0
+        self._total_length = 0
+        self._tombstones = 0
+        self.updated_at = time.time()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def add(self, article):
+        """Index an article once; re-adding the same story is a no-op."""
+        terms = {}
+        for token in tokenize(article.title):
+            terms[token] = terms.get(token, 0) + TITLE_WEIGHT
+        for token in tokenize(article.description) + tokenize(article.content_snippet):
+            terms[token] = terms.get(token, 0) + 1
+        if not terms:
+            return False
+        with self._lock:
+            if article.canonical_url in self._by_url:
+                return False
+            doc_id = self._next_id
+            self._next_id += 1
+            for term, tf in terms.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array('I'), array('H'))
+                postings[0].append(doc_id)
+                postings[1].append(min(tf, 65535))
+            if self._lengths is None or doc_id >= len(self._lengths):
+                self._grow(2 * len(self._lengths) if self._lengths is not None else 1024)
+            length = sum(terms.values())
+            self._lengths[doc_id] = length
+            self._sources[doc_id] = self._source_code(article.source)
+            self._dates[doc_id] = date_number(article.published_at)
+            self._documents[doc_id] = article
+            self._by_url[article.canonical_url] = doc_id
+            self._total_length += length
+            while len(self._documents) > self.max_documents:
+                self._evict_oldest()
+            if self._tombstones > 1000 and self._tombstones * 4 > len(self._documents):
+                self._compact()
+            self.updated_at = time.time()
+        return True
+
+    def _grow(self, size):
+        for name, dtype in (('_lengths', np.float32), ('_sources', np.int32), ('_dates', np.int32)):
+            column = getattr(self, name)
+            grown = np.zeros(size, dtype=dtype)
+            if column is not None:
+                grown[:min(size, len(column))] = column[:size]
+            setattr(self, name, grown)
+
+    def _source_code(self, source):
+        name = (source or '').lower()
+        code = self._source_codes.get(name)
+        if code is None:
+            code = self._source_codes[name] = len(self._source_codes) + 1
+        return code
+
+    def _evict_oldest(self):
+        while self._oldest_id not in self._documents:
+            self._oldest_id += 1
+        article = self._documents.pop(self._oldest_id)
+        del self._by_url[article.canonical_url]
+        self._total_length -= int(self._lengths[self._oldest_id])
+        self._lengths[self._oldest_id] = 0
+        self._tombstones += 1
+
+    def _compact(self):
+        # Renumber live documents 0..n-1 and rewrite every posting list without the evicted ones
+        live = sorted(self._documents)
+        mapping = np.full(self._next_id, -1, dtype=np.int64)
+        mapping[live] = np.arange(len(live))
+        for term in list(self._postings):
+            ids, tfs = self._postings[term]
+            new_ids = mapping[np.frombuffer(ids, dtype=np.uint32)]
+            keep = new_ids >= 0
+            if not keep.any():
+                del self._postings[term]
+                continue
+            compacted = (array('I'), array('H'))
+            compacted[0].frombytes(new_ids[keep].astype(np.uint32).tobytes())
+            compacted[1].frombytes(np.frombuffer(tfs, dtype=np.uint16)[keep].tobytes())
+            self._postings[term] = compacted
+        for name in ('_lengths', '_sources', '_dates'):
+            column = getattr(self, name)
+            compacted = np.zeros(max(1024, 2 * len(live)), dtype=column.dtype)
+            compacted[:len(live)] = column[live]
+            setattr(self, name, compacted)
+        self._documents = {new_id: self._documents[old_id] for new_id, old_id in enumerate(live)}
+        self._by_url = {article.canonical_url: doc_id for doc_id, article in self._documents.items()}
+        self._next_id = len(live)
+        self._oldest_id = 0
+        self._tombstones = 0
+
+    def search(self, query, limit=20, sources=None, start=None, end=None):
+        """Return up to limit (score, article) pairs, best first.
+
+        sources is a set of lower-cased source names; start and end are ISO
+        dates bounding each article's publication date.
+        """
+        terms = set(tokenize(query))
+        with timed('search'), self._lock:
+            count = len(self._documents)
+            if not terms or not count:
+                return []
+            average_length = self._total_length / count
+            codes = None
+            if sources:
+                codes = [self._source_codes[name] for name in sources if name in self._source_codes]
+                if not codes:
+                    return []
+            scores = np.zeros(self._next_id)
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                # Copies, so the arrays stay appendable once the query is done
+                ids = np.frombuffer(postings[0], dtype=np.uint32).copy()
+                tfs = np.frombuffer(postings[1], dtype=np.uint16).astype(np.float64)
+                lengths = self._lengths[ids]
+                live = lengths > 0
+                frequency = int(live.sum())
+                idf = math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+                keep = live
+                if codes is not None:
+                    keep = keep & np.isin(self._sources[ids], codes)
+                if start:
+                    keep = keep & (self._dates[ids] >= date_number(start))
+                if end:
+                    keep = keep & (self._dates[ids] <= date_number(end))
+                norm = K1 * (1 - B + B * lengths[keep] / average_length)
+                scores += np.bincount(ids[keep], weights=idf * tfs[keep] * (K1 + 1) / (tfs[keep] + norm),
+                                      minlength=self._next_id)
+            matched = np.flatnonzero(scores)
+            if len(matched) > limit:
+                matched = matched[np.argpartition(-scores[matched], limit - 1)[:limit]]
+            best = matched[np.argsort(-scores[matched], kind='stable')]
+            return [(float(scores[doc_id]), self._documents[int(doc_id)]) for doc_id in best]
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+
+def date_number(value):
+    """YYYYMMDD integer of an ISO date or timestamp, 0 if missing or malformed."""
+    digits = (value or '')[:10].replace('-', '')
+    return int(digits) if len(digits) == 8 and digits.isdigit() else 0
+
+
+# Every article the news routes fetch, searchable through /search
+search_index = SearchIndex(int(os.getenv('SEARCH_INDEX_SIZE', 100000)))
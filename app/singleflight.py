@@ -0,0 +1,83 @@
+import os
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock; coalescing stays within the process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait and receive its result or exception. With a lock
+    directory, the leader also takes an flock on a per-key file so leaders
+    in other worker processes queue behind it. Functions should therefore
+    re-check shared state (the series store, a shared cache backend) before
+    doing the work, since another process may just have done it.
+    """
+
+    def __init__(self, lock_dir=None):
+        self.lock_dir = lock_dir if fcntl is not None else None
+        self._calls = {}
+        self._lock = threading.Lock()
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            with self.process_lock(key):
+                call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    @contextmanager
+    def process_lock(self, key):
+        if not self.lock_dir:
+            yield
+            return
+        name = hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+        with open(os.path.join(self.lock_dir, f"{name}.lock"), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def in_flight(self):
+        return len(self._calls)
+
+
+# Shared by the response cache and series sync; set SINGLEFLIGHT_LOCK_DIR to coalesce across workers
+singleflight = SingleFlight(os.getenv('SINGLEFLIGHT_LOCK_DIR'))
@@ -0,0 +1,126 @@
+import os
+import atexit
+import pickle
+import logging
+import tempfile
+import threading
+import time
+
+from jinja2 import FileSystemBytecodeCache
+
+from app.articles import article_pool
+from app.cache import CacheEntry, response_cache
+
+logger = logging.getLogger(__name__)
+
+# Templates compiled at startup, or at build time with `python -m app.startup`
+PRECOMPILED_TEMPLATES = ('index.html', 'category.html')
+TEMPLATE_CACHE_DIR = os.getenv('TEMPLATE_CACHE_DIR', os.path.join('data', 'jinja'))
+
+SNAPSHOT_PATH = os.getenv('SNAPSHOT_PATH', os.path.join('data', 'snapshot.pickle'))
+# Seconds between snapshots of the response cache while running
+SNAPSHOT_INTERVAL = int(os.getenv('SNAPSHOT_INTERVAL', 300))
+# Cached responses older than this are not restored from a snapshot
+SNAPSHOT_MAX_AGE = int(os.getenv('SNAPSHOT_MAX_AGE', 24 * 3600))
+SNAPSHOT_VERSION = 1
+
+
+def init_templates(app):
+    """Keep compiled templates on disk so a new process loads rather than compiles them."""
+    if TEMPLATE_CACHE_DIR:
+        os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)
+    precompile_templates(app)
+
+
+def precompile_templates(app):
+    started = time.perf_counter()
+    for name in PRECOMPILED_TEMPLATES:
+        app.jinja_env.get_template(name)
+    logger.info(f"Loaded {len(PRECOMPILED_TEMPLATES)} templates in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+
+def save_snapshot(path=SNAPSHOT_PATH):
+    """Write every cached upstream response to path; returns how many were written."""
+    if not hasattr(response_cache.backend, 'items'):
+        # A shared cache backend is already on disk
+        return 0
+    responses = [(key, entry.stored_at, entry.ttl, entry.value) for key, entry in response_cache.backend.items()]
+    if not responses:
+        # Nothing was fetched, e.g. in a process that only ran a command; keep the last snapshot
+        return 0
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        pickle.dump({'version': SNAPSHOT_VERSION, 'saved_at': time.time(), 'responses': responses},
+                    f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    return len(responses)
+
+
+def load_snapshot(path=SNAPSHOT_PATH, max_age=SNAPSHOT_MAX_AGE):
+    """Restore cached responses saved by save_snapshot; returns how many were restored.
+
+    Entries keep their original fetch time, so stale ones are served once
+    and refreshed in the background as usual.
+    """
+    try:
+        with open(path, 'rb') as f:
+            snapshot = pickle.load(f)
+    except FileNotFoundError:
+        return 0
+    except (OSError, EOFError, AttributeError, pickle.UnpicklingError) as e:
+        logger.warning(f"Ignoring unreadable snapshot {path}: {e}")
+        return 0
+    if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_VERSION:
+        logger.warning(f"Ignoring snapshot {path} from another version")
+        return 0
+    restored = 0
+    now = time.time()
+    for key, stored_at, ttl, value in snapshot['responses']:
+        if now - stored_at > max_age or response_cache.get(key) is not None:
+            continue
+        response_cache.backend.set(key, CacheEntry(article_pool.adopt(value), stored_at, ttl))
+        restored += 1
+    return restored
+
+
+def init_snapshot(app):
+    """Restore the last snapshot now, then keep saving it in the background and at exit."""
+    if not SNAPSHOT_PATH:
+        return
+    started = time.perf_counter()
+    restored = load_snapshot()
+    if restored:
+        logger.info(f"Restored {restored} cached responses from {SNAPSHOT_PATH} "
+                    f"in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    def save():
+        try:
+            save_snapshot()
+        except Exception as e:
+            logger.warning(f"Could not save snapshot to {SNAPSHOT_PATH}: {e}")
+
+    def run():
+        while True:
+            time.sleep(SNAPSHOT_INTERVAL)
+            save()
+
+    if SNAPSHOT_INTERVAL:
+        threading.Thread(target=run, name='snapshot', daemon=True).start()
+    atexit.register(save)
+
+
+def main():
+    """Compile the page templates into the bytecode cache at build time.
+
+    Only the Jinja environment is built, so no snapshot or prefetch threads start.
+    """
+    logging.basicConfig(level=logging.INFO)
+    from app import create_flask
+    init_templates(create_flask())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,352 @@
+import os
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+
+from app.cache import CacheEntry, MemoryBackend
+from app.metrics import record_cache
+from app.singleflight import singleflight
+from app.upstream import bls_series_limit, bls_years_limit, fetch_bls_series, fetch_fred_observations
+
+logger = logging.getLogger(__name__)
+
+# Seconds before a stored series is checked upstream for new observations
+SYNC_INTERVAL = int(os.getenv('SERIES_SYNC_INTERVAL', 6 * 3600))
+# Years of history pulled the first time a BLS series is synced
+BLS_HISTORY_YEARS = int(os.getenv('BLS_HISTORY_YEARS', 10))
+# Covered-from date of a series whose whole history has been fetched
+FULL_HISTORY = '0001-01-01'
+# Earliest dates each provider has data for; backfills never reach further back
+HISTORY_FLOOR = {'fred': '1776-07-04', 'bls': '1913-01-01'}
+# BLS requests one backfill may make; older history is fetched by later requests
+BLS_BACKFILL_MAX_REQUESTS = int(os.getenv('BLS_BACKFILL_MAX_REQUESTS', 3))
+# Seconds a series whose backfill failed is served as stored without retrying
+BACKFILL_RETRY_INTERVAL = int(os.getenv('BACKFILL_RETRY_INTERVAL', 600))
+# Bytes of the database memory-mapped, so worker processes read observations from shared pages
+MMAP_SIZE = int(os.getenv('SERIES_DB_MMAP_MB', 64)) * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    series TEXT NOT NULL,
+    date TEXT NOT NULL,
+    value REAL,
+    footnotes TEXT,
+    PRIMARY KEY (series, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS series_sync (
+    series TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    synced_at REAL NOT NULL,
+    covered_from TEXT
+);
+"""
+
+
+class SeriesStore:
+    """SQLite store of FRED/BLS observations indexed by (series, date)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self.connection()
+        conn.executescript(SCHEMA)
+        try:
+            # Databases created before backfilling was added lack the column
+            conn.execute('ALTER TABLE series_sync ADD COLUMN covered_from TEXT')
+        except sqlite3.OperationalError:
+            pass
+
+    def connection(self):
+        # SQLite connections are not shared across threads; keep one per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(f'PRAGMA mmap_size={MMAP_SIZE}')
+            self._local.conn = conn
+        return conn
+
+    def last_date(self, series):
+        row = self.connection().execute(
+            'SELECT MAX(date) FROM observations WHERE series = ?', (series,)).fetchone()
+        return row[0]
+
+    def upsert(self, series, provider, rows, covered_from=None):
+        """Store (date, value, footnotes) rows and record the sync time.
+
+        covered_from is the earliest date the fetch asked upstream for; the
+        series' recorded coverage only ever moves earlier.
+        """
+        conn = self.connection()
+        with conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO observations (series, date, value, footnotes) VALUES (?, ?, ?, ?)',
+                [(series, d, value, json.dumps(notes) if notes else None) for d, value, notes in rows])
+            conn.execute(
+                'INSERT INTO series_sync (series, provider, synced_at, covered_from) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (series) DO UPDATE SET synced_at = excluded.synced_at, '
+                'covered_from = CASE WHEN covered_from IS NULL OR excluded.covered_from < covered_from '
+                'THEN COALESCE(excluded.covered_from, covered_from) ELSE covered_from END',
+                (series, provider, time.time(), covered_from))
+
+    def covered_from(self, series):
+        """Earliest date upstream has been asked for, or the first stored date if unrecorded."""
+        row = self.connection().execute(
+            'SELECT covered_from FROM series_sync WHERE series = ?', (series,)).fetchone()
+        if row and row[0]:
+            return row[0]
+        row = self.connection().execute(
+            'SELECT MIN(date) FROM observations WHERE series = ?', (series,)).fetchone()
+        return row[0]
+
+    def synced_at(self, series):
+        row = self.connection().execute(
+            'SELECT synced_at FROM series_sync WHERE series = ?', (series,)).fetchone()
+        return row[0] if row else None
+
+    def is_stale(self, series, max_age=SYNC_INTERVAL):
+        synced_at = self.synced_at(series)
+        return synced_at is None or time.time() - synced_at >= max_age
+
+    def query(self, series, start=None, end=None, limit=None, descending=True, before=None):
+        """Return (date, value, footnotes) rows for series within [start, end] and before `before`."""
+        sql = 'SELECT date, value, footnotes FROM observations WHERE series = ?'
+        args = [series]
+        if start:
+            sql += ' AND date >= ?'
+            args.append(start)
+        if end:
+            sql += ' AND date <= ?'
+            args.append(end)
+        if before:
+            sql += ' AND date < ?'
+            args.append(before)
+        sql += ' ORDER BY date DESC' if descending else ' ORDER BY date'
+        if limit:
+            sql += ' LIMIT ?'
+            args.append(limit)
+        return [(d, value, json.loads(notes) if notes else [])
+                for d, value, notes in self.connection().execute(sql, args)]
+
+
+def fred_value(value):
+    return float(value) if value != "." else None
+
+
+def bls_date(year, period):
+    """Map a BLS year/period pair to an ISO date, or None for non-monthly periods."""
+    if not period.startswith('M') or period == 'M13':
+        return None
+    return f"{year}-{period[1:]}-01"
+
+
+def fred_sync_params(store, series_id):
+    """FRED query params asking only for observations from the last stored date on."""
+    params = {'sort_order': 'asc'}
+    last = store.last_date(series_id)
+    if last:
+        # Re-fetch the last stored date too so revisions to it are picked up
+        params['observation_start'] = last
+    return params
+
+
+def fred_covered_from(params):
+    # A first sync asks FRED for the whole series
+    return None if 'observation_start' in params else FULL_HISTORY
+
+
+def save_fred(store, series_id, observations, covered_from=None):
+    store.upsert(series_id, 'fred', [
+        (item["date"], fred_value(item["value"]), None) for item in observations], covered_from)
+    return len(observations)
+
+
+def sync_fred(store, series_id):
+    """Pull only FRED observations newer than the last one stored."""
+    params = fred_sync_params(store, series_id)
+    observations = fetch_fred_observations(series_id, **params)
+    return save_fred(store, series_id, observations, fred_covered_from(params))
+
+
+def bls_sync_chunks(store, series_ids):
+    """Split series into (chunk, start_year, end_year) requests from the latest stored year."""
+    this_year = datetime.now().year
+    chunk_size = bls_series_limit()
+    chunks = []
+    for i in range(0, len(series_ids), chunk_size):
+        chunk = series_ids[i:i + chunk_size]
+        last_dates = [store.last_date(series_id) for series_id in chunk]
+        if all(last_dates):
+            start_year = int(min(last_dates)[:4])
+        else:
+            start_year = this_year - BLS_HISTORY_YEARS + 1
+        chunks.append((chunk, start_year, this_year))
+    return chunks
+
+
+def bls_covered_from(store, series_ids, start_year):
+    # Only a first sync starts from the history horizon rather than the latest stored year
+    if all(store.last_date(series_id) for series_id in series_ids):
+        return None
+    return f"{start_year}-01-01"
+
+
+def save_bls(store, series_ids, results, covered_from=None):
+    saved = 0
+    for series_id in series_ids:
+        rows = []
+        for item in results.get(series_id, []):
+            d = bls_date(item.get("year"), item.get("period", ""))
+            if d is None:
+                continue
+            notes = [note.get("text") for note in item.get("footnotes", []) if note.get("text")]
+            rows.append((d, float(item.get("value")), notes))
+        store.upsert(series_id, 'bls', rows, covered_from)
+        saved += len(rows)
+    return saved
+
+
+def sync_bls(store, series_ids):
+    """Pull BLS data from the latest stored year onwards, chunked to the series limit."""
+    synced = 0
+    for chunk, start_year, end_year in bls_sync_chunks(store, series_ids):
+        covered_from = bls_covered_from(store, chunk, start_year)
+        synced += save_bls(store, chunk, fetch_bls_series(chunk, start_year, end_year), covered_from)
+    return synced
+
+
+def needs_history(store, series_ids, start):
+    """Series with stored data whose history has not been fetched back to start."""
+    return [series_id for series_id in series_ids
+            if (store.covered_from(series_id) or start) > start]
+
+
+def backfill_fred(store, series_id, start):
+    covered = store.covered_from(series_id)
+    observations = fetch_fred_observations(series_id, sort_order='asc', observation_start=start,
+                                           observation_end=covered)
+    return save_fred(store, series_id, observations, start)
+
+
+def backfill_bls(store, series_ids, start):
+    """Fetch BLS years from start up to the earliest covered one, newest span first.
+
+    Coverage then only moves back over years actually stored, even if a
+    later span fails. At most BLS_BACKFILL_MAX_REQUESTS requests are made;
+    whatever remains is fetched by later calls.
+    """
+    first_year = int(start[:4])
+    span = bls_years_limit()
+    chunk_size = bls_series_limit()
+    requests_left = BLS_BACKFILL_MAX_REQUESTS
+    saved = 0
+    for i in range(0, len(series_ids), chunk_size):
+        chunk = series_ids[i:i + chunk_size]
+        covered = min(store.covered_from(series_id) for series_id in chunk)
+        # A year covered from January on is complete; otherwise refetch its earlier months too
+        last_year = int(covered[:4]) - (1 if covered[5:] == '01-01' else 0)
+        for end_year in range(last_year, first_year - 1, -span):
+            if requests_left <= 0:
+                return saved
+            requests_left -= 1
+            start_year = max(first_year, end_year - span + 1)
+            saved += save_bls(store, chunk, fetch_bls_series(chunk, start_year, end_year), f"{start_year}-01-01")
+    return saved
+
+
+def backfill(store, provider, series_ids, start):
+    # Re-checked here because another thread or worker may have fetched the history meanwhile
+    missing = needs_history(store, series_ids, start)
+    if not missing:
+        return 0
+    if provider == 'fred':
+        return sum(backfill_fred(store, series_id, start) for series_id in missing)
+    return backfill_bls(store, missing, start)
+
+
+def stale_series(store, series_ids, max_age=SYNC_INTERVAL):
+    return [series_id for series_id in series_ids if store.is_stale(series_id, max_age)]
+
+
+def has_fallback(store, series_ids):
+    """True when every series has stored data to serve if a sync fails."""
+    return all(store.last_date(series_id) is not None for series_id in series_ids)
+
+
+def sync_stale(store, provider, series_ids, max_age=SYNC_INTERVAL):
+    # Re-checked here because another thread or worker may have synced them meanwhile
+    stale = stale_series(store, series_ids, max_age)
+    if not stale:
+        return 0
+    if provider == 'fred':
+        return sum(sync_fred(store, series_id) for series_id in stale)
+    return sync_bls(store, stale)
+
+
+def ensure_synced(store, provider, series_ids, max_age=SYNC_INTERVAL, start=None):
+    """Sync any stale series, keeping already stored data if upstream fails.
+
+    Concurrent requests for the same stale series share one sync. Raises the
+    upstream error only when a series has nothing stored to fall back on.
+    With start, history before the earliest stored date is fetched back to it.
+    """
+    stale = stale_series(store, series_ids, max_age)
+    record_cache(provider, 'hit', len(series_ids) - len(stale))
+    record_cache(provider, 'miss', len(stale))
+    if stale:
+        try:
+            if provider == 'fred':
+                for series_id in stale:
+                    singleflight.do(f"sync:fred:{series_id}",
+                                    lambda series_id=series_id: sync_stale(store, 'fred', [series_id], max_age))
+            else:
+                singleflight.do(f"sync:bls:{','.join(stale)}", lambda: sync_stale(store, 'bls', stale, max_age))
+        except Exception as e:
+            if not has_fallback(store, stale):
+                raise
+            logger.warning(f"Serving stored {provider} data after sync failure: {e}")
+    if not start:
+        return
+    start = max(start, HISTORY_FLOOR[provider])
+    missing = [series_id for series_id in needs_history(store, series_ids, start)
+               if not backfill_failed(provider, series_id)]
+    if missing:
+        try:
+            singleflight.do(f"backfill:{provider}:{','.join(missing)}:{start}",
+                            lambda: backfill(store, provider, missing, start))
+        except Exception as e:
+            for series_id in missing:
+                backfill_failures.set(f"{provider}:{series_id}",
+                                      CacheEntry(None, time.time(), BACKFILL_RETRY_INTERVAL))
+            logger.warning(f"Serving stored {provider} data from {store.covered_from(missing[0])} "
+                           f"instead of {start}: {e}")
+
+
+def backfill_failed(provider, series_id):
+    failure = backfill_failures.get(f"{provider}:{series_id}")
+    return failure is not None and failure.is_fresh()
+
+
+def parse_date(value):
+    """Validate a YYYY-MM-DD query parameter, returning it unchanged or None."""
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d').date().isoformat()
+
+
+def start_of_year(years_back=0):
+    return date(date.today().year - years_back, 1, 1).isoformat()
+
+
+# Series whose last backfill failed, so requests do not retry it until BACKFILL_RETRY_INTERVAL passes
+backfill_failures = MemoryBackend(max_entries=1024)
+
+# Shared store used by the economic-data routes
+series_store = SeriesStore(os.getenv('SERIES_DB_PATH', os.path.join('data', 'series.db')))
@@ -0,0 +1,263 @@
+import os
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.budget import RATE_LIMITED_PAUSE, current_priority, get_budget
+from app.metrics import record_upstream, timed
+
+logger = logging.getLogger(__name__)
+
+# Base URLs of the upstream data providers, overridable to point at a stand-in server
+PROVIDERS = {
+    'fred': os.getenv('FRED_BASE_URL', 'https://api.stlouisfed.org/fred'),
+    'bls': os.getenv('BLS_BASE_URL', 'https://api.bls.gov/publicAPI/v2'),
+    'newsapi': os.getenv('NEWSAPI_BASE_URL', 'https://newsapi.org/v2'),
+}
+
+# Statuses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+CONNECT_TIMEOUT = float(os.getenv('UPSTREAM_CONNECT_TIMEOUT', 3.05))
+READ_TIMEOUT = float(os.getenv('UPSTREAM_READ_TIMEOUT', 10))
+MAX_RETRIES = int(os.getenv('UPSTREAM_MAX_RETRIES', 2))
+BACKOFF_BASE = float(os.getenv('UPSTREAM_BACKOFF', 0.5))
+BACKOFF_MAX = 8.0
+POOL_SIZE = int(os.getenv('UPSTREAM_POOL_SIZE', 10))
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling a provider whose circuit breaker is open."""
+
+
+class UpstreamError(Exception):
+    """Raised when an upstream provider answers with a non-200 status."""
+
+    def __init__(self, status_code, message=None):
+        super().__init__(message or f"Upstream returned status code {status_code}")
+        self.status_code = status_code
+        self.message = message
+
+
+class BudgetExhaustedError(UpstreamError):
+    """Raised instead of calling a provider whose request budget is spent."""
+
+    def __init__(self, provider):
+        super().__init__(429, f"{provider} request budget exhausted")
+        self.provider = provider
+
+
+def retry_after(response):
+    try:
+        return float(response.headers.get('Retry-After', RATE_LIMITED_PAUSE))
+    except ValueError:
+        return RATE_LIMITED_PAUSE
+
+
+class CircuitBreaker:
+    """Stops calling a provider after repeated failures until a cool-down passes."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.time() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.time() - self.opened_at >= self.reset_timeout:
+                # Let one trial request through and hold the rest until it finishes
+                self.opened_at = time.time()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.time()
+
+
+class UpstreamClient:
+    """Pooled session for one provider with timeouts, retries, a circuit breaker and a request budget."""
+
+    def __init__(self, name, base_url, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+                 max_retries=MAX_RETRIES, pool_size=POOL_SIZE):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.breaker = CircuitBreaker()
+        self.budget = get_budget(name)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def url(self, path):
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def backoff(self, attempt):
+        # Full jitter keeps retrying workers from synchronising on a recovering provider
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+    # Steps of one call shared with the async client, so both apply the same breaker, budget and retry rules
+    def begin(self):
+        """Check the circuit breaker and return the priority the call is made at."""
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {self.name}")
+        return current_priority()
+
+    def is_last_attempt(self, attempt, priority):
+        # Retries spend budget too, so stop retrying once the quota is gone
+        return attempt == self.max_retries or (self.budget is not None and not self.budget.available(priority))
+
+    def record_error(self, error, elapsed, last_attempt):
+        """Record a failed attempt; True if the error should be raised rather than retried."""
+        record_upstream(self.name, 'error', elapsed)
+        if last_attempt:
+            self.breaker.record_failure()
+            return True
+        logger.warning(f"{self.name} request failed ({error}), retrying")
+        return False
+
+    def record_response(self, response, elapsed, last_attempt):
+        """Record an answer; True if it should be returned rather than retried."""
+        record_upstream(self.name, response.status_code, elapsed)
+        if response.status_code == 429 and self.budget is not None:
+            self.budget.pause(retry_after(response))
+        if response.status_code not in RETRY_STATUSES:
+            self.breaker.record_success()
+            return True
+        if last_attempt:
+            self.breaker.record_failure()
+            return True
+        logger.warning(f"{self.name} returned status code {response.status_code}, retrying")
+        return False
+
+    def request(self, method, path, **kwargs):
+        priority = self.begin()
+        kwargs.setdefault('timeout', self.timeout)
+        url = self.url(path)
+        for attempt in range(self.max_retries + 1):
+            if self.budget is not None and not self.budget.acquire(priority):
+                raise BudgetExhaustedError(self.name)
+            last_attempt = self.is_last_attempt(attempt, priority)
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if self.record_error(e, time.perf_counter() - started, last_attempt):
+                    raise
+            else:
+                if self.record_response(response, time.perf_counter() - started, last_attempt):
+                    return response
+            time.sleep(self.backoff(attempt))
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(name):
+    """Return the shared client for a provider, creating it on first use."""
+    with _clients_lock:
+        client = _clients.get(name)
+        if client is None:
+            client = _clients[name] = UpstreamClient(name, PROVIDERS[name])
+        return client
+
+
+# Provider helpers shared by the routes and the series store. Requests are built
+# and responses parsed separately so the async front end can reuse them.
+def fred_request(series_id, **params):
+    """Build the FRED observations request, newest first unless overridden."""
+    query = {
+        'series_id': series_id,
+        'api_key': os.environ.get('FRED_API_KEY'),
+        'file_type': 'json',
+        'sort_order': 'desc',
+    }
+    query.update(params)
+    return {'method': 'GET', 'path': '/series/observations', 'params': query}
+
+
+def fred_observations(response):
+    if response.status_code != 200:
+        logger.warning(f"FRED API returned status code {response.status_code}")
+        raise UpstreamError(response.status_code)
+    with timed('decode'):
+        return response.json().get("observations", [])
+
+
+def fetch_fred_observations(series_id, **params):
+    """Fetch raw FRED observations for one series."""
+    return fred_observations(get_client('fred').request(**fred_request(series_id, **params)))
+
+
+def bls_request(series_ids, startyear, endyear):
+    data = {
+        "seriesid": series_ids,
+        "startyear": str(startyear),
+        "endyear": str(endyear),
+        "registrationkey": os.environ.get('BLS_API_KEY')
+    }
+    return {'method': 'POST', 'path': '/timeseries/data/', 'json': data,
+            'headers': {"Content-Type": "application/json"}}
+
+
+def bls_results(response):
+    """Parse a BLS response into {series_id: [item, ...]}."""
+    if response.status_code != 200:
+        logger.warning(f"BLS API returned status code {response.status_code}")
+        raise UpstreamError(response.status_code)
+    with timed('decode'):
+        data = response.json()
+    if data.get("status") != "REQUEST_SUCCEEDED":
+        logger.warning(f"BLS API request failed: {data.get('message')}")
+        raise UpstreamError(400, data.get("message"))
+    return {
+        series.get("seriesID"): series.get("data", [])
+        for series in data.get("Results", {}).get("series", [])
+    }
+
+
+def fetch_bls_series(series_ids, startyear, endyear):
+    """Fetch raw BLS data points for up to bls_series_limit() series."""
+    return bls_results(get_client('bls').request(**bls_request(series_ids, startyear, endyear)))
+
+
+def bls_series_limit():
+    # BLS accepts 50 series per request with a registration key, 25 without
+    return 50 if os.environ.get('BLS_API_KEY') else 25
+
+
+def bls_years_limit():
+    # BLS returns at most 20 years per request with a registration key, 10 without
+    return 20 if os.environ.get('BLS_API_KEY') else 10
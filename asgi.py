@@ -0,0 +1,5 @@
+from app import create_app
+from app.aio import create_asgi_app
+
+# Async entry point for I/O-bound traffic: uvicorn asgi:app
+app = create_asgi_app(create_app())
@@ -0,0 +1,303 @@
+"""Latency, throughput and memory of every route under concurrent load, fully offline.
+
+The app runs in a child process against benchmarks.upstream_server, which
+replays synthetic FRED, BLS and NewsAPI fixtures, so no network access or
+real API keys are needed. Run from the repository root:
+
+    python -m benchmarks.bench_routes [--requests 200] [--concurrency 16]
+        [--latency 50] [--error-rate 0] [--server wsgi|asgi]
+        [--env SERIES_SYNC_INTERVAL=0] [--output results.json] [--compare baseline.json]
+
+Results are printed as JSON: p50/p95/p99 latency, requests per second,
+peak RSS of the app process and upstream calls, per route.
+"""
+import os
+import re
+import sys
+import html
+import json
+import time
+import socket
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.upstream_server import make_server
+
+# Routes driven by the benchmark and whether each needs the X-API-Key header
+ROUTES = [
+    ('/', False),
+    ('/markets', False),
+    ('/stocks', False),
+    ('/crypto', False),
+    ('/real-estate', False),
+    ('/tech', False),
+    ('/economic-news', True),
+    ('/interest-rates', True),
+    ('/inflation', True),
+    ('/jobs-report', True),
+    ('/economic-data/batch?fred=FEDFUNDS,CPIAUCSL,UNRATE&bls=CES0000000001,LNS14000000', True),
+    ('/search?q=fed+rates', True),
+    # Resolved to the first card image's signed /img URL on /markets
+    ('/img', False),
+    ('/metrics', False),
+]
+
+API_KEY = 'bench'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def rss_bytes(pid):
+    # Resident set size from /proc; None where it is unavailable
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+
+
+class RssSampler:
+    """Track the peak RSS of a process while a route is under load."""
+
+    def __init__(self, pid, interval=0.01):
+        self.pid = pid
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = rss_bytes(self.pid)
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def app_env(upstream_url, db_path, overrides):
+    env = dict(os.environ)
+    env.update({
+        'API_KEY': API_KEY,
+        'NEWS_API_KEY': 'bench',
+        'FRED_API_KEY': 'bench',
+        'PREFETCH_ENABLED': '0',
+        'SERIES_DB_PATH': db_path,
+        'FRED_BASE_URL': f'{upstream_url}/fred',
+        'BLS_BASE_URL': f'{upstream_url}/bls',
+        'NEWSAPI_BASE_URL': f'{upstream_url}/newsapi',
+        # Card images are proxied through /img only when URLs can be signed
+        'SECRET_KEY': 'bench',
+        'IMAGE_CACHE_DIR': os.path.join(os.path.dirname(db_path), 'images'),
+        # The stand-in serves the images from a loopback address
+        'IMAGE_ALLOW_PRIVATE': '1',
+        # Every run starts cold rather than from the previous run's cached responses
+        'SNAPSHOT_PATH': '',
+    })
+    # The stand-in has no quotas; empty limits turn the budgets off unless --env sets them
+    for provider in ('NEWSAPI', 'FRED', 'BLS'):
+        env.update({f'{provider}_RATE_LIMIT': '', f'{provider}_DAILY_LIMIT': ''})
+    env.update(overrides)
+    return env
+
+
+def start_app(server, port, env):
+    if server == 'asgi':
+        command = [sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', str(port),
+                   '--log-level', 'warning', '--no-access-log']
+    else:
+        command = [sys.executable, '-m', 'benchmarks.bench_routes', '--serve', str(port)]
+    process = subprocess.Popen(command, env=env)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"App exited with status {process.returncode}")
+        try:
+            requests.get(f'http://127.0.0.1:{port}/static/style.css', timeout=1)
+            return process
+        except requests.exceptions.ConnectionError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("App did not start within 30 seconds")
+
+
+def serve(port):
+    # Child process entry point for --server wsgi
+    import logging
+    from werkzeug.serving import make_server as make_wsgi_server
+    from app import create_app
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    make_wsgi_server('127.0.0.1', port, create_app(), threaded=True).serve_forever()
+
+
+def image_path(base_url):
+    """Path of the first proxied card image on a news page."""
+    page = requests.get(base_url + '/markets', timeout=60).text
+    match = re.search(r'src="(/img\?[^"]+)"', page)
+    if match is None:
+        raise RuntimeError("No /img URL on /markets; is SECRET_KEY set?")
+    return html.unescape(match.group(1))
+
+
+def drive(url, headers, total, concurrency):
+    """Issue total GETs from concurrency workers, returning (latencies, errors, seconds)."""
+    local = threading.local()
+
+    def one(_):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            ok = session.get(url, headers=headers, timeout=60).status_code < 400
+        except requests.exceptions.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - start
+    return sorted(latency for latency, _ in results), sum(1 for _, ok in results if not ok), elapsed
+
+
+def bench_route(base_url, path, needs_key, pid, upstream, args):
+    url = base_url + (image_path(base_url) if path == '/img' else path)
+    headers = {'X-API-Key': API_KEY} if needs_key else {}
+    # One sequential request first shows the cold path: empty caches and store
+    calls_before = upstream.requests
+    start = time.perf_counter()
+    cold_ok = requests.get(url, headers=headers, timeout=60).status_code < 400
+    cold = time.perf_counter() - start
+    with RssSampler(pid) as sampler:
+        latencies, errors, elapsed = drive(url, headers, args.requests, args.concurrency)
+    return {
+        'requests': args.requests,
+        'errors': errors + (0 if cold_ok else 1),
+        'cold_ms': to_ms(cold),
+        'p50_ms': to_ms(percentile(latencies, 50)),
+        'p95_ms': to_ms(percentile(latencies, 95)),
+        'p99_ms': to_ms(percentile(latencies, 99)),
+        'rps': round(args.requests / elapsed, 1),
+        'peak_rss_mb': round(sampler.peak / 2 ** 20, 1) if sampler.peak else None,
+        'upstream_calls': upstream.requests - calls_before,
+    }
+
+
+def to_ms(seconds):
+    return round(seconds * 1000, 3) if seconds is not None else None
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Print each route's change against a previous run's JSON."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"Compared with {baseline.get('commit') or baseline_path}:", file=sys.stderr)
+    for path, current in results['routes'].items():
+        before = baseline.get('routes', {}).get(path)
+        if not before:
+            continue
+        changes = []
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'rps', 'peak_rss_mb'):
+            if before.get(metric) and current.get(metric) is not None:
+                changes.append(f"{metric} {(current[metric] / before[metric] - 1) * 100:+.1f}%")
+        print(f"  {path:<40} {'  '.join(changes)}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200, help='measured requests per route')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=50, help='mean upstream latency in milliseconds')
+    parser.add_argument('--error-rate', type=float, default=0, help='fraction of upstream calls failing with 429/503')
+    parser.add_argument('--server', choices=('wsgi', 'asgi'), default='wsgi')
+    parser.add_argument('--route', action='append', help='only benchmark this route path (repeatable)')
+    parser.add_argument('--env', action='append', default=[], metavar='NAME=VALUE',
+                        help='extra environment for the app, e.g. SERIES_SYNC_INTERVAL=0')
+    parser.add_argument('--output', help='also write the JSON results to this file')
+    parser.add_argument('--compare', help='JSON results of an earlier run to diff against')
+    parser.add_argument('--serve', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args.serve)
+
+    upstream = make_server(port=free_port(), latency=args.latency / 1000, error_rate=args.error_rate)
+    threading.Thread(target=upstream.serve_forever, daemon=True).start()
+    upstream_url = f'http://127.0.0.1:{upstream.server_address[1]}'
+    overrides = dict(item.split('=', 1) for item in args.env)
+
+    routes = [(path, needs_key) for path, needs_key in ROUTES
+              if not args.route or path.split('?')[0] in args.route]
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        env = app_env(upstream_url, os.path.join(tmp, 'series.db'), overrides)
+        process = start_app(args.server, port, env)
+        try:
+            base_url = f'http://127.0.0.1:{port}'
+            results = {
+                'commit': git_commit(),
+                'python': platform.python_version(),
+                'config': {
+                    'requests': args.requests,
+                    'concurrency': args.concurrency,
+                    'upstream_latency_ms': args.latency,
+                    'upstream_error_rate': args.error_rate,
+                    'server': args.server,
+                    'env': overrides,
+                },
+                'routes': {path: bench_route(base_url, path, needs_key, process.pid, upstream, args)
+                           for path, needs_key in routes},
+            }
+        finally:
+            process.terminate()
+            process.wait()
+    upstream.shutdown()
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
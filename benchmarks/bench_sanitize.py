@@ -0,0 +1,71 @@
+"""Per-article cost of sanitizing news content.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_sanitize [--articles 10000]
+"""
+import re
+import time
+import random
+import argparse
+
+from app.sanitize import clean_text
+
+WORDS = ('markets rally as fed signals pause inflation cools jobs report beats '
+         'estimates treasury yields slip crypto rebounds housing starts').split()
+
+
+def legacy_clean(content):
+    # The per-field cleaner the routes used before app.sanitize
+    if not content:
+        return ""
+    if isinstance(content, str):
+        content = content.replace('window.open', '')
+        content = content.replace('javascript:', '')
+        content = re.sub(r'<[^>]+>', '', content)
+        content = content.replace('&gt;', '>').replace('&lt;', '<').replace('&amp;', '&')
+        return content[:200] + '...' if len(content) > 200 else content
+    return ""
+
+
+def make_articles(count, seed=7):
+    rng = random.Random(seed)
+
+    def sentence(n):
+        return ' '.join(rng.choice(WORDS) for _ in range(n))
+
+    return [{
+        "title": f"{sentence(10).capitalize()} - Source {i % 40}",
+        "description": f"<p>{sentence(30)} &amp; <b>{sentence(5)}</b></p>",
+        "content": f"<div>{sentence(35)} &lt;more&gt;</div>… [+{rng.randint(100, 9000)} chars]",
+    } for i in range(count)]
+
+
+def run(clean, articles):
+    start = time.perf_counter()
+    for article in articles:
+        clean(article["title"])
+        clean(article["description"])
+        clean(article["content"])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--articles', type=int, default=10000)
+    args = parser.parse_args()
+
+    articles = make_articles(args.articles)
+    clean_text.cache_clear()
+    results = [
+        ('legacy clean_article_content', run(legacy_clean, articles)),
+        ('sanitize.clean_text (cold)', run(clean_text, articles)),
+        ('sanitize.clean_text (cached)', run(clean_text, articles)),
+    ]
+    print(f"{args.articles} articles, 3 fields each")
+    for name, seconds in results:
+        print(f"  {name:<30} {seconds * 1e6 / args.articles:8.2f} us/article  ({seconds:.3f}s total)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Indexing and query cost of the article search index as the corpus grows.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_search [--articles 300000] [--max-documents 100000]
+"""
+import time
+import random
+import argparse
+import resource
+
+from app.models import Article
+from app.search import SearchIndex
+
+WORDS = ('fed rates inflation cools jobs report beats estimates treasury yields slip crypto '
+         'bitcoin ethereum rebounds housing starts mortgage demand earnings guidance tech '
+         'startups funding oil prices opec dollar euro yen stocks rally selloff bank lending').split()
+SOURCES = ('Reuters', 'Bloomberg', 'CNBC', 'MarketWatch', 'CoinDesk', 'TechCrunch')
+QUERIES = ('fed rates', 'bitcoin rally', 'mortgage rates housing', 'tech earnings guidance', 'oil')
+
+
+def make_article(i, rng):
+    def sentence(n):
+        return ' '.join(rng.choice(WORDS) for _ in range(n))
+
+    return Article(
+        title=sentence(9), source=SOURCES[i % len(SOURCES)], author=None,
+        description=sentence(30), url=f'https://example.com/{i}',
+        published_at=f'2026-{1 + i % 12:02d}-{1 + i % 28:02d}T00:00:00Z',
+        content_snippet=sentence(35), image_url=None,
+        canonical_url=f'https://example.com/{i}', fingerprint=str(i))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--articles', type=int, default=300000)
+    parser.add_argument('--max-documents', type=int, default=100000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    index = SearchIndex(args.max_documents)
+    step = args.articles // 6
+    print(f"{'articles':>10} {'indexed':>9} {'add us':>8} {'query ms':>9} {'filtered ms':>12} {'max rss MB':>11}")
+    for batch_start in range(0, args.articles, step):
+        articles = [make_article(i, rng) for i in range(batch_start, batch_start + step)]
+        start = time.perf_counter()
+        for article in articles:
+            index.add(article)
+        add_us = (time.perf_counter() - start) * 1e6 / len(articles)
+
+        start = time.perf_counter()
+        for query in QUERIES:
+            index.search(query)
+        query_ms = (time.perf_counter() - start) * 1000 / len(QUERIES)
+
+        start = time.perf_counter()
+        for query in QUERIES:
+            index.search(query, sources={'reuters'}, start='2026-03-01', end='2026-06-30')
+        filtered_ms = (time.perf_counter() - start) * 1000 / len(QUERIES)
+
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{batch_start + step:>10} {len(index):>9} {add_us:>8.1f} {query_ms:>9.2f} {filtered_ms:>12.2f} {rss:>11.0f}")
+
+
+if __name__ == '__main__':
+    main()
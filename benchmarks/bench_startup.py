@@ -0,0 +1,163 @@
+"""Cold-start cost: app startup time and time to first byte of the first page.
+
+Each run starts a fresh app process against benchmarks.upstream_server and
+times how long create_app() takes, how long until the server accepts
+connections, and the first request to each page. "cold" starts with empty
+template and snapshot caches, as on a fresh deploy; "warm" starts with the
+compiled-template cache and response snapshot a previous process left on
+disk, as after an idle spin-down. Run from the repository root:
+
+    python -m benchmarks.bench_startup [--runs 5] [--latency 200] [--output results.json]
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import platform
+import statistics
+import tempfile
+import threading
+import subprocess
+
+import requests
+
+from benchmarks.bench_routes import app_env, free_port, git_commit
+from benchmarks.upstream_server import make_server
+
+PAGES = ['/', '/markets', '/economic-news']
+
+API_KEY = 'bench'
+
+# Child process: time create_app() alone
+CREATE_APP = '''
+import time
+started = time.perf_counter()
+from app import create_app
+create_app()
+print((time.perf_counter() - started) * 1000)
+'''
+
+# Child process: fetch every page once and save the response snapshot, as a running app would
+WRITE_SNAPSHOT = '''
+import sys
+from app import create_app
+from app.startup import save_snapshot
+client = create_app().test_client()
+for path in sys.argv[1:]:
+    client.get(path, headers={"X-API-Key": "bench"})
+save_snapshot()
+'''
+
+
+def wait_for_port(port, process, timeout=30):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"App exited with status {process.returncode}")
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.05).close()
+            return
+        except OSError:
+            time.sleep(0.005)
+    raise RuntimeError(f"App did not start within {timeout} seconds")
+
+
+def first_requests(env, upstream):
+    """Start a server process and time it up to the first response of each page."""
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-m', 'benchmarks.bench_routes', '--serve', str(port)], env=env)
+    try:
+        wait_for_port(port, process)
+        result = {'listening_ms': (time.perf_counter() - started) * 1000, 'pages': {}}
+        for path in PAGES:
+            calls = upstream.requests
+            request_started = time.perf_counter()
+            response = requests.get(f'http://127.0.0.1:{port}{path}', headers={'X-API-Key': API_KEY}, stream=True)
+            next(response.iter_content(1), None)
+            ttfb = (time.perf_counter() - request_started) * 1000
+            response.close()
+            result['pages'][path] = {'status': response.status_code, 'ttfb_ms': ttfb,
+                                     'upstream_calls': upstream.requests - calls}
+        return result
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def create_app_ms(env):
+    output = subprocess.run([sys.executable, '-c', CREATE_APP], env=env, capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def summarize(runs):
+    def median(values):
+        return round(statistics.median(values), 1)
+
+    return {
+        'create_app_ms': median([run['create_app_ms'] for run in runs]),
+        'listening_ms': median([run['listening_ms'] for run in runs]),
+        'pages': {path: {
+            'ttfb_ms': median([run['pages'][path]['ttfb_ms'] for run in runs]),
+            'upstream_calls': max(run['pages'][path]['upstream_calls'] for run in runs),
+            'status': sorted({run['pages'][path]['status'] for run in runs}),
+        } for path in PAGES},
+    }
+
+
+def bench_scenario(name, upstream_url, upstream, runs):
+    results = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = app_env(upstream_url, os.path.join(tmp, 'series.db'), {
+                'TEMPLATE_CACHE_DIR': os.path.join(tmp, 'jinja'),
+                'SNAPSHOT_PATH': os.path.join(tmp, 'snapshot.pickle'),
+                'SNAPSHOT_INTERVAL': '0',
+                'IMAGE_CACHE_DIR': os.path.join(tmp, 'images'),
+            })
+            if name == 'warm':
+                # A previous process compiled the templates, synced series and left a snapshot
+                subprocess.run([sys.executable, '-c', WRITE_SNAPSHOT, *PAGES, '/interest-rates'],
+                               env=env, capture_output=True, check=True)
+            run = {'create_app_ms': create_app_ms(env)}
+            if name == 'cold':
+                # create_app_ms just filled the caches; start the server from empty ones again
+                for path in (env['SNAPSHOT_PATH'], env['SERIES_DB_PATH']):
+                    if os.path.exists(path):
+                        os.remove(path)
+                for entry in os.listdir(env['TEMPLATE_CACHE_DIR']):
+                    os.remove(os.path.join(env['TEMPLATE_CACHE_DIR'], entry))
+            run.update(first_requests(env, upstream))
+            results.append(run)
+    return summarize(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=200, help='mean upstream latency in milliseconds')
+    parser.add_argument('--output', help='also write the JSON results to this file')
+    args = parser.parse_args()
+
+    upstream = make_server(port=free_port(), latency=args.latency / 1000)
+    threading.Thread(target=upstream.serve_forever, daemon=True).start()
+    upstream_url = f'http://127.0.0.1:{upstream.server_address[1]}'
+    results = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'config': {'runs': args.runs, 'upstream_latency_ms': args.latency},
+        'scenarios': {name: bench_scenario(name, upstream_url, upstream, args.runs) for name in ('cold', 'warm')},
+    }
+    upstream.shutdown()
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
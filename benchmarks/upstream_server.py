@@ -0,0 +1,180 @@
+"""Local stand-in for FRED, BLS and NewsAPI that replays fixture responses.
+
+The fixtures in benchmarks/fixtures/ are synthetic, shaped like the real
+APIs' responses: generated headlines and article text, and one FRED and one
+BLS series whose values are rescaled per requested series id so every id
+gets its own data. Article images are generated JPEGs served from /images/.
+Run from the repository root:
+
+    python -m benchmarks.upstream_server [--port 8765] [--latency 50] [--error-rate 0.05]
+
+Point the app at it with FRED_BASE_URL=http://127.0.0.1:8765/fred,
+BLS_BASE_URL=http://127.0.0.1:8765/bls and NEWSAPI_BASE_URL=http://127.0.0.1:8765/newsapi.
+"""
+import io
+import os
+import json
+import time
+import zlib
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Articles returned per NewsAPI query, picked from the fixture set by the query's hash
+NEWS_PAGE_SIZE = 40
+# Size of the generated article images, like a typical publisher's lead photo
+IMAGE_SIZE = (1200, 675)
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name)) as f:
+        return json.load(f)
+
+
+def series_scale(series_id):
+    """Factor between 0.5 and 1.5 giving each series id its own values."""
+    return 0.5 + zlib.crc32(series_id.encode('utf-8')) % 1000 / 1000
+
+
+def rescale(value, scale, digits):
+    return value if value == '.' else f"{float(value) * scale:.{digits}f}"
+
+
+class Replay:
+    """Fixture provider responses, filtered by the request's parameters."""
+
+    def __init__(self, base_url=''):
+        self.fred = load_fixture('fred_series_observations.json')
+        self.bls = load_fixture('bls_timeseries_data.json')
+        self.news = load_fixture('newsapi_everything.json')
+        for article in self.news['articles']:
+            if article.get('urlToImage'):
+                article['urlToImage'] = article['urlToImage'].replace('{upstream}', base_url)
+        self.images = {}
+        self._lock = threading.Lock()
+
+    def fred_observations(self, params):
+        scale = series_scale(params.get('series_id', ''))
+        observations = [{**item, 'value': rescale(item['value'], scale, 2)} for item in self.fred['observations']]
+        start = params.get('observation_start')
+        if start:
+            observations = [item for item in observations if item['date'] >= start]
+        if params.get('sort_order', 'asc') == 'desc':
+            observations = observations[::-1]
+        limit = int(params.get('limit', 100000))
+        return {**self.fred, 'count': len(observations), 'observations': observations[:limit]}
+
+    def bls_data(self, body):
+        start_year = int(body.get('startyear', 0))
+        end_year = int(body.get('endyear', 9999))
+        data = [item for item in self.bls['Results']['series'][0]['data']
+                if start_year <= int(item['year']) <= end_year]
+        series = [{'seriesID': series_id,
+                   'data': [{**item, 'value': rescale(item['value'], series_scale(series_id), 1)} for item in data]}
+                  for series_id in body.get('seriesid', [])]
+        return {**self.bls, 'Results': {'series': series}}
+
+    def news_everything(self, params):
+        articles = self.news['articles']
+        offset = zlib.crc32(params.get('q', '').encode('utf-8')) % len(articles)
+        page = (articles[offset:] + articles[:offset])[:NEWS_PAGE_SIZE]
+        return {**self.news, 'totalResults': len(page), 'articles': page}
+
+    def image(self, name):
+        """A JPEG for /images/<name>, generated once per name."""
+        with self._lock:
+            data = self.images.get(name)
+            if data is None:
+                from PIL import Image
+
+                crc = zlib.crc32(name.encode('utf-8'))
+                colour = (crc & 0xff, crc >> 8 & 0xff, crc >> 16 & 0xff)
+                out = io.BytesIO()
+                Image.new('RGB', IMAGE_SIZE, colour).save(out, 'JPEG', quality=85)
+                data = self.images[name] = out.getvalue()
+            return data
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        params = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        if parts.path == '/fred/series/observations':
+            return self.answer(lambda: self.server.replay.fred_observations(params))
+        if parts.path == '/newsapi/everything':
+            return self.answer(lambda: self.server.replay.news_everything(params))
+        if parts.path.startswith('/images/'):
+            return self.answer(lambda: self.server.replay.image(parts.path[len('/images/'):]), 'image/jpeg')
+        self.send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        if urlsplit(self.path).path.rstrip('/') == '/bls/timeseries/data':
+            return self.answer(lambda: self.server.replay.bls_data(body))
+        self.send_json(404, {'error': 'not found'})
+
+    def answer(self, build, content_type='application/json'):
+        server = self.server
+        if server.latency:
+            time.sleep(max(0.0, random.gauss(server.latency, server.latency * server.jitter)))
+        with server.lock:
+            server.requests += 1
+        if server.error_rate and random.random() < server.error_rate:
+            return self.send_json(random.choice((429, 503)), {'error': 'injected failure'})
+        if content_type == 'application/json':
+            return self.send_json(200, build())
+        self.send_body(200, build(), content_type)
+
+    def send_json(self, status, payload):
+        self.send_body(status, json.dumps(payload).encode('utf-8'), 'application/json')
+
+    def send_body(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host='127.0.0.1', port=8765, latency=0.0, jitter=0.2, error_rate=0.0):
+    """Build the stand-in server; latency is in seconds."""
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    server.replay = Replay(f'http://{host}:{server.server_address[1]}')
+    server.latency = latency
+    server.jitter = jitter
+    server.error_rate = error_rate
+    server.requests = 0
+    server.lock = threading.Lock()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0, help='mean milliseconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.2, help='latency standard deviation as a fraction of the mean')
+    parser.add_argument('--error-rate', type=float, default=0, help='fraction of responses answered with 429/503')
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.latency / 1000, args.jitter, args.error_rate)
+    print(f"Replaying fixtures on http://{args.host}:{args.port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
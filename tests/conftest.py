@@ -0,0 +1,32 @@
+import os
+import tempfile
+
+import pytest
+
+# Keep the app's on-disk state out of the checkout and away from real upstreams
+_data_dir = tempfile.mkdtemp(prefix='ecopulse-tests-')
+os.environ.update({
+    'SECRET_KEY': 'test',
+    'API_KEY': 'test',
+    'PREFETCH_ENABLED': '0',
+    'SNAPSHOT_PATH': '',
+    'TEMPLATE_CACHE_DIR': '',
+    'SERIES_DB_PATH': os.path.join(_data_dir, 'series.db'),
+    'IMAGE_CACHE_DIR': os.path.join(_data_dir, 'images'),
+})
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import create_app
+    return create_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def api_headers():
+    return {'X-API-Key': 'test'}
@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import time
+
+import httpx
+
+from app import aio
+from app.budget import BACKGROUND, USER, ProviderBudget, current_priority
+from app.cache import CacheEntry, make_key, response_cache
+from app.categories import categories
+from app.routes import NEWS_API_URL, feed_params
+
+NEWS = {"status": "ok", "articles": [{
+    "title": "Markets rally - Reuters", "url": "https://reuters.com/markets-rally", "source": {"name": "Reuters"},
+    "publishedAt": "2024-10-17T13:00:00Z", "description": "Stocks rose.", "content": None, "author": None,
+    "urlToImage": None}]}
+
+
+def test_news_page_is_warmed_without_blocking_the_loop(app, monkeypatch):
+    frontend = aio.create_asgi_app(app)
+    upstream = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json=NEWS)))
+    frontend.client('newsapi').client = upstream
+    threads = {}
+
+    def record(name, func):
+        def wrapper(*args, **kwargs):
+            threads[name] = threading.get_ident()
+            return func(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(aio, 'news_articles', record('decode', aio.news_articles))
+    monkeypatch.setattr(aio, 'feed_ttl', record('categories', aio.feed_ttl))
+    monkeypatch.setattr(aio.response_cache, 'set', record('cache', response_cache.set))
+    key = make_key(NEWS_API_URL, feed_params(categories.get('markets')))
+    response_cache.backend.delete(key)
+
+    async def main():
+        loop_thread = threading.get_ident()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=frontend), base_url='http://test') as client:
+            response = await client.get('/markets')
+        await upstream.aclose()
+        return loop_thread, response
+
+    loop_thread, response = asyncio.run(main())
+    assert response.status_code == 200
+    assert 'Markets rally' in response.text
+    assert set(threads) == {'decode', 'categories', 'cache'}
+    assert loop_thread not in threads.values()
+    response_cache.backend.delete(key)
+
+
+def test_series_store_is_read_off_the_loop(app, monkeypatch):
+    frontend = aio.create_asgi_app(app)
+    calls = []
+
+    def stale_series(store, series_ids):
+        calls.append(threading.get_ident())
+        return []
+
+    monkeypatch.setattr(aio, 'stale_series', stale_series)
+
+    async def main():
+        await frontend.sync_series('fred', ['FEDFUNDS'])
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(main())
+    assert calls and calls[0] != loop_thread
+
+
+def test_wsgi_requests_run_concurrently():
+    from flask import Flask
+    flask_app = Flask(__name__)
+    both_in = threading.Barrier(2, timeout=5)
+
+    @flask_app.route('/wait')
+    def wait():
+        # Passes only if the two requests are inside the handler at once
+        both_in.wait()
+        return 'ok'
+
+    async def main():
+        transport = httpx.ASGITransport(app=aio.ThreadedWsgiToAsgi(flask_app))
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            return await asyncio.gather(client.get('/wait'), client.get('/wait'))
+
+    assert [response.text for response in asyncio.run(main())] == ['ok', 'ok']
+
+
+def test_stale_feed_refresh_follows_the_budget(app, monkeypatch):
+    frontend = aio.create_asgi_app(app)
+    priorities = []
+
+    def answer(request):
+        priorities.append(current_priority())
+        return httpx.Response(200, json=NEWS)
+    upstream = httpx.AsyncClient(transport=httpx.MockTransport(answer))
+    client = frontend.client('newsapi')
+    client.client = upstream
+    budget = ProviderBudget('newsapi', daily=10, reserve=0.2)
+    monkeypatch.setattr(client, 'budget', budget)
+    monkeypatch.setattr(client.sync_client, 'budget', budget)
+    params = feed_params(categories.get('markets'))
+    key = make_key(NEWS_API_URL, params)
+
+    async def warm():
+        response_cache.backend.set(key, CacheEntry([], time.time() - 60, 1))
+        await frontend.warm_news(params, 'markets')
+        await asyncio.gather(*frontend.tasks)
+
+    # Background share spent: the stale feed is refreshed at user priority
+    for _ in range(8):
+        budget.try_acquire(BACKGROUND)
+    asyncio.run(warm())
+    assert priorities == [USER]
+    # Whole quota spent: the stale copy is served without trying
+    budget.try_acquire(USER)
+    budget.try_acquire(USER)
+    asyncio.run(warm())
+    assert priorities == [USER]
+    assert not response_cache.get(key).is_fresh()
+    response_cache.backend.delete(key)
+    asyncio.run(upstream.aclose())
@@ -0,0 +1,97 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.analytics import (Series, apply_transform, json_number, months_before, rolling_mean, rolling_std,
+                           shift_months, zscore)
+from app.store import series_store
+
+
+def monthly(values, start='2020-01'):
+    months = np.arange(np.datetime64(start, 'M'), np.datetime64(start, 'M') + len(values))
+    return Series(months.astype('datetime64[D]'), values)
+
+
+def test_yoy_and_mom():
+    series = monthly([100.0 + i for i in range(24)])
+    yoy = apply_transform(series, 'yoy')
+    assert np.isnan(yoy[:12]).all()
+    assert yoy[12] == pytest.approx(12 / 100 * 100)
+    mom = apply_transform(series, 'mom')
+    assert np.isnan(mom[0])
+    assert mom[1] == pytest.approx(1.0)
+
+
+def test_missing_values_are_nan():
+    series = Series.from_rows([('2020-01-01', 1.0), ('2020-02-01', '.'), ('2020-03-01', None)])
+    assert np.isnan(series.values[1:]).all()
+
+
+def test_shift_months_clamps_to_month_end():
+    dates = np.array(['2021-03-31', '2020-03-31'], dtype='datetime64[D]')
+    assert [str(d) for d in shift_months(dates, -1)] == ['2021-02-28', '2020-02-29']
+    assert months_before('2024-01-15', 12) == '2023-01-15'
+
+
+def test_rolling_mean_and_std():
+    series = monthly([1.0, 2.0, 3.0, 4.0, np.nan, 6.0])
+    mean = rolling_mean(series, 3)
+    assert np.isnan(mean[:2]).all()
+    assert list(mean[2:4]) == [2.0, 3.0]
+    assert np.isnan(mean[4:]).all()
+    assert rolling_std(series, 3)[2] == pytest.approx(1.0)
+
+
+def test_zscore_uses_whole_series():
+    series = monthly([1.0, 2.0, 3.0, np.nan, 5.0])
+    scores = zscore(series)
+    values = np.array([1.0, 2.0, 3.0, 5.0])
+    assert scores[4] == pytest.approx((5.0 - values.mean()) / values.std(ddof=1))
+    assert np.isnan(scores[3])
+    assert (zscore(monthly([2.0, 2.0])) == 0).all()
+
+
+def test_json_number():
+    assert json_number(np.float64(1.23456)) == 1.2346
+    assert json_number(np.nan) is None
+    assert json_number(math.inf) is None
+
+
+@pytest.fixture
+def stored_series():
+    rows = [(f"{2000 + i // 12}-{i % 12 + 1:02d}-01", float((i * 7) % 31), None) for i in range(120)]
+    series_store.upsert('ZTEST', 'fred', rows)
+    return rows
+
+
+def zscores(client, api_headers, **params):
+    response = client.get('/interest-rates', query_string={'series': 'ZTEST', 'transform': 'zscore', **params},
+                          headers=api_headers)
+    assert response.status_code == 200
+    body = response.get_json()
+    return {row['date']: row['value'] for row in body['interest_rates']}, body.get('next_cursor')
+
+
+def test_zscore_route_scores_against_the_stored_series(client, api_headers, stored_series):
+    latest, _ = zscores(client, api_headers)
+    assert len(latest) == 10
+    values = np.array([row[1] for row in stored_series])
+    expected = (values[-1] - values.mean()) / values.std(ddof=1)
+    assert latest[stored_series[-1][0]] == pytest.approx(expected, abs=1e-4)
+
+
+def test_zscore_route_does_not_depend_on_page_size(client, api_headers, stored_series):
+    whole, _ = zscores(client, api_headers, start='2001-01-01', end='2008-12-01')
+    paged = {}
+    cursor = None
+    while True:
+        params = {'start': '2001-01-01', 'end': '2008-12-01', 'page_size': 7}
+        if cursor:
+            params['cursor'] = cursor
+        page, cursor = zscores(client, api_headers, **params)
+        paged.update(page)
+        if cursor is None:
+            break
+    assert paged == whole
+    assert len(whole) == 96
@@ -0,0 +1,53 @@
+from app.articles import ArticlePool, canonical_url, title_fingerprint
+
+
+def item(title, url, published_at, source='CNBC', description='desc'):
+    return {"title": title, "url": url, "publishedAt": published_at, "source": {"name": source},
+            "description": description, "content": None, "author": None, "urlToImage": None}
+
+
+def test_recurring_headline_on_another_day_is_a_new_article():
+    pool = ArticlePool()
+    title = "Stock market today: Dow, S&P 500 live updates - CNBC"
+    first, = pool.ingest([item(title, "https://www.cnbc.com/2024/10/17/stock-market-today.html",
+                               "2024-10-17T13:00:00Z")])
+    second, = pool.ingest([item(title, "https://www.cnbc.com/2024/10/18/stock-market-today.html",
+                                "2024-10-18T13:30:00Z", description='new')])
+    assert second is not first
+    assert second.url.endswith("/2024/10/18/stock-market-today.html")
+    assert second.published_at == "2024-10-18T13:30:00Z"
+    assert len(pool) == 2
+
+
+def test_syndicated_copy_resolves_to_pooled_article():
+    pool = ArticlePool()
+    first, = pool.ingest([item("Fed holds rates steady - Reuters", "https://reuters.com/a",
+                               "2024-10-17T13:00:00Z", source='Reuters')])
+    copy, = pool.ingest([item("Fed holds rates steady - Yahoo Finance", "https://finance.yahoo.com/b",
+                              "2024-10-17T15:00:00Z", source='Yahoo Finance')])
+    assert copy is first
+    assert len(pool) == 1
+
+
+def test_tracked_link_resolves_to_pooled_article():
+    pool = ArticlePool()
+    first, = pool.ingest([item("One", "https://www.example.com/story/", "2024-10-17T13:00:00Z")])
+    again, = pool.ingest([item("One", "http://example.com/story?utm_source=x&fbclid=1", None)])
+    assert again is first
+    assert canonical_url("http://www.example.com/story/?utm_medium=a") == "https://example.com/story"
+
+
+def test_only_the_source_suffix_is_ignored():
+    assert title_fingerprint("Rates rise - CNBC", "CNBC") == title_fingerprint("Rates rise", "Reuters")
+    assert (title_fingerprint("Rates rise - live updates", "CNBC")
+            != title_fingerprint("Rates rise - what it means", "CNBC"))
+
+
+def test_ingest_drops_duplicates_within_a_response():
+    pool = ArticlePool()
+    articles = pool.ingest([
+        item("Same story - CNBC", "https://cnbc.com/a", "2024-10-17T13:00:00Z"),
+        item("Same story - CNBC", "https://cnbc.com/a?utm_campaign=x", "2024-10-17T13:00:00Z"),
+        item("[Removed]", "https://removed.com", None),
+    ])
+    assert len(articles) == 1
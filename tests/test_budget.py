@@ -0,0 +1,86 @@
+import threading
+import time
+
+from app import budget as budget_module
+from app.budget import BACKGROUND, USER, ProviderBudget, background, current_priority
+from app.cache import CacheEntry, ResponseCache
+from app.prefetch import prefetch_interval
+
+
+def test_window_limit_allows_a_full_burst():
+    budget = ProviderBudget('fred', rate=120, window=60)
+    assert all(budget.try_acquire() == 0 for _ in range(120))
+    assert budget.try_acquire() > 0
+
+
+def test_user_requests_are_served_before_background():
+    budget = ProviderBudget('test', rate=1, window=0.2)
+    assert budget.acquire()
+    order = []
+
+    def wait(priority, name):
+        if budget.acquire(priority, timeout=5):
+            order.append(name)
+
+    threads = [threading.Thread(target=wait, args=(BACKGROUND, 'background'))]
+    threads[0].start()
+    time.sleep(0.05)
+    threads.append(threading.Thread(target=wait, args=(USER, 'user')))
+    threads[1].start()
+    for thread in threads:
+        thread.join()
+    assert order == ['user', 'background']
+
+
+def test_background_work_leaves_the_user_reserve():
+    budget = ProviderBudget('test', daily=10, reserve=0.2)
+    assert [budget.try_acquire(BACKGROUND) for _ in range(8)] == [0] * 8
+    assert budget.try_acquire(BACKGROUND) is None
+    assert not budget.available(BACKGROUND)
+    assert budget.acquire(USER) and budget.acquire(USER)
+    assert not budget.acquire(USER, timeout=0.1)
+    assert budget.snapshot()['remaining_24h'] == 0
+
+
+def test_stale_refresh_draws_on_user_reserve(monkeypatch):
+    budget = ProviderBudget('testprovider', daily=10, reserve=0.2)
+    monkeypatch.setitem(budget_module.budgets, 'testprovider', budget)
+    for _ in range(8):
+        budget.try_acquire(BACKGROUND)
+    cache = ResponseCache(name='testprovider')
+    cache.backend.set('feed', CacheEntry('old', time.time() - 60, 1))
+    priorities = []
+
+    def fetch():
+        priorities.append(current_priority())
+        return 'new'
+
+    assert cache.get_or_fetch('feed', fetch) == 'old'
+    deadline = time.time() + 5
+    while cache.get('feed').value != 'new' and time.time() < deadline:
+        time.sleep(0.01)
+    assert priorities == [USER]
+
+
+def test_no_refresh_once_quota_is_spent(monkeypatch):
+    budget = ProviderBudget('testprovider', daily=1, reserve=0)
+    monkeypatch.setitem(budget_module.budgets, 'testprovider', budget)
+    budget.try_acquire()
+    cache = ResponseCache(name='testprovider')
+    assert not cache.refresh_in_background('feed', lambda: 'new')
+
+
+def test_background_context():
+    assert current_priority() == USER
+    with background():
+        assert current_priority() == BACKGROUND
+    assert current_priority() == USER
+
+
+def test_prefetch_interval_fits_background_share():
+    budget = ProviderBudget('newsapi', rate=1, daily=100, reserve=0.2)
+    # 80 background calls a day shared by 6 feeds
+    assert prefetch_interval(6, budget) == 6480
+    assert prefetch_interval(6, budget, configured=900) == 6480
+    assert prefetch_interval(6, budget, configured=10000) == 10000
+    assert prefetch_interval(6, ProviderBudget('fred', rate=120, window=60)) == 900
@@ -0,0 +1,41 @@
+import time
+
+from app.cache import CacheEntry, ResponseCache, SqliteBackend
+
+
+def test_cold_miss_fetches_and_stale_hit_serves_old_value():
+    cache = ResponseCache(name='test')
+    assert cache.get_or_fetch('k', lambda: 'first') == 'first'
+    assert cache.get_or_fetch('k', lambda: 'unused') == 'first'
+    cache.backend.set('k', CacheEntry('old', time.time() - 60, 1))
+    assert cache.get_or_fetch('k', lambda: 'new') == 'old'
+    deadline = time.time() + 5
+    while cache.get('k').value != 'new' and time.time() < deadline:
+        time.sleep(0.01)
+    assert cache.get('k').value == 'new'
+
+
+def test_refresh_skips_entry_another_worker_just_stored(tmp_path):
+    # Two caches over one file stand in for two gunicorn workers
+    path = str(tmp_path / 'shared.db')
+    first, second = ResponseCache(SqliteBackend(path), name='test'), ResponseCache(SqliteBackend(path), name='test')
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return ['articles']
+
+    first.refresh('feed', fetch, ttl=600, max_age=60)
+    assert second.refresh('feed', fetch, ttl=600, max_age=60) == ['articles']
+    assert len(calls) == 1
+    second.refresh('feed', fetch, ttl=600, max_age=0)
+    assert len(calls) == 2
+
+
+def test_sqlite_backend_evicts_past_max_entries(tmp_path):
+    backend = SqliteBackend(str(tmp_path / 'cache.db'), max_entries=2, policy='fifo')
+    for i, key in enumerate(('a', 'b', 'c')):
+        backend.set(key, CacheEntry(key, time.time() + i, 60))
+    assert len(backend) == 2
+    assert backend.get('a') is None
+    assert backend.get('c').value == 'c'
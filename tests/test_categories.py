@@ -0,0 +1,62 @@
+import json
+import os
+import time
+
+import pytest
+
+from app.categories import RESERVED_SLUGS, CategoryRegistry, parse_categories
+
+HOME = {"title": "Home", "query": "economy"}
+
+
+def test_parse_categories():
+    categories = parse_categories({"home": HOME, "real-estate": {"title": "Real Estate", "query": "housing",
+                                                                 "days": 3, "ttl": 60}})
+    assert categories["real-estate"].days == 3
+    assert categories["real-estate"].nav_title == "Real Estate"
+
+
+@pytest.mark.parametrize('settings, message', [
+    ({"markets": {"title": "Markets", "query": "stocks"}}, "'home'"),
+    ({"home": HOME, "markets": {"title": "Markets"}}, "needs a title and a query"),
+    ({"home": HOME, "markets": {"title": "Markets", "query": "q", "days": 0}}, "days"),
+    ({"home": HOME, "markets": {"title": "Markets", "query": "q", "colour": "red"}}, "colour"),
+])
+def test_invalid_categories(settings, message):
+    with pytest.raises(ValueError, match=message):
+        parse_categories(settings)
+
+
+@pytest.mark.parametrize('slug', ['search', 'metrics', 'img', 'budget', 'inflation', 'static'])
+def test_reserved_slugs_are_rejected(slug):
+    with pytest.raises(ValueError, match='taken by another route'):
+        parse_categories({"home": HOME, slug: {"title": "X", "query": "x"}})
+
+
+@pytest.mark.parametrize('slug', ['a/b', 'a?b', 'Markets', 'real estate', '-tech', 'tech-', ''])
+def test_unsafe_slugs_are_rejected(slug):
+    with pytest.raises(ValueError, match='slugs are'):
+        parse_categories({"home": HOME, slug: {"title": "X", "query": "x"}})
+
+
+def test_reserved_slugs_cover_every_route(app):
+    segments = {rule.rule.strip('/').split('/')[0] for rule in app.url_map.iter_rules()}
+    segments -= {'', '<slug>'}
+    assert segments <= RESERVED_SLUGS
+
+
+def test_registry_keeps_last_good_categories(tmp_path):
+    path = tmp_path / 'categories.json'
+    path.write_text(json.dumps({"home": HOME}))
+    registry = CategoryRegistry(str(path), reload_interval=0)
+    reloads = []
+    registry.on_reload(lambda: reloads.append(1))
+
+    path.write_text(json.dumps({"home": HOME, "search": {"title": "Search", "query": "x"}}))
+    os.utime(path, (time.time() + 1, time.time() + 1))
+    assert [category.slug for category in registry.all()] == ['home']
+
+    path.write_text(json.dumps({"home": HOME, "tech": {"title": "Tech", "query": "technology"}}))
+    os.utime(path, (time.time() + 2, time.time() + 2))
+    assert [category.slug for category in registry.pages()] == ['tech']
+    assert reloads == [1]
@@ -0,0 +1,85 @@
+import pytest
+
+from app import http_cache
+from app.articles import normalize
+from app.cache import make_key, response_cache
+from app.categories import categories
+from app.http_cache import page_cache
+from app.routes import NEWS_API_URL, feed_params
+from app.store import series_store
+
+
+def markets_articles(title):
+    return normalize([{"title": title, "url": f"https://example.com/{abs(hash(title))}",
+                       "source": {"name": "Reuters"}, "publishedAt": "2024-10-17T13:00:00Z",
+                       "description": "Stocks moved."}])
+
+
+@pytest.fixture
+def markets_feed():
+    key = make_key(NEWS_API_URL, feed_params(categories.get('markets')))
+    page_cache.clear()
+
+    def show(title):
+        response_cache.set(key, markets_articles(title), 600)
+    show('Stocks rally on rate cut hopes')
+    yield show
+    response_cache.backend.delete(key)
+    page_cache.clear()
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    rendered = []
+
+    def render_template(template, **context):
+        rendered.append(template)
+        return real(template, **context)
+    real = http_cache.render_template
+    monkeypatch.setattr(http_cache, 'render_template', render_template)
+    return rendered
+
+
+def test_page_is_rendered_once_per_article_set(client, markets_feed, renders):
+    first = client.get('/markets')
+    second = client.get('/markets')
+    assert first.status_code == second.status_code == 200
+    assert b'Stocks rally on rate cut hopes' in first.data
+    assert renders == ['category.html']
+    assert first.headers['ETag'] == second.headers['ETag']
+    assert first.headers['Last-Modified'] == second.headers['Last-Modified']
+    assert first.headers['Cache-Control'].startswith('public')
+
+    markets_feed('Bonds slide as yields jump')
+    changed = client.get('/markets')
+    assert b'Bonds slide as yields jump' in changed.data
+    assert changed.headers['ETag'] != first.headers['ETag']
+    assert renders == ['category.html', 'category.html']
+
+
+def test_page_revalidates_to_304(client, markets_feed):
+    page = client.get('/markets')
+    by_etag = client.get('/markets', headers={'If-None-Match': page.headers['ETag']})
+    assert by_etag.status_code == 304 and by_etag.data == b''
+    by_date = client.get('/markets', headers={'If-Modified-Since': page.headers['Last-Modified']})
+    assert by_date.status_code == 304
+    assert client.get('/markets', headers={'If-None-Match': '"other"'}).status_code == 200
+
+
+def test_json_revalidates_to_304_until_the_data_changes(client, api_headers):
+    series_store.upsert('HTTPTEST', 'fred', [('2024-01-01', 5.0, None), ('2024-02-01', 5.25, None)])
+    path = '/interest-rates?series=HTTPTEST'
+    first = client.get(path, headers=api_headers)
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+    assert client.get(path, headers=api_headers).headers['ETag'] == first.headers['ETag']
+
+    by_etag = client.get(path, headers={**api_headers, 'If-None-Match': first.headers['ETag']})
+    assert by_etag.status_code == 304 and by_etag.data == b''
+    by_date = client.get(path, headers={**api_headers, 'If-Modified-Since': first.headers['Last-Modified']})
+    assert by_date.status_code == 304
+
+    series_store.upsert('HTTPTEST', 'fred', [('2024-03-01', 5.5, None)])
+    changed = client.get(path, headers={**api_headers, 'If-None-Match': first.headers['ETag']})
+    assert changed.status_code == 200
+    assert changed.json['interest_rates'][0]['date'] == '2024-03-01'
@@ -0,0 +1,130 @@
+import io
+import socket
+
+import pytest
+import requests
+from PIL import Image
+
+from app import images
+
+
+def png(width, height):
+    out = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 40, 40)).save(out, 'PNG')
+    return out.getvalue()
+
+
+def test_img_with_default_cache_dir(app, client, monkeypatch, tmp_path):
+    # The default IMAGE_CACHE_DIR is relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(images, 'disk_cache', images.DiskCache(images.os.path.join('data', 'images'), 1024 * 1024))
+    monkeypatch.setattr(images, 'download', lambda url: png(1200, 900))
+    url = 'https://example.com/photo.jpg'
+    with app.test_request_context():
+        path = images.proxied_image(url)
+
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.mimetype == 'image/webp'
+    assert Image.open(io.BytesIO(response.data)).size == (400, 200)
+    assert (tmp_path / 'data' / 'images').is_dir()
+
+    cached = client.get(path, headers={'If-None-Match': response.headers['ETag']})
+    assert cached.status_code == 304
+
+
+def test_img_rejects_bad_signature(client):
+    response = client.get('/img', query_string={'url': 'https://example.com/a.jpg', 'w': 400, 'sig': 'forged'})
+    assert response.status_code == 403
+
+
+def test_img_rejects_unknown_width(app, client):
+    url = 'https://example.com/a.jpg'
+    with app.test_request_context():
+        sig = images.sign(url, 123)
+    response = client.get('/img', query_string={'url': url, 'w': 123, 'sig': sig})
+    assert response.status_code == 403
+
+
+def test_img_falls_back_to_default_image(app, client, monkeypatch, tmp_path):
+    monkeypatch.setattr(images, 'disk_cache', images.DiskCache(str(tmp_path), 1024 * 1024))
+    monkeypatch.setattr(images, 'download', lambda url: b'not an image')
+    url = 'https://example.com/broken.jpg'
+    with app.test_request_context():
+        path = images.proxied_image(url)
+    response = client.get(path)
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('default-news.svg')
+
+
+ADDRESSES = {'news.example': '93.184.216.34', 'cdn.example': '151.101.1.1', 'metadata.example': '169.254.169.254',
+             'intranet.example': '10.0.0.8', 'localhost': '127.0.0.1'}
+
+
+def answer(status, body=b'', location=None):
+    response = requests.Response()
+    response.status_code = status
+    response.raw = io.BytesIO(body)
+    if location:
+        response.headers['Location'] = location
+    return response
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Route the proxy's session to canned answers per URL, and resolve the hosts above."""
+    answers = {}
+    fetched = []
+
+    def get(url, **kwargs):
+        assert kwargs['allow_redirects'] is False
+        fetched.append(url)
+        return answers[url]()
+
+    def getaddrinfo(host, port, **kwargs):
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (ADDRESSES[host], port or 80))]
+
+    monkeypatch.setattr(images.session, 'get', get)
+    monkeypatch.setattr(images.socket, 'getaddrinfo', getaddrinfo)
+    monkeypatch.setattr(images, 'IMAGE_ALLOW_PRIVATE', False)
+    return answers, fetched
+
+
+def test_download_follows_public_redirects(upstream):
+    answers, fetched = upstream
+    answers['https://news.example/a.jpg'] = lambda: answer(301, location='//cdn.example/a.jpg')
+    answers['https://cdn.example/a.jpg'] = lambda: answer(200, b'image')
+    assert images.download('https://news.example/a.jpg') == b'image'
+    assert fetched == ['https://news.example/a.jpg', 'https://cdn.example/a.jpg']
+
+
+@pytest.mark.parametrize('location', ['http://metadata.example/latest/meta-data', 'http://localhost:8080/admin',
+                                      'http://intranet.example/x.jpg', 'file:///etc/passwd'])
+def test_download_refuses_redirects_into_private_networks(upstream, location):
+    answers, fetched = upstream
+    answers['https://news.example/a.jpg'] = lambda: answer(302, location=location)
+    with pytest.raises(images.ImageFetchError):
+        images.download('https://news.example/a.jpg')
+    assert fetched == ['https://news.example/a.jpg']
+
+
+def test_download_refuses_private_sources(upstream):
+    answers, fetched = upstream
+    with pytest.raises(images.ImageFetchError, match='non-public'):
+        images.download('http://intranet.example/a.jpg')
+    assert fetched == []
+
+
+def test_download_limits_redirects(upstream):
+    answers, fetched = upstream
+    answers['https://news.example/a.jpg'] = lambda: answer(302, location='/a.jpg')
+    with pytest.raises(images.ImageFetchError, match='redirected'):
+        images.download('https://news.example/a.jpg')
+    assert len(fetched) == images.IMAGE_MAX_REDIRECTS + 1
+
+
+def test_private_sources_can_be_allowed(upstream, monkeypatch):
+    answers, fetched = upstream
+    monkeypatch.setattr(images, 'IMAGE_ALLOW_PRIVATE', True)
+    answers['http://localhost:8080/a.jpg'] = lambda: answer(200, b'image')
+    assert images.download('http://localhost:8080/a.jpg') == b'image'
@@ -0,0 +1,33 @@
+from app.metrics import BUCKETS, MetricsRegistry
+
+
+def bucket_bounds(text, name, **labels):
+    selector = ''.join(f'{key}="{value}",' for key, value in sorted(labels.items()))
+    prefix = f'{name}_bucket{{{selector}le="'
+    return [line[len(prefix):line.index('"', len(prefix))] for line in text.splitlines() if line.startswith(prefix)]
+
+
+def test_histogram_buckets_are_in_increasing_le_order():
+    registry = MetricsRegistry()
+    for endpoint in ('b', 'a'):
+        for value in (0.002, 0.3, 4.0, 20.0):
+            registry.observe('ecopulse_request_seconds', value, endpoint=endpoint)
+    text = registry.render()
+    for endpoint in ('a', 'b'):
+        bounds = bucket_bounds(text, 'ecopulse_request_seconds', endpoint=endpoint)
+        assert bounds == [str(bound) for bound in BUCKETS] + ['+Inf']
+    lines = text.splitlines()
+    assert lines.index('ecopulse_request_seconds_count{endpoint="a"} 4') < lines.index(
+        'ecopulse_request_seconds_bucket{endpoint="b",le="0.001"} 0')
+    assert 'ecopulse_request_seconds_bucket{endpoint="a",le="+Inf"} 4' in lines
+
+
+def test_counters_and_gauges():
+    registry = MetricsRegistry()
+    registry.inc('ecopulse_upstream_requests_total', provider='fred', status=200)
+    registry.inc('ecopulse_upstream_requests_total', provider='fred', status='error')
+    registry.gauge('ecopulse_cache_entries', lambda: 3, cache='newsapi')
+    text = registry.render()
+    assert '# TYPE ecopulse_upstream_requests_total counter' in text
+    assert 'ecopulse_upstream_requests_total{provider="fred",status="200"} 1' in text
+    assert 'ecopulse_cache_entries{cache="newsapi"} 3' in text
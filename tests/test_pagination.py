@@ -0,0 +1,62 @@
+import pytest
+
+from app.pagination import decode_cursor, encode_cursor, list_page
+from app.store import series_store
+
+
+def test_cursor_round_trip():
+    token = encode_cursor({"before": "2024-01-01", "series": 2}, 'jobs_data')
+    assert '=' not in token
+    assert decode_cursor(token, 'jobs_data', ('before', 'series')) == {"before": "2024-01-01", "series": 2}
+    assert encode_cursor(None, 'jobs_data') is None
+
+
+@pytest.mark.parametrize('token', ['not-base64!', 'W10', encode_cursor({"before": "yesterday"}, 'x'),
+                                   encode_cursor({"offset": -1}, 'x'), encode_cursor({"series": "1"}, 'x')])
+def test_invalid_cursors(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token, 'x')
+
+
+def test_cursor_from_another_listing_is_rejected():
+    with pytest.raises(ValueError, match='not from this endpoint'):
+        decode_cursor(encode_cursor({"offset": 10}, 'economic_news'), 'jobs_data', ('before', 'series'))
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        decode_cursor(encode_cursor({"before": "2024-01-01"}, 'jobs_data'), 'jobs_data', ('before', 'series'))
+
+
+def test_list_page():
+    items = list(range(5))
+    page, position = list_page(items, 2, None)
+    assert page == [0, 1] and position == {"offset": 2}
+    page, position = list_page(items, 2, {"offset": 4})
+    assert page == [4] and position is None
+
+
+@pytest.mark.parametrize('path, position, kind', [
+    ('/jobs-report', {"offset": 10}, 'economic_news'),
+    ('/economic-news', {"before": "2024-01-01"}, 'interest_rates'),
+    ('/inflation', {"before": "2024-01-01"}, 'interest_rates'),
+])
+def test_route_rejects_cursor_from_another_route(client, api_headers, path, position, kind):
+    response = client.get(path, query_string={'cursor': encode_cursor(position, kind)}, headers=api_headers)
+    assert response.status_code == 400
+
+
+def test_series_pages_follow_next_cursor(client, api_headers):
+    rows = [(f"2010-{month:02d}-01", float(month), None) for month in range(1, 13)]
+    series_store.upsert('PAGETEST', 'fred', rows)
+    dates = []
+    params = {'series': 'PAGETEST', 'start': '2010-01-01', 'page_size': 5}
+    while True:
+        body = client.get('/interest-rates', query_string=params, headers=api_headers).get_json()
+        dates.extend(row['date'] for row in body['interest_rates'])
+        if body['next_cursor'] is None:
+            break
+        params['cursor'] = body['next_cursor']
+    assert dates == [row[0] for row in reversed(rows)]
+
+    stream = client.get('/interest-rates', query_string={'series': 'PAGETEST', 'start': '2010-01-01',
+                                                         'format': 'ndjson'}, headers=api_headers)
+    assert stream.mimetype == 'application/x-ndjson'
+    assert len(stream.data.splitlines()) == 12
@@ -0,0 +1,41 @@
+import json
+import os
+
+from flask import Flask
+
+from app import categories as categories_module, prefetch
+from app.budget import ProviderBudget
+from app.categories import CategoryRegistry
+
+
+def write_categories(path, slugs):
+    settings = {slug: {"title": slug.title(), "query": slug} for slug in ['home', *slugs]}
+    path.write_text(json.dumps(settings))
+    # Make sure the registry sees a new mtime even on coarse-grained filesystems
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 1))
+
+
+def test_interval_follows_category_reloads(tmp_path, monkeypatch):
+    path = tmp_path / 'categories.json'
+    write_categories(path, ['markets'])
+    registry = CategoryRegistry(str(path), reload_interval=0)
+    monkeypatch.setattr(categories_module, 'categories', registry)
+    monkeypatch.setitem(prefetch.provider_budgets, 'newsapi', ProviderBudget('newsapi', daily=100, reserve=0.2))
+    monkeypatch.setenv('NEWS_API_KEY', 'test')
+    monkeypatch.setenv('PREFETCH_ENABLED', '1')
+    monkeypatch.delenv('PREFETCH_INTERVAL', raising=False)
+    fetched = []
+    monkeypatch.setattr('app.routes.prefetch_feed', lambda category, min_ttl, max_age: fetched.append(
+        (category.slug, min_ttl, max_age)))
+    monkeypatch.setattr(prefetch.PrefetchScheduler, 'start', lambda self: None)
+
+    scheduler = prefetch.init_prefetch(Flask(__name__))
+    # 2 feeds within the 80 calls a day left for background work
+    assert scheduler.interval == 2160
+    write_categories(path, ['markets', 'stocks', 'crypto', 'housing'])
+    scheduler.run_once()
+    assert scheduler.interval == 5400
+    assert sorted(slug for slug, _, _ in fetched) == ['crypto', 'home', 'housing', 'markets', 'stocks']
+    scheduler.run_once()
+    assert fetched[-1][1:] == (10800, 4860.0)
@@ -0,0 +1,96 @@
+import pytest
+import requests
+
+from app import routes, store
+from app.articles import normalize
+from app.search import SearchIndex
+from app.upstream import CircuitOpenError, UpstreamError
+
+
+@pytest.fixture
+def indexed(monkeypatch):
+    index = SearchIndex()
+    for article in normalize([{"title": "Treasury yields climb on inflation data", "url": "https://example.com/yields",
+                               "source": {"name": "Reuters"}, "publishedAt": "2024-10-17T13:00:00Z"}]):
+        index.add(article)
+    monkeypatch.setattr(routes, 'search_index', index)
+    return index
+
+
+@pytest.mark.parametrize('error', [
+    UpstreamError(503),
+    CircuitOpenError('Circuit open for newsapi'),
+    requests.exceptions.ConnectTimeout('timed out'),
+    requests.exceptions.ConnectionError('connection reset'),
+])
+def test_failing_news_falls_back_to_indexed_articles(indexed, monkeypatch, error):
+    def fail(path, **kwargs):
+        raise error
+    monkeypatch.setattr(routes.get_client('newsapi'), 'get', fail)
+    params = routes.news_params(f"treasury yields {type(error).__name__}", 3)
+    articles = routes.fetch_news(params, 'economic-news')
+    assert [article.url for article in articles] == ['https://example.com/yields']
+
+
+def test_failing_news_without_matches_raises(indexed, monkeypatch):
+    def fail(path, **kwargs):
+        raise requests.exceptions.ReadTimeout('timed out')
+    monkeypatch.setattr(routes.get_client('newsapi'), 'get', fail)
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        routes.fetch_news(routes.news_params('unmatched zebra query', 3), 'economic-news')
+
+
+def test_batch_chunks_bls_series_at_the_request_limit(client, api_headers, monkeypatch):
+    monkeypatch.delenv('BLS_API_KEY', raising=False)
+    chunks = []
+
+    def fetch(series_ids, start_year, end_year):
+        chunks.append(len(series_ids))
+        # The last series has no data upstream
+        return {series_id: [{"year": "2024", "period": "M01", "value": "1.5", "footnotes": []}]
+                for series_id in series_ids if series_id != 'BATCHBLS59'}
+    monkeypatch.setattr(store, 'fetch_bls_series', fetch)
+    bls_ids = [f"BATCHBLS{i}" for i in range(60)]
+
+    response = client.get(f"/economic-data/batch?bls={','.join(bls_ids)}", headers=api_headers)
+    assert response.status_code == 200
+    assert sorted(chunks) == [10, 25, 25]
+    assert len(response.json['series']) == 59
+    assert response.json['series']['BATCHBLS0']['provider'] == 'bls'
+    assert response.json['errors'] == {'BATCHBLS59': 'No data returned'}
+
+
+def test_batch_reports_errors_per_series(client, api_headers, monkeypatch):
+    def fetch(series_id, **params):
+        if series_id == 'BATCHFAIL':
+            raise UpstreamError(500, 'FRED is down')
+        return [{"date": "2024-01-01", "value": "4.5"}]
+    monkeypatch.setattr(store, 'fetch_fred_observations', fetch)
+
+    response = client.get('/economic-data/batch?fred=BATCHOK,BATCHFAIL', headers=api_headers)
+    assert response.status_code == 200
+    assert list(response.json['series']) == ['BATCHOK']
+    assert response.json['series']['BATCHOK']['observations'][0]['value'] == 4.5
+    assert response.json['errors'] == {'BATCHFAIL': 'FRED is down'}
+
+
+def test_batch_caps_the_number_of_series(client, api_headers):
+    ids = ','.join(f"S{i}" for i in range(routes.BATCH_MAX_SERIES + 1))
+    response = client.get(f"/economic-data/batch?fred={ids}", headers=api_headers)
+    assert response.status_code == 400
+    assert str(routes.BATCH_MAX_SERIES) in response.json['error']
+    assert client.get('/economic-data/batch', headers=api_headers).status_code == 400
+
+
+@pytest.mark.parametrize('path, message', [
+    ('/search?q=fed&limit=x', 'limit must be a non-negative integer'),
+    ('/search?q=fed&limit=-1', 'limit must be a non-negative integer'),
+    ('/interest-rates?limit=ten', 'limit must be a non-negative integer'),
+    ('/economic-data/batch?fred=FEDFUNDS&limit=1.5', 'limit must be a non-negative integer'),
+    ('/interest-rates?transform=rolling_mean&window=x', 'window must be a positive integer'),
+    ('/inflation?window=0', 'window must be a positive integer'),
+])
+def test_malformed_numbers_are_rejected(client, api_headers, path, message):
+    response = client.get(path, headers=api_headers)
+    assert response.status_code == 400
+    assert response.json['error'] == message
@@ -0,0 +1,51 @@
+import pytest
+
+from app.sanitize import MAX_LENGTH, clean_many, clean_text
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('<p>Fed <b>holds</b> rates</p>', 'Fed holds rates'),
+    ('Stocks<script type="text/javascript">alert(1)</script> rally', 'Stocks rally'),
+    ('<STYLE>p {color: red}</STYLE>Markets', 'Markets'),
+    ('AT&amp;T &lt;3 &#8364;5 &#x41;', 'AT&T <3 €5 A'),
+    ('click javascript:alert(1) or VBScript:x', 'click alert(1) or x'),
+    ('window.open(url)', '(url)'),
+    ('Rates rose sharply… [+1234 chars]', 'Rates rose sharply'),
+    ('Rates rose sharply... [+12 chars]', 'Rates rose sharply'),
+    ('Line one\r\n\tline two', 'Line one line two'),
+    ('S&P500; futures slide', 'S&P500; futures slide'),
+    ('Use &foo; here', 'Use &foo; here'),
+])
+def test_clean_text(text, expected):
+    assert clean_text(text) == expected
+
+
+@pytest.mark.parametrize('text', [
+    'jjavascript:avascript:alert(1)',
+    'javajavascript:script:alert(1)',
+    '&#106;avascript:alert(1)',
+    '&#x6A;avascript:alert(1)',
+    'jav&#97;script:alert(1)',
+    '&amp;#106;avascript:alert(1)',
+    'wwindow.openindow.open(url)',
+    '&lt;script&gt;alert(1)&lt;/script&gt;',
+    '<<b>script>alert(1)',
+])
+def test_neutralizing_cannot_be_reassembled(text):
+    cleaned = clean_text(text)
+    assert 'javascript:' not in cleaned.lower()
+    assert 'window.open' not in cleaned
+    assert '<script' not in cleaned.lower()
+    assert clean_text(cleaned) == cleaned
+
+
+def test_truncates_long_text():
+    cleaned = clean_text('x' * (MAX_LENGTH + 1))
+    assert cleaned == 'x' * MAX_LENGTH + '...'
+    assert clean_text('x' * MAX_LENGTH) == 'x' * MAX_LENGTH
+
+
+def test_empty_and_non_text():
+    assert clean_text(None) == ''
+    assert clean_text(42) == ''
+    assert clean_many(['<i>a</i>', None, '']) == ['a', '', '']
@@ -0,0 +1,87 @@
+import pytest
+
+from app.articles import normalize
+from app.search import SearchIndex, date_number, stem, tokenize
+
+TOPICS = ['inflation', 'payrolls', 'treasury', 'housing', 'earnings', 'oil']
+
+
+def articles(count, offset=0):
+    return normalize([{
+        "title": f"Story {i} on {TOPICS[i % len(TOPICS)]} markets",
+        "description": f"Analysts weigh {TOPICS[(i * 7) % len(TOPICS)]} and {TOPICS[(i * 5) % len(TOPICS)]}.",
+        "url": f"https://example.com/story-{i}",
+        "source": {"name": ['Reuters', 'Bloomberg', 'CNBC'][i % 3]},
+        "publishedAt": f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}T12:00:00Z",
+    } for i in range(offset, offset + count)])
+
+
+def urls(results):
+    return [article.url for _, article in results]
+
+
+def test_tokenize_stems_and_drops_stopwords():
+    assert tokenize("The Fed's rates are rising") == ['fed', 'rat', 'ris']
+    assert stem('rallies') == stem('rallied') == 'rally'
+    assert date_number('2024-03-05T10:00:00Z') == 20240305
+    assert date_number('soon') == 0
+
+
+def test_title_matches_rank_above_body_matches():
+    index = SearchIndex()
+    body, title = normalize([
+        {"title": "Stocks close higher", "description": "Inflation cooled in March.",
+         "url": "https://example.com/body"},
+        {"title": "Inflation cools in March", "description": "Stocks closed higher.",
+         "url": "https://example.com/title"},
+    ])
+    index.add(body)
+    index.add(title)
+    assert urls(index.search('inflation')) == ['https://example.com/title', 'https://example.com/body']
+    assert not index.add(title)
+    assert index.search('') == [] and index.search('zebra') == []
+
+
+def test_source_and_date_filters():
+    index = SearchIndex()
+    for article in articles(60):
+        index.add(article)
+    reuters = index.search('markets', limit=100, sources={'reuters'})
+    assert reuters and {article.source for _, article in reuters} == {'Reuters'}
+    assert index.search('markets', sources={'unknown'}) == []
+    spring = index.search('markets', limit=100, start='2024-03-01', end='2024-05-31')
+    assert spring and all('2024-03-01' <= article.published_at[:10] <= '2024-05-31' for _, article in spring)
+    assert len(index.search('markets', limit=5)) == 5
+
+
+def test_oldest_articles_are_evicted():
+    index = SearchIndex(max_documents=50)
+    for article in articles(80):
+        index.add(article)
+    assert len(index) == 50
+    found = urls(index.search('markets', limit=1000))
+    assert 'https://example.com/story-0' not in found
+    assert 'https://example.com/story-79' in found
+    # An evicted story can be indexed again
+    assert index.add(articles(1)[0])
+
+
+def test_results_survive_compaction():
+    index = SearchIndex(max_documents=200)
+    for article in articles(1300):
+        index.add(article)
+    # 1100 evictions pass the compaction threshold; it runs once and renumbers ids from 0
+    assert index._tombstones < 1000
+    assert index._next_id < 1300
+    live = articles(200, offset=1100)
+    fresh = SearchIndex(max_documents=200)
+    for article in live:
+        fresh.add(article)
+    for query, filters in [('inflation markets', {}), ('treasury', {'sources': {'cnbc'}}),
+                           ('oil payrolls', {'start': '2024-06-01'})]:
+        compacted, expected = index.search(query, 50, **filters), fresh.search(query, 50, **filters)
+        assert urls(compacted) == urls(expected)
+        assert [score for score, _ in compacted] == pytest.approx([score for score, _ in expected])
+    # Adding after compaction keeps working on the renumbered ids
+    index.add(articles(1, offset=5000)[0])
+    assert 'https://example.com/story-5000' in urls(index.search('story 5000 markets', 5))
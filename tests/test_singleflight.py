@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from app import singleflight as singleflight_module
+from app.singleflight import SingleFlight
+
+CALLERS = 8
+
+
+def run_concurrently(flight, fn):
+    """Call flight.do from CALLERS threads while the leader's fn is in flight; return each outcome."""
+    started = threading.Event()
+    release = threading.Event()
+    outcomes = [None] * CALLERS
+
+    def leader_fn():
+        started.set()
+        release.wait(5)
+        return fn()
+
+    def call(i):
+        try:
+            outcomes[i] = ('result', flight.do('key', leader_fn))
+        except Exception as e:
+            outcomes[i] = ('error', e)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(CALLERS)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    # Give the followers time to find the call in flight before it finishes
+    time.sleep(0.1)
+    assert flight.in_flight() == 1
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert flight.in_flight() == 0
+    return outcomes
+
+
+def test_concurrent_calls_run_once_and_share_the_result():
+    calls = []
+
+    def fn():
+        calls.append(1)
+        return object()
+
+    outcomes = run_concurrently(SingleFlight(), fn)
+    assert len(calls) == 1
+    assert len({id(result) for kind, result in outcomes}) == 1
+    assert all(kind == 'result' for kind, _ in outcomes)
+
+
+def test_concurrent_calls_share_the_exception():
+    calls = []
+
+    def fn():
+        calls.append(1)
+        raise ValueError('upstream down')
+
+    outcomes = run_concurrently(SingleFlight(), fn)
+    assert len(calls) == 1
+    assert all(kind == 'error' and str(error) == 'upstream down' for kind, error in outcomes)
+
+
+def test_later_calls_run_again():
+    flight = SingleFlight()
+    assert flight.do('key', lambda: 1) == 1
+    assert flight.do('key', lambda: 2) == 2
+
+
+@pytest.mark.skipif(singleflight_module.fcntl is None, reason='flock is not available')
+def test_leaders_in_other_processes_queue_on_the_lock_file(tmp_path):
+    # Two instances sharing a lock directory stand in for two worker processes
+    first, second = SingleFlight(str(tmp_path)), SingleFlight(str(tmp_path))
+    started = threading.Event()
+    release = threading.Event()
+    order = []
+
+    def slow():
+        started.set()
+        release.wait(5)
+        order.append('first')
+
+    threads = [threading.Thread(target=first.do, args=('key', slow)),
+               threading.Thread(target=second.do, args=('key', lambda: order.append('second')))]
+    threads[0].start()
+    started.wait(5)
+    threads[1].start()
+    time.sleep(0.1)
+    assert order == []
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert order == ['first', 'second']
+    # Other keys take other lock files and are not held up
+    assert first.do('other', lambda: 'done') == 'done'
@@ -0,0 +1,85 @@
+import os
+import pickle
+import threading
+import time
+
+import pytest
+
+from app import startup
+from app.articles import article_pool, normalize
+from app.cache import CacheEntry, response_cache
+from app.startup import load_snapshot, save_snapshot
+
+
+@pytest.fixture
+def cached():
+    """Put entries in the response cache for the test, removing them afterwards."""
+    keys = []
+
+    def put(key, value, stored_at=None, ttl=600):
+        keys.append(key)
+        response_cache.backend.set(key, CacheEntry(value, stored_at or time.time(), ttl))
+    yield put
+    for key in keys:
+        response_cache.backend.delete(key)
+
+
+def pooled_articles(slug):
+    return article_pool.adopt(normalize([{"title": f"{slug} story", "url": f"https://example.com/{slug}",
+                                          "source": {"name": "Reuters"}}]))
+
+
+def test_snapshot_round_trip_restores_pooled_articles(tmp_path, cached):
+    path = str(tmp_path / 'snapshot.pickle')
+    articles = pooled_articles('snapshot-round-trip')
+    stored_at = time.time() - 120
+    cached('snapshot:feed', articles, stored_at, ttl=60)
+    assert save_snapshot(path) >= 1
+
+    response_cache.backend.delete('snapshot:feed')
+    assert load_snapshot(path) >= 1
+    entry = response_cache.get('snapshot:feed')
+    # Fetch time and TTL survive, so the stale entry refreshes as usual
+    assert entry.stored_at == stored_at and not entry.is_fresh()
+    # Unpickled copies resolve to the articles already in the pool
+    assert entry.value[0] is articles[0]
+
+
+def test_snapshot_skips_old_and_present_entries(tmp_path, cached):
+    path = str(tmp_path / 'snapshot.pickle')
+    cached('snapshot:old', pooled_articles('snapshot-old'), time.time() - 7200)
+    cached('snapshot:present', pooled_articles('snapshot-present'))
+    save_snapshot(path)
+    response_cache.backend.delete('snapshot:old')
+    kept = response_cache.get('snapshot:present')
+
+    load_snapshot(path, max_age=3600)
+    assert response_cache.get('snapshot:old') is None
+    assert response_cache.get('snapshot:present') is kept
+
+
+def test_snapshot_from_another_version_is_ignored(tmp_path, cached):
+    path = tmp_path / 'snapshot.pickle'
+    path.write_bytes(pickle.dumps({'version': startup.SNAPSHOT_VERSION + 1, 'saved_at': time.time(),
+                                   'responses': [('snapshot:other', time.time(), 60, [])]}))
+    assert load_snapshot(str(path)) == 0
+    assert response_cache.get('snapshot:other') is None
+    path.write_bytes(b'not a pickle')
+    assert load_snapshot(str(path)) == 0
+    assert load_snapshot(str(tmp_path / 'missing.pickle')) == 0
+
+
+def test_empty_cache_keeps_the_last_snapshot(tmp_path, monkeypatch):
+    path = tmp_path / 'snapshot.pickle'
+    path.write_bytes(b'previous')
+    monkeypatch.setattr(response_cache.backend, 'items', lambda: [])
+    assert save_snapshot(str(path)) == 0
+    assert path.read_bytes() == b'previous'
+
+
+def test_precompile_builds_only_templates(tmp_path, monkeypatch):
+    monkeypatch.setattr(startup, 'TEMPLATE_CACHE_DIR', str(tmp_path / 'jinja'))
+    threads = {thread.name for thread in threading.enumerate()}
+    startup.main()
+    assert len(os.listdir(tmp_path / 'jinja')) == len(startup.PRECOMPILED_TEMPLATES)
+    assert {thread.name for thread in threading.enumerate()} <= threads
@@ -0,0 +1,131 @@
+import sqlite3
+
+import pytest
+
+from app import store
+from app.cache import MemoryBackend
+from app.store import FULL_HISTORY, HISTORY_FLOOR, SeriesStore, ensure_synced, needs_history
+
+
+@pytest.fixture
+def series_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, 'backfill_failures', MemoryBackend())
+    return SeriesStore(str(tmp_path / 'series.db'))
+
+
+def bls_rows(series_ids, start_year, end_year):
+    return {series_id: [{"year": str(year), "period": "M01", "value": "1.0", "footnotes": []}
+                        for year in range(int(start_year), int(end_year) + 1)] for series_id in series_ids}
+
+
+def test_coverage_only_moves_earlier(series_db):
+    series_db.upsert('S', 'fred', [('2020-01-01', 1.0, None)], '2015-01-01')
+    series_db.upsert('S', 'fred', [('2020-02-01', 2.0, None)])
+    assert series_db.covered_from('S') == '2015-01-01'
+    series_db.upsert('S', 'fred', [], '2018-01-01')
+    assert series_db.covered_from('S') == '2015-01-01'
+    series_db.upsert('S', 'fred', [], '2010-01-01')
+    assert series_db.covered_from('S') == '2010-01-01'
+
+
+def test_unrecorded_coverage_falls_back_to_first_date(series_db):
+    series_db.upsert('S', 'bls', [('2016-01-01', 1.0, None), ('2020-01-01', 2.0, None)])
+    assert series_db.covered_from('S') == '2016-01-01'
+    assert needs_history(series_db, ['S', 'EMPTY'], '2010-01-01') == ['S']
+    assert needs_history(series_db, ['S'], '2016-01-01') == []
+
+
+def test_adds_coverage_column_to_old_databases(tmp_path):
+    path = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE series_sync (series TEXT PRIMARY KEY, provider TEXT NOT NULL, synced_at REAL NOT NULL)')
+    conn.execute("INSERT INTO series_sync VALUES ('S', 'fred', 0)")
+    conn.commit()
+    conn.close()
+    series_db = SeriesStore(path)
+    series_db.upsert('S', 'fred', [], '2000-01-01')
+    assert series_db.covered_from('S') == '2000-01-01'
+
+
+def test_bls_backfills_in_year_spans(series_db, monkeypatch):
+    calls = []
+
+    def fetch(series_ids, start_year, end_year):
+        calls.append((start_year, end_year))
+        return bls_rows(series_ids, start_year, end_year)
+    monkeypatch.setattr(store, 'fetch_bls_series', fetch)
+    monkeypatch.delenv('BLS_API_KEY', raising=False)
+    series_db.upsert('CES', 'bls', [('2017-01-01', 1.0, None)], '2017-01-01')
+
+    ensure_synced(series_db, 'bls', ['CES'], start='2005-01-01')
+    assert calls == [(2007, 2016), (2005, 2006)]
+    assert series_db.covered_from('CES') == '2005-01-01'
+    assert series_db.query('CES', '2005-01-01', '2005-12-31')
+
+    ensure_synced(series_db, 'bls', ['CES'], start='2006-06-01')
+    assert len(calls) == 2
+
+
+def test_fred_backfills_before_first_date(series_db, monkeypatch):
+    calls = []
+
+    def fetch(series_id, **params):
+        calls.append(params)
+        return [{"date": "2000-01-01", "value": "5.0"}]
+    monkeypatch.setattr(store, 'fetch_fred_observations', fetch)
+    series_db.upsert('FEDFUNDS', 'fred', [('2010-01-01', 1.0, None)])
+
+    ensure_synced(series_db, 'fred', ['FEDFUNDS'], start='1990-01-01')
+    assert calls == [{'sort_order': 'asc', 'observation_start': '1990-01-01', 'observation_end': '2010-01-01'}]
+    assert series_db.covered_from('FEDFUNDS') == '1990-01-01'
+    ensure_synced(series_db, 'fred', ['FEDFUNDS'], start='1995-01-01')
+    assert len(calls) == 1
+
+
+def test_first_fred_sync_covers_whole_history(series_db, monkeypatch):
+    monkeypatch.setattr(store, 'fetch_fred_observations', lambda series_id, **params: [
+        {"date": "2020-01-01", "value": "1.0"}])
+    store.sync_fred(series_db, 'NEW')
+    assert series_db.covered_from('NEW') == FULL_HISTORY
+    assert needs_history(series_db, ['NEW'], '1900-01-01') == []
+
+
+def test_failed_backfill_serves_stored_data(series_db, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError('upstream down')
+    monkeypatch.setattr(store, 'fetch_fred_observations', fail)
+    series_db.upsert('S', 'fred', [('2010-01-01', 1.0, None)])
+    ensure_synced(series_db, 'fred', ['S'], start='2000-01-01')
+    assert series_db.covered_from('S') == '2010-01-01'
+
+
+def test_failed_backfill_is_not_retried_at_once(series_db, monkeypatch):
+    calls = []
+
+    def fail(*args, **kwargs):
+        calls.append(args)
+        raise RuntimeError('upstream down')
+    monkeypatch.setattr(store, 'fetch_bls_series', fail)
+    series_db.upsert('CES', 'bls', [('2017-01-01', 1.0, None)])
+    ensure_synced(series_db, 'bls', ['CES'], start='2010-01-01')
+    ensure_synced(series_db, 'bls', ['CES'], start='2010-01-01')
+    assert len(calls) == 1
+
+
+def test_backfill_is_clamped_and_capped(series_db, monkeypatch):
+    calls = []
+
+    def fetch(series_ids, start_year, end_year):
+        calls.append((start_year, end_year))
+        return {}
+    monkeypatch.setattr(store, 'fetch_bls_series', fetch)
+    monkeypatch.delenv('BLS_API_KEY', raising=False)
+    series_db.upsert('CES', 'bls', [('2017-03-01', 1.0, None)])
+
+    ensure_synced(series_db, 'bls', ['CES'], start='0001-01-01')
+    assert calls == [(2008, 2017), (1998, 2007), (1988, 1997)]
+    assert series_db.covered_from('CES') == '1988-01-01'
+    while needs_history(series_db, ['CES'], HISTORY_FLOOR['bls']):
+        ensure_synced(series_db, 'bls', ['CES'], start='0001-01-01')
+    assert calls[-1] == (1913, 1917)
+    assert len(calls) == 11
@@ -0,0 +1,131 @@
+import time
+
+import pytest
+import requests
+
+from app import upstream
+from app.budget import ProviderBudget
+from app.upstream import BudgetExhaustedError, CircuitBreaker, CircuitOpenError, UpstreamClient
+
+
+def response(status, headers=None):
+    result = requests.Response()
+    result.status_code = status
+    result.headers.update(headers or {})
+    return result
+
+
+class FakeSession:
+    """Stands in for requests.Session, answering each call with the next queued result."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(upstream.time, 'sleep', slept.append)
+    return slept
+
+
+def make_client(*results, budget=None, max_retries=2):
+    client = UpstreamClient('test', 'http://upstream', max_retries=max_retries)
+    client.session = FakeSession(*results)
+    client.budget = budget
+    return client
+
+
+def test_retries_server_errors_with_jittered_backoff(sleeps, monkeypatch):
+    monkeypatch.setattr(upstream.random, 'uniform', lambda low, high: high)
+    client = make_client(response(503), response(502), response(200))
+    assert client.get('/x').status_code == 200
+    assert client.session.calls == 3
+    assert sleeps == [upstream.BACKOFF_BASE, upstream.BACKOFF_BASE * 2]
+    assert client.breaker.failures == 0
+
+
+def test_backoff_is_capped_full_jitter():
+    client = make_client()
+    for attempt in range(10):
+        assert 0 <= client.backoff(attempt) <= min(upstream.BACKOFF_MAX, upstream.BACKOFF_BASE * 2 ** attempt)
+
+
+def test_client_errors_are_not_retried(sleeps):
+    client = make_client(response(404))
+    assert client.get('/x').status_code == 404
+    assert client.session.calls == 1 and sleeps == []
+
+
+def test_last_retryable_answer_is_returned_and_counted(sleeps):
+    client = make_client(response(500), response(500), response(500))
+    assert client.get('/x').status_code == 500
+    assert client.session.calls == 3
+    assert client.breaker.failures == 1
+
+
+def test_connection_errors_are_raised_after_retries(sleeps):
+    client = make_client(*[requests.exceptions.ConnectionError('reset')] * 3)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.get('/x')
+    assert client.session.calls == 3
+    assert client.breaker.failures == 1
+
+
+def test_rate_limited_answer_pauses_the_budget(sleeps):
+    budget = ProviderBudget('test', rate=100, window=1)
+    client = make_client(response(429, {'Retry-After': '0.2'}), response(200), budget=budget)
+    started = time.monotonic()
+    assert client.get('/x').status_code == 200
+    assert time.monotonic() - started >= 0.2
+    assert client.session.calls == 2
+
+
+def test_no_retries_once_the_quota_is_spent(sleeps):
+    budget = ProviderBudget('test', daily=2, reserve=0)
+    client = make_client(response(503), response(503), budget=budget)
+    assert client.get('/x').status_code == 503
+    assert client.session.calls == 2
+    with pytest.raises(BudgetExhaustedError):
+        client.get('/x')
+
+
+def test_open_circuit_refuses_calls(sleeps):
+    client = make_client(response(200))
+    client.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    client.breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        client.get('/x')
+    assert client.session.calls == 0
+
+
+def test_breaker_opens_then_half_opens_for_one_trial():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == 'closed' and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.state == 'half-open'
+    # One trial request goes through; the rest wait for its outcome
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed' and breaker.allow()
+
+
+def test_failed_trial_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()